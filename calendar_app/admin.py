@@ -1,20 +1,181 @@
 # ./calendar_app/admin.py
 
 # Register your models here.
+import json
+from datetime import date, timedelta
+
 from django.contrib import admin
-from .models import Calendar, Event
+from django.contrib.admin import ShowFacets
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+from .cache import bump_calendar_version
+from .deletion import request_calendar_deletion
+from .models import Calendar, CalendarDeletion, Event, EventQuerySet, Recurrence, Tombstone
+from .sync import delete_events
+
+# Выше этой оценки планировщика точный COUNT(*) не выполняется
+ESTIMATED_COUNT_THRESHOLD = 10000
+# Больше периодов в date_hierarchy проверять по одному нет смысла
+MAX_DATE_PROBES = 100
+
+
+class EstimatedCountPaginator(Paginator):
+    # На PostgreSQL число строк большой выборки берётся из оценки
+    # планировщика (EXPLAIN, статистика ANALYZE), а не из COUNT(*) по всей
+    # таблице. Число страниц приблизительно, последняя может оказаться пустой.
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == 'postgresql':
+            estimate = json.loads(queryset.explain(format='json'))[0]['Plan']['Plan Rows']
+            if estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class ProbedDatesQuerySet(EventQuerySet):
+    # Для date_hierarchy: вместо SELECT DISTINCT по всем строкам периода —
+    # MIN/MAX и по одному EXISTS на год, месяц или день. Каждая проверка —
+    # поиск по индексу (date) или (calendar, date), число запросов зависит
+    # от числа периодов, а не от числа событий.
+    def dates(self, field_name, kind, order='ASC'):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if kind not in ('year', 'month', 'day') or bounds['first'] is None:
+            return super().dates(field_name, kind, order)
+        starts = list(self._period_starts(kind, bounds['first'], bounds['last']))
+        if len(starts) > MAX_DATE_PROBES:
+            return super().dates(field_name, kind, order)
+        found = [
+            start for start, end in zip(starts, starts[1:] + [self._next_period(kind, starts[-1])])
+            if self.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}).exists()
+        ]
+        return found if order == 'ASC' else found[::-1]
+
+    @classmethod
+    def _period_starts(cls, kind, first, last):
+        start = {'year': date(first.year, 1, 1), 'month': date(first.year, first.month, 1), 'day': first}[kind]
+        while start <= last:
+            yield start
+            start = cls._next_period(kind, start)
+
+    @staticmethod
+    def _next_period(kind, start):
+        if kind == 'year':
+            return date(start.year + 1, 1, 1)
+        if kind == 'month':
+            return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return start + timedelta(days=1)
+
+
+class CalendarIdFilter(admin.SimpleListFilter):
+    # Поле для UUID календаря вместо списка всех календарей
+    title = 'календарю'
+    parameter_name = 'calendar'
+    template = 'admin/calendar_id_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            return queryset.filter(calendar_id=self.value())
+        except ValidationError as e:
+            # Админка покажет список с ошибкой фильтра (?e=1)
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        yield {
+            'value': self.value() or '',
+            'params': [(name, value) for name, value in changelist.params.items() if name != self.parameter_name],
+            'reset': changelist.get_query_string(remove=[self.parameter_name]),
+        }
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    # Списки на десятки миллионов строк: без точного подсчёта всей таблицы
+    # («показать все N») и без подсчётов для фасетов фильтров
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = ShowFacets.NEVER
+
 
 @admin.register(Calendar)
-class CalendarAdmin(admin.ModelAdmin):
+class CalendarAdmin(ScalableAdmin):
     list_display = ('name', 'id', 'created_at')
+    # Поиск и автодополнение идут по триграммному индексу UPPER(name)
     search_fields = ('name',)
-    ordering = ('-created_at',)
+    # Совпадает с индексом calendar_created_id_idx
+    ordering = ('-created_at', '-id')
+
+    # Календарь только помечается на удаление, события удаляет purge_calendars
+    # (см. deletion.py). Страница подтверждения не перечисляет события: для
+    # больших календарей это загрузка всей таблицы.
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {Calendar._meta.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        request_calendar_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for calendar in queryset:
+            request_calendar_deletion(calendar)
+
+
+class RecurrenceInline(admin.StackedInline):
+    model = Recurrence
+    extra = 0
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(ScalableAdmin):
+    inlines = [RecurrenceInline]
     list_display = ('title', 'calendar', 'date')
-    list_filter = ('calendar',)
+    list_select_related = ('calendar',)
+    list_filter = (CalendarIdFilter,)
+    autocomplete_fields = ('calendar',)
     search_fields = ('title',)
-    
-    
\ No newline at end of file
+    # Индексы (date) и (calendar, date): без фильтра и с фильтром по календарю
+    date_hierarchy = 'date'
+    ordering = ('-date', '-id')
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return ProbedDatesQuerySet(queryset.model, queryset.query, using=queryset.db)
+
+    # Изменения через админку тоже должны сбрасывать кэш сетки месяца
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        bump_calendar_version(form.instance.calendar_id)
+
+    def delete_model(self, request, obj):
+        delete_events(obj.calendar_id, [obj.id])
+        bump_calendar_version(obj.calendar_id)
+
+    def delete_queryset(self, request, queryset):
+        by_calendar = {}
+        for event_id, calendar_id in queryset.values_list('id', 'calendar_id'):
+            by_calendar.setdefault(calendar_id, []).append(event_id)
+        for calendar_id, event_ids in by_calendar.items():
+            delete_events(calendar_id, event_ids)
+            bump_calendar_version(calendar_id)
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('calendar_id', 'event_id', 'deleted_at')
+    ordering = ('-deleted_at',)
+
+
+@admin.register(CalendarDeletion)
+class CalendarDeletionAdmin(admin.ModelAdmin):
+    list_display = ('calendar_id', 'requested_at', 'deleted_events', 'total_events', 'finished_at')
+    ordering = ('-requested_at',)
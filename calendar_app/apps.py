@@ -5,3 +5,8 @@ from django.apps import AppConfig
 class CalendarAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calendar_app'
+
+    def ready(self):
+        # Подключает обработчики сигналов, сбрасывающие кэш названий календарей,
+        # и проверку сторонней статики
+        from . import assets, cache  # noqa: F401
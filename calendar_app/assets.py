@@ -0,0 +1,160 @@
+# ./calendar_app/assets.py
+
+# Статика без внешних CDN. Сторонние библиотеки лежат в static/vendor
+# (загружает и проверяет vendor_assets), стили и скрипты страниц — в
+# static/calendar_app. При STATIC_MANIFEST=True collectstatic даёт файлам
+# имена с хешем содержимого и кладёт рядом сжатые копии .gz и .br (brotli —
+# если установлен). Файл с хешем в имени не меняется, поэтому отдаётся с
+# Cache-Control: immutable на год: повторная загрузка страницы скачивает
+# только HTML.
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.checks import Warning, register
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # без brotli collectstatic создаёт только .gz
+    brotli = None
+
+VENDOR_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+# (путь в static, источник, SRI-хеш файла источника)
+VENDOR_ASSETS = [
+    ('vendor/jquery/jquery-3.7.1.min.js',
+     'https://code.jquery.com/jquery-3.7.1.min.js',
+     'sha256-/JqT3SQfawRcv/BIHPThkBvs0OEvtFFmqPF/lYI/Cxo='),
+    ('vendor/bootstrap-4.5.2/bootstrap.min.css',
+     'https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/css/bootstrap.min.css',
+     'sha384-JcKb8q3iqJ61gNV9KGb8thSsNjpSL0n8PARn9HuZOnIxN0hoP+VmmDGMN5t9UJ0Z'),
+    ('vendor/bootstrap-4.5.2/bootstrap.bundle.min.js',
+     'https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/js/bootstrap.bundle.min.js',
+     'sha384-LtrjvnR4Twt/qOuYxE721u19sVFLVSA4hf/rRt6PrZTmiPltdZcI7q7PXQBYTKyf'),
+    ('vendor/bootstrap-5.3.0/bootstrap.min.css',
+     'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+     'sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM'),
+]
+
+VENDOR_SOURCES = {path: (url, integrity) for path, url, integrity in VENDOR_ASSETS}
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map')
+# Мелкие файлы сжатие почти не уменьшает
+COMPRESS_MIN_SIZE = 512
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Имена без хеша (STATIC_MANIFEST=False) указывают на изменяемое содержимое
+MUTABLE_CACHE_CONTROL = 'public, max-age=60'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                if name.endswith(COMPRESSIBLE):
+                    self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        # mtime=0: одинаковый файл даёт одинаковый .gz при каждой сборке
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self.save(name + suffix, ContentFile(compressed))
+
+
+@lru_cache(maxsize=None)
+def vendored(path):
+    # Скачан ли файл командой vendor_assets; без него страницы берут его с CDN
+    return os.path.isfile(os.path.join(VENDOR_DIR, path))
+
+
+@lru_cache(maxsize=None)
+def hashed_names():
+    # Манифест читается при создании хранилища; новая сборка — новый процесс
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+@lru_cache(maxsize=None)
+def build_id():
+    # Хеш манифеста: меняется, когда collectstatic собрал другие файлы. Без
+    # манифеста имена файлов не меняются, и идентификатор не нужен.
+    read_manifest = getattr(staticfiles_storage, 'read_manifest', None)
+    content = read_manifest() if read_manifest else None
+    return hashlib.sha256(content.encode()).hexdigest()[:12] if content else ''
+
+
+def accepted_encodings(header):
+    # Кодировки из Accept-Encoding, кроме явно запрещённых (q=0)
+    encodings = set()
+    for part in header.split(','):
+        token, _, params = part.partition(';')
+        name, _, value = params.strip().partition('=')
+        try:
+            if name.strip() == 'q' and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(token.strip().lower())
+    return encodings
+
+
+def serve_static(request, path):
+    # Раздача STATIC_ROOT самим приложением (SERVE_STATIC=True), если перед
+    # ним нет nginx: сжатая копия по Accept-Encoding, immutable для имён с хешем
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    mtime = os.stat(full_path).st_mtime
+    if not was_modified_since(request.headers.get('If-Modified-Since'), mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    served_path, encoding = full_path, None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + suffix):
+            served_path, encoding = full_path + suffix, name
+            break
+
+    response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(mtime)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if path in hashed_names() else MUTABLE_CACHE_CONTROL
+    return response
+
+
+@register()
+def check_vendor_assets(app_configs, **kwargs):
+    missing = [path for path, _, _ in VENDOR_ASSETS if not os.path.isfile(os.path.join(VENDOR_DIR, path))]
+    if not missing:
+        return []
+    return [Warning(
+        f"Нет сторонних файлов статики, страницы загружают их с CDN: {', '.join(missing)}",
+        hint='Выполните python manage.py vendor_assets',
+        id='calendar_app.W001',
+    )]
@@ -0,0 +1,140 @@
+# ./calendar_app/async_views.py
+
+# Асинхронные версии JSON-эндпоинтов событий для запуска под ASGI
+# (см. ASYNC_VIEWS в settings.py). Под WSGI используются вьюхи из views.py.
+
+import asyncio
+import json
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+
+from . import push
+from .cache import abump_calendar_version
+from .db import read_from_replica
+from .models import Calendar, Event
+from .recurrence import arecurring_occurrences, group_by_date, parse_recurrence
+from .sync import delete_events
+from .throttle import throttle_writes
+from .utils import parse_date
+from .views import calendar_last_modified, create_event, get_events_etag
+
+
+# Как часто слать комментарий в поток, чтобы прокси не закрывали простаивающее соединение
+PUSH_KEEPALIVE = 15
+
+
+def prefetch_calendar(view):
+    # condition() вызывает функции ETag синхронно, поэтому календарь
+    # выбирается заранее асинхронным запросом и кладётся в request
+    @wraps(view)
+    async def inner(request, calendar_id, *args, **kwargs):
+        if not hasattr(request, '_calendar'):
+            request._calendar = await Calendar.objects.filter(id=calendar_id).afirst()
+        return await view(request, calendar_id, *args, **kwargs)
+    return inner
+
+
+@csrf_exempt
+@read_from_replica
+@prefetch_calendar
+@condition(etag_func=get_events_etag, last_modified_func=calendar_last_modified)
+async def get_events(request, calendar_id):
+    date = parse_date(request.GET.get('date'))
+    if date is None:
+        return JsonResponse({'error': 'Invalid date'}, status=400)
+
+    calendar = request._calendar
+    if calendar is None:
+        raise Http404
+    events = [e async for e in Event.objects.filter(calendar=calendar).on_day(date)]
+    recurring = await arecurring_occurrences(calendar.id, date, date + timedelta(days=1))
+    events = group_by_date(events, recurring).get(date, [])
+    events_data = [{'id': e.id, 'title': e.title, 'description': e.description} for e in events]
+    return JsonResponse({'events': events_data})
+
+
+@csrf_exempt
+@throttle_writes
+async def add_event(request, calendar_id):
+    if request.method == 'POST':
+        calendar = await aget_object_or_404(Calendar, id=calendar_id)
+        title = request.POST.get('title')
+        description = request.POST.get('description')
+        date = parse_date(request.POST.get('date'))
+        if date is None:
+            return JsonResponse({'status': 'error', 'message': 'Invalid date'})
+        recurrence = parse_recurrence(request.POST)
+        if recurrence is False:
+            return JsonResponse({'status': 'error', 'message': 'Invalid recurrence'})
+        if recurrence:
+            # Событие и правило создаются в одной транзакции, а transaction.atomic
+            # в асинхронном коде недоступен
+            event = await sync_to_async(create_event)(calendar, title, description, date, recurrence)
+        else:
+            event = await Event.objects.acreate(calendar=calendar, title=title, description=description, date=date)
+        await abump_calendar_version(calendar.id)
+        push.publish_now(calendar.id, push.event_message('create', event, recurring=bool(recurrence)))
+        return JsonResponse({'status': 'success'})
+    return JsonResponse({'status': 'error', 'message': 'Invalid request'})
+
+
+@csrf_exempt
+@throttle_writes
+async def edit_event(request, calendar_id, event_id):
+    if request.method == 'POST':
+        event = await aget_object_or_404(Event, id=event_id, calendar_id=calendar_id, calendar__deleted_at__isnull=True)
+        event.title = request.POST.get('title', event.title)
+        event.description = request.POST.get('description', event.description)
+        await event.asave()
+        await abump_calendar_version(calendar_id)
+        push.publish_now(calendar_id, push.event_message('update', event))
+        return JsonResponse({'status': 'success'})
+    return JsonResponse({'status': 'error'})
+
+
+@csrf_exempt
+@throttle_writes
+async def delete_event(request, calendar_id, event_id):
+    if request.method == 'POST':
+        event = await aget_object_or_404(
+            Event.objects.select_related('recurrence'),
+            id=event_id, calendar_id=calendar_id, calendar__deleted_at__isnull=True,
+        )
+        # Удаление и запись об удалении — в одной транзакции
+        await sync_to_async(delete_events)(calendar_id, [event.id])
+        await abump_calendar_version(calendar_id)
+        push.publish_now(calendar_id, push.event_message('delete', event, recurring=hasattr(event, 'recurrence')))
+        return JsonResponse({'status': 'success'})
+    return JsonResponse({'status': 'error'})
+
+
+async def event_stream(request, calendar_id):
+    # Server-Sent Events: изменения событий календаря для открытой страницы.
+    # Каждый подписчик — корутина и очередь в памяти, без потока на соединение.
+    if not await Calendar.objects.filter(id=calendar_id).aexists():
+        raise Http404
+
+    async def stream():
+        subscription = push.subscribe(calendar_id)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    message = await subscription.get(PUSH_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'data: {json.dumps(message, ensure_ascii=False)}\n\n'
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
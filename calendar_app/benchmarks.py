@@ -0,0 +1,287 @@
+# ./calendar_app/benchmarks.py
+
+import math
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .admin import EstimatedCountPaginator
+from .cache import bump_calendar_version
+from .models import Calendar, Event
+
+# Допустимое число SQL-запросов на один вызов сценария. Превышение бюджета —
+# регрессия: обычно это N+1 или потерянный кэш. Мутации включают три запроса
+# bump_calendar_version: версия и отметка событий и удалений для ленты изменений.
+QUERY_BUDGETS = {
+    'home': 1,
+    'search': 1,
+    'enter_calendar': 1,
+    'calendar_view_cold': 3,
+    'calendar_view_warm': 1,
+    'get_events': 3,
+    'get_events_range': 3,
+    'add_event': 5,
+    'edit_event': 5,
+    'delete_event': 7,
+}
+
+# То же для страниц админки (bench_admin). Число запросов не должно зависеть
+# от размера страницы списка и от размера таблиц; date_hierarchy добавляет
+# по запросу на год с событиями (seed_data — до 7 лет) или на месяц года.
+ADMIN_QUERY_BUDGETS = {
+    'admin_events': 16,
+    'admin_events_calendar': 16,
+    'admin_events_year': 20,
+    'admin_events_deep_page': 16,
+    'admin_event_change': 6,
+    'admin_calendar_autocomplete': 4,
+    'admin_calendars': 4,
+}
+
+BENCH_TITLE = 'Бенчмарк'
+BENCH_ADMIN = 'bench-admin'
+# Календарь сценариев: мутации бенчмарка не трогают настоящие данные
+BENCH_CALENDAR = 'bench-scenarios'
+
+TITLES = ['Встреча', 'Созвон', 'Обед', 'Тренировка', 'Планёрка', 'Отчёт', 'День рождения', 'Врач', 'Поездка']
+
+
+class ScenarioFailed(Exception):
+    pass
+
+
+def seed(calendars, events, batch_size=10000, seed_value=0, stdout=None):
+    # Размер календарей распределён по закону Ципфа (немного очень больших
+    # общих календарей и много маленьких), даты сгущаются вокруг сегодняшнего
+    # дня: 80% событий в пределах нескольких месяцев, остальные — за 5 лет.
+    rnd = random.Random(seed_value)
+    today = timezone.localdate()
+
+    existing = Calendar.objects.exclude(name=BENCH_CALENDAR).count()
+    for start in range(existing, calendars, batch_size):
+        Calendar.objects.bulk_create([
+            Calendar(name=f'Календарь {i}') for i in range(start, min(start + batch_size, calendars))
+        ])
+    calendar_ids = list(
+        Calendar.objects.exclude(name=BENCH_CALENDAR).order_by('created_at', 'id')
+        .values_list('id', flat=True)[:calendars]
+    )
+    weights = list(_cumulative(1 / (rank ** 1.1) for rank in range(1, len(calendar_ids) + 1)))
+
+    created = 0
+    while created < events:
+        size = min(batch_size, events - created)
+        Event.objects.bulk_create([
+            _random_event(rnd, calendar_id, today)
+            for calendar_id in rnd.choices(calendar_ids, cum_weights=weights, k=size)
+        ])
+        created += size
+        if stdout:
+            stdout.write(f'events: {created}/{events}')
+    _analyze()
+
+
+def _random_event(rnd, calendar_id, today):
+    if rnd.random() < 0.8:
+        offset = int(rnd.gauss(0, 60))
+    else:
+        offset = -rnd.randint(0, 5 * 365)
+    return Event(
+        calendar_id=calendar_id,
+        title=rnd.choice(TITLES),
+        description='Описание события ' * rnd.randint(0, 20),
+        date=today + timedelta(days=offset),
+        # Сразу в ленте изменений: иначе первый bump_calendar_version отмечал бы
+        # все сгенерированные события календаря
+        change_seq=0,
+    )
+
+
+def _analyze():
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE calendar_app_calendar, calendar_app_event')
+
+
+def _cumulative(values):
+    total = 0
+    for value in values:
+        total += value
+        yield total
+
+
+def largest_calendar_size():
+    row = (
+        Event.objects.exclude(calendar__name=BENCH_CALENDAR).values('calendar_id')
+        .annotate(total=Count('id')).order_by('-total').first()
+    )
+    return row['total'] if row else 0
+
+
+def bench_calendar(events=None, batch_size=10000, seed_value=0):
+    # Календарь сценариев с events событиями (по умолчанию — как самый
+    # большой календарь базы). Сценарии добавляют и удаляют только свои
+    # события, поэтому размер между прогонами сохраняется.
+    calendar = Calendar.objects.filter(name=BENCH_CALENDAR).first() or Calendar.objects.create(name=BENCH_CALENDAR)
+    if events is None:
+        events = largest_calendar_size()
+    missing = events - Event.objects.filter(calendar=calendar).count()
+    if missing > 0:
+        rnd = random.Random(seed_value)
+        today = timezone.localdate()
+        for start in range(0, missing, batch_size):
+            Event.objects.bulk_create([
+                _random_event(rnd, calendar.id, today) for _ in range(min(batch_size, missing - start))
+            ])
+        _analyze()
+    return calendar
+
+
+def scenarios(calendar):
+    # (имя, подготовка, замеряемое действие). Подготовка не входит ни в
+    # задержку, ни в число запросов.
+    today = timezone.localdate()
+    day = today.strftime('%Y-%m-%d')
+    month_url = f'/calendar/{calendar.id}/{today.year}/{today.month}/'
+    state = {}
+
+    def remember_event():
+        state['event_id'] = (
+            Event.objects.filter(calendar=calendar, title=BENCH_TITLE).values_list('id', flat=True).last()
+        )
+        if state['event_id'] is None:
+            raise ScenarioFailed('edit_event: add_event не создал событие')
+
+    def noop():
+        pass
+
+    # Порядок важен: edit_event и delete_event работают с событием из add_event,
+    # а новая версия календаря перед calendar_view_cold гарантирует промах кэша
+    return [
+        ('home', noop, lambda c: c.get('/')),
+        ('search', noop, lambda c: c.get('/search/', {'q': calendar.name[:6]})),
+        ('enter_calendar', noop, lambda c: c.get(f'/calendar/{calendar.name}/enter/')),
+        ('calendar_view_cold', lambda: bump_calendar_version(calendar.id), lambda c: c.get(month_url)),
+        ('calendar_view_warm', noop, lambda c: c.get(month_url)),
+        ('get_events', noop, lambda c: c.get(f'/calendar/{calendar.id}/get_events/', {'date': day})),
+        ('get_events_range', noop, lambda c: c.get(f'/calendar/{calendar.id}/events/', {
+            'start': (today - timedelta(days=7)).strftime('%Y-%m-%d'),
+            'end': (today + timedelta(days=35)).strftime('%Y-%m-%d'),
+        })),
+        ('add_event', noop, lambda c: c.post(
+            f'/calendar/{calendar.id}/add_event/', {'title': BENCH_TITLE, 'description': '', 'date': day})),
+        ('edit_event', remember_event, lambda c: c.post(
+            f"/calendar/{calendar.id}/edit_event/{state['event_id']}/", {'title': BENCH_TITLE})),
+        ('delete_event', noop, lambda c: c.post(
+            f"/calendar/{calendar.id}/delete_event/{state['event_id']}/")),
+    ]
+
+
+def admin_scenarios(calendar):
+    # Кроме страниц — сравнение точного COUNT(*) по таблице событий с оценкой,
+    # которую использует пагинатор админки
+    today = timezone.localdate()
+    event = Event.objects.filter(calendar=calendar).only('id').first()
+    events_url = '/admin/calendar_app/event/'
+
+    def noop():
+        pass
+
+    return [
+        ('admin_events', noop, lambda c: c.get(events_url)),
+        ('admin_events_calendar', noop, lambda c: c.get(events_url, {'calendar': str(calendar.id)})),
+        ('admin_events_year', noop, lambda c: c.get(events_url, {'date__year': today.year})),
+        ('admin_events_deep_page', noop, lambda c: c.get(events_url, {'p': 50})),
+        ('admin_event_change', noop, lambda c: c.get(f'{events_url}{event.id}/change/')),
+        ('admin_calendar_autocomplete', noop, lambda c: c.get('/admin/autocomplete/', {
+            'app_label': 'calendar_app', 'model_name': 'event', 'field_name': 'calendar',
+            'term': calendar.name[:4],
+        })),
+        ('admin_calendars', noop, lambda c: c.get('/admin/calendar_app/calendar/')),
+        ('event_count_exact', noop, lambda c: Event.objects.count()),
+        ('event_count_estimated', noop, lambda c: EstimatedCountPaginator(Event.objects.order_by('-date', '-id'), 100).count),
+    ]
+
+
+def admin_client():
+    # Клиент с временным суперпользователем; удалить — delete_admin_client()
+    user = User.objects.filter(username=BENCH_ADMIN).first() or User.objects.create_superuser(BENCH_ADMIN)
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def delete_admin_client():
+    User.objects.filter(username=BENCH_ADMIN).delete()
+
+
+def _is_transaction_control(sql):
+    # BEGIN/COMMIT и точки сохранения зависят от того, вложен ли atomic
+    # (в тестах — да), и в бюджет не входят
+    return sql.split(None, 1)[0].upper() in ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+def _check(name, response):
+    # Ответ с ошибкой (404, 429, {'status': 'error'}) замерил бы не ту работу
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        return
+    payload = response.json() if response.get('Content-Type') == 'application/json' else None
+    if status != 200 or (isinstance(payload, dict) and payload.get('status') == 'error'):
+        raise ScenarioFailed(f'{name}: HTTP {status} {payload or ""}'.strip())
+
+
+def run(calendar=None, repeat=20, budgets=None, scenario_set=scenarios, client=None):
+    budgets = budgets or QUERY_BUDGETS
+    calendar = calendar or bench_calendar()
+    client = client or Client()
+    results = {}
+    # Ограничение записи замеряется отдельно (bench_throttle) и здесь отклоняло бы мутации
+    with override_settings(WRITE_THROTTLE=False):
+        for _ in range(repeat):
+            for name, prepare, action in scenario_set(calendar):
+                prepare()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = action(client)
+                    elapsed = (time.perf_counter() - start) * 1000
+                _check(name, response)
+                count = sum(1 for q in queries if not _is_transaction_control(q['sql']))
+                entry = results.setdefault(name, {'timings': [], 'queries': 0})
+                entry['timings'].append(elapsed)
+                entry['queries'] = max(entry['queries'], count)
+
+    report = {
+        'database': connection.vendor,
+        'scale': {
+            'calendars': Calendar.objects.count(),
+            'events': Event.objects.count(),
+            'target_calendar_events': Event.objects.filter(calendar=calendar).count(),
+        },
+        'repeat': repeat,
+        'scenarios': {},
+    }
+    for name, entry in results.items():
+        budget = budgets.get(name)
+        report['scenarios'][name] = {
+            'median_ms': round(statistics.median(entry['timings']), 3),
+            'p95_ms': round(_percentile(entry['timings'], 0.95), 3),
+            'queries': entry['queries'],
+            'query_budget': budget,
+            'within_budget': budget is None or entry['queries'] <= budget,
+        }
+    report['ok'] = all(s['within_budget'] for s in report['scenarios'].values())
+    return report
@@ -0,0 +1,134 @@
+# ./calendar_app/cache.py
+
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .models import Calendar
+from .sync import mark_changes
+
+MONTH_GRID_TIMEOUT = getattr(settings, 'MONTH_GRID_CACHE_TIMEOUT', 60 * 60 * 24)
+STATS_KEYS = ('hits', 'misses')
+
+# Кэш «название → (id, название)» в памяти процесса. Локальные изменения
+# сбрасывают запись сразу через сигналы, изменения в других процессах
+# становятся видны не позже чем через CALENDAR_NAME_CACHE_TTL секунд.
+CALENDAR_NAME_CACHE_SIZE = getattr(settings, 'CALENDAR_NAME_CACHE_SIZE', 10000)
+CALENDAR_NAME_CACHE_TTL = getattr(settings, 'CALENDAR_NAME_CACHE_TTL', 300)
+_calendar_names = OrderedDict()
+_calendar_name_keys = {}
+
+
+def month_grid_key(calendar, year, month):
+    # Версия входит в ключ, поэтому после изменения событий старые записи
+    # просто перестают запрашиваться и вытесняются по таймауту
+    return f'month_grid:{calendar.id}:{calendar.version}:{year}:{month}'
+
+
+def year_counts_key(calendar, year):
+    return f'year_counts:{calendar.id}:{calendar.version}:{year}'
+
+
+def bump_calendar_version(calendar_id):
+    # Блокировка строки календаря держится до конца транзакции, поэтому
+    # изменения отмечаются версией в порядке фиксации (см. sync.py)
+    with transaction.atomic():
+        Calendar.objects.filter(id=calendar_id).update(
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        mark_changes(calendar_id)
+
+
+async def abump_calendar_version(calendar_id):
+    # transaction.atomic в асинхронном коде недоступен
+    await sync_to_async(bump_calendar_version)(calendar_id)
+
+
+def _count(name):
+    key = f'month_grid:stats:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_stats():
+    return {name: cache.get(f'month_grid:stats:{name}', 0) for name in STATS_KEYS}
+
+
+def reset_cache_stats():
+    cache.delete_many([f'month_grid:stats:{name}' for name in STATS_KEYS])
+
+
+def cached_month_grid(calendar, year, month, render_grid):
+    key = month_grid_key(calendar, year, month)
+    html = cache.get(key)
+    if html is None:
+        _count('misses')
+        html = render_grid()
+        cache.set(key, html, MONTH_GRID_TIMEOUT)
+    else:
+        _count('hits')
+    return mark_safe(html)
+
+
+def cached_year_counts(calendar, year, compute):
+    key = year_counts_key(calendar, year)
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute()
+        cache.set(key, counts, MONTH_GRID_TIMEOUT)
+    return counts
+
+
+def _forget_calendar_name(key):
+    entry = _calendar_names.pop(key, None)
+    if entry:
+        keys = _calendar_name_keys.get(entry[0])
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del _calendar_name_keys[entry[0]]
+
+
+def resolve_calendar_name(name):
+    # Ключ — название как есть: str.upper() в Python и UPPER() в базе
+    # расходятся для части символов ('ß'), поэтому сравнение без учёта
+    # регистра делает только база (name__iexact)
+    entry = _calendar_names.get(name)
+    if entry and entry[2] > time.monotonic():
+        _calendar_names.move_to_end(name)
+        return entry[0], entry[1]
+
+    _forget_calendar_name(name)
+    calendar = Calendar.objects.filter(name__iexact=name).values_list('id', 'name').first()
+    if calendar is None:
+        return None
+    _calendar_names[name] = (calendar[0], calendar[1], time.monotonic() + CALENDAR_NAME_CACHE_TTL)
+    _calendar_name_keys.setdefault(calendar[0], set()).add(name)
+    if len(_calendar_names) > CALENDAR_NAME_CACHE_SIZE:
+        _forget_calendar_name(next(iter(_calendar_names)))
+    return calendar
+
+
+def clear_calendar_names():
+    _calendar_names.clear()
+    _calendar_name_keys.clear()
+
+
+@receiver([post_save, post_delete], sender=Calendar)
+def invalidate_calendar_name(sender, instance, **kwargs):
+    # Название могло измениться: сбрасываем все записи, найденные по id
+    for key in list(_calendar_name_keys.get(instance.id, ())):
+        _forget_calendar_name(key)
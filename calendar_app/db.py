@@ -0,0 +1,91 @@
+# ./calendar_app/db.py
+
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+
+def connection_stats(alias='default'):
+    # Статистика соединений текущего процесса: у каждого воркера свой пул
+    # или свои постоянные соединения
+    connection = connections[alias]
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'mode': getattr(settings, 'DB_POOL_MODE', 'none'),
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'connected': connection.connection is not None,
+    }
+    # DatabaseWrapper.pool есть только у PostgreSQL-бэкенда с OPTIONS['pool']
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['pool'] = pool.get_stats()
+    return stats
+
+
+# Чтение с реплик (DATABASE_REPLICAS, см. settings.py). Вьюхи только для
+# чтения помечаются read_from_replica: на время вызова ReplicaRouter
+# направляет их SELECT-запросы на случайную реплику. Остальные запросы и
+# все записи идут в default. Клиент, который недавно что-то изменил
+# (cookie PRIMARY_COOKIE, см. PrimaryStickinessMiddleware), читает с
+# default и видит свои изменения, даже если реплика отстаёт.
+
+PRIMARY_COOKIE = 'db_primary'
+
+_read_alias = ContextVar('db_read_alias', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Сессии и пользователи только что записаны самим клиентом
+        # (сообщения после редиректа) — их всегда читаем с default
+        if model._meta.app_label == 'calendar_app':
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит с репликацией
+        return db == 'default'
+
+
+def choose_read_alias(request):
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas or request.COOKIES.get(PRIMARY_COOKIE):
+        return None
+    return random.choice(replicas)
+
+
+def read_from_replica(view):
+    # Внешним декоратором: ETag и Last-Modified (condition) тоже читаются с реплики
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request.reads_from_replica = True
+            # sync_to_async копирует контекст, и ORM в потоке видит выбранную реплику
+            token = _read_alias.set(choose_read_alias(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            request.reads_from_replica = True
+            token = _read_alias.set(choose_read_alias(request))
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+    return wrapper
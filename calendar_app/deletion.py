@@ -0,0 +1,68 @@
+# ./calendar_app/deletion.py
+
+# Фоновое удаление календарей. Запрос на удаление только помечает календарь
+# (deleted_at) — он сразу пропадает из приложения, а клиенты ленты изменений
+# получают запись об удалении. Сами события удаляет purge_calendars порциями
+# по chunk_size строк, каждая в своей короткой транзакции: блокировки и
+# память не зависят от размера календаря.
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import push
+from .models import Calendar, CalendarDeletion, Event, Recurrence
+from .sync import record_calendar_deletion
+
+PURGE_CHUNK_SIZE = 5000
+
+
+def request_calendar_deletion(calendar):
+    with transaction.atomic():
+        calendar.deleted_at = timezone.now()
+        # save(), а не update(): сигнал сбрасывает кэш имён (см. cache.py)
+        calendar.save(update_fields=['deleted_at'])
+        CalendarDeletion.objects.get_or_create(calendar_id=calendar.id)
+        record_calendar_deletion(calendar.id)
+        push.publish(calendar.id, push.RESET)
+
+
+def delete_chunk(calendar_id, chunk_size):
+    # Удаляет до chunk_size событий календаря с их правилами повторения и
+    # возвращает число удалённых событий. Из Python проходят только id.
+    ids = list(Event.objects.filter(calendar_id=calendar_id).values_list('id', flat=True)[:chunk_size])
+    if ids:
+        Recurrence.objects.filter(event_id__in=ids).delete()
+        # Без Collector: он загрузил бы события целиком ради каскада на
+        # правила, которые уже удалены
+        Event.objects.filter(id__in=ids)._raw_delete(Event.objects.db)
+    return len(ids)
+
+
+def purge_calendar(deletion, chunk_size=PURGE_CHUNK_SIZE, progress=None):
+    # progress(deletion) вызывается после каждой порции
+    if deletion.total_events is None:
+        deletion.total_events = Event.objects.filter(calendar_id=deletion.calendar_id).count()
+        deletion.save(update_fields=['total_events'])
+    while True:
+        with transaction.atomic():
+            deleted = delete_chunk(deletion.calendar_id, chunk_size)
+            if not deleted:
+                break
+            CalendarDeletion.objects.filter(pk=deletion.pk).update(deleted_events=F('deleted_events') + deleted)
+        deletion.deleted_events += deleted
+        if progress:
+            progress(deletion)
+    with transaction.atomic():
+        Calendar.all_objects.filter(id=deletion.calendar_id).delete()
+        deletion.finished_at = timezone.now()
+        deletion.save(update_fields=['finished_at'])
+
+
+def purge_pending(chunk_size=PURGE_CHUNK_SIZE, progress=None):
+    # Обрабатывает все незавершённые удаления по порядку запросов и
+    # возвращает их число. Рассчитано на один одновременный процесс.
+    deletions = list(CalendarDeletion.objects.filter(finished_at__isnull=True).order_by('requested_at', 'id'))
+    for deletion in deletions:
+        purge_calendar(deletion, chunk_size, progress)
+    return len(deletions)
@@ -0,0 +1,192 @@
+# ./calendar_app/ical.py
+
+from datetime import timedelta, timezone as dt_timezone
+
+PRODID = '-//calendar_project//Онлайн-календарь//RU'
+
+
+def escape_text(value):
+    # RFC 5545, 3.3.11: экранирование TEXT-значений
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def unescape_text(value):
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            result.append('\n' if char in ('n', 'N') else char)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def fold_line(line):
+    # RFC 5545, 3.1: строки длиннее 75 октетов переносятся, не разрывая символы UTF-8
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start = end
+        limit = 74  # продолжение начинается с пробела
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_rrule(freq, interval, until, count):
+    parts = [f'FREQ={freq}']
+    if interval and interval != 1:
+        parts.append(f'INTERVAL={interval}')
+    if until:
+        parts.append(f'UNTIL={until.strftime("%Y%m%d")}')
+    if count:
+        parts.append(f'COUNT={count}')
+    return ';'.join(parts)
+
+
+def calendar_header(calendar):
+    return ''.join(fold_line(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(calendar.name)}',
+    ))
+
+
+def calendar_footer():
+    return fold_line('END:VCALENDAR')
+
+
+def format_event(calendar_id, event_id, title, description, date, created_at, recurrence=None):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event_id}@{calendar_id}',
+        f'DTSTAMP:{format_datetime(created_at)}',
+        f'DTSTART;VALUE=DATE:{format_date(date)}',
+        f'DTEND;VALUE=DATE:{format_date(date + timedelta(days=1))}',
+        f'SUMMARY:{escape_text(title)}',
+        f'DESCRIPTION:{escape_text(description)}',
+    ]
+    if recurrence and recurrence[0]:
+        freq, interval, until, count, exdates = recurrence
+        lines.append(f'RRULE:{format_rrule(freq, interval, until, count)}')
+        if exdates:
+            lines.append('EXDATE;VALUE=DATE:' + ','.join(d.replace('-', '') for d in exdates))
+    lines.append('END:VEVENT')
+    return ''.join(fold_line(line) for line in lines)
+
+
+def export_events(calendar, events, chunk_size=2000, buffer_size=64 * 1024):
+    # Генератор для StreamingHttpResponse: события читаются серверным курсором
+    # порциями по chunk_size, а отдаются блоками около buffer_size символов,
+    # чтобы не писать в сокет по одному событию
+    rows = events.order_by('date', 'id').values_list(
+        'id', 'title', 'description', 'date', 'created_at',
+        'recurrence__freq', 'recurrence__interval', 'recurrence__until',
+        'recurrence__count', 'recurrence__exdates',
+    ).iterator(chunk_size=chunk_size)
+    buffer = [calendar_header(calendar)]
+    size = 0
+    for event_id, title, description, date, created_at, *recurrence in rows:
+        chunk = format_event(calendar.id, event_id, title, description, date, created_at, recurrence)
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(calendar_footer())
+    yield ''.join(buffer)
+
+
+def unfold_lines(lines):
+    # Обратная операция к fold_line: склеивает строки продолжения
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def ical_date(value):
+    # DATE или DATE-TIME (YYYYMMDD[THHMMSS[Z]]) -> YYYY-MM-DD, время отбрасывается
+    value = value.strip()[:8]
+    return f'{value[:4]}-{value[4:6]}-{value[6:8]}' if len(value) == 8 else value
+
+
+# Части RRULE, которые умеет хранить Recurrence; WKST влияет только на BY*-части
+RRULE_PARTS = ('FREQ', 'INTERVAL', 'UNTIL', 'COUNT')
+
+
+def parse_rrule(value):
+    # Словарь для recurrence.parse_recurrence или False, если в правиле есть
+    # части, которых модель не поддерживает (BYDAY, BYMONTHDAY и т. п.):
+    # такое событие нельзя импортировать без искажения
+    rule = {}
+    for part in value.split(';'):
+        key, _, part_value = part.partition('=')
+        key = key.strip().upper()
+        if key == 'WKST':
+            continue
+        if key not in RRULE_PARTS:
+            return False
+        rule[key.lower()] = ical_date(part_value) if key == 'UNTIL' else part_value.strip().upper()
+    return rule
+
+
+def parse_events(lines):
+    # Потоково разбирает VEVENT-компоненты и отдаёт словари с ключами
+    # date (YYYY-MM-DD или None), title, description, rrule (см. parse_rrule
+    # или None) и exdates (список YYYY-MM-DD)
+    event = None
+    for line in unfold_lines(lines):
+        name, _, value = line.partition(':')
+        name, _, params = name.partition(';')
+        name = name.upper()
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {'date': None, 'title': '', 'description': '', 'rrule': None, 'exdates': []}
+        elif name == 'END' and value.upper() == 'VEVENT' and event is not None:
+            yield event
+            event = None
+        elif event is None:
+            continue
+        elif name == 'DTSTART':
+            event['date'] = ical_date(value)
+        elif name == 'SUMMARY':
+            event['title'] = unescape_text(value)
+        elif name == 'DESCRIPTION':
+            event['description'] = unescape_text(value)
+        elif name == 'RRULE':
+            event['rrule'] = parse_rrule(value)
+        elif name == 'EXDATE':
+            # Может повторяться и перечислять несколько дат через запятую
+            event['exdates'].extend(ical_date(item) for item in value.split(','))
@@ -0,0 +1,87 @@
+# ./calendar_app/importer.py
+
+import csv
+
+from django.db import transaction
+
+from .cache import bump_calendar_version
+from .ical import parse_events
+from .models import Event, Recurrence
+from .recurrence import parse_recurrence
+from .utils import parse_date
+
+IMPORT_BATCH_SIZE = 5000
+# Сколько ошибок по строкам возвращать в отчёте (всего считаются все)
+IMPORT_MAX_ERRORS = 1000
+TITLE_MAX_LENGTH = Event._meta.get_field('title').max_length
+
+
+def parse_csv(lines):
+    # Ожидаются колонки date, title, description (description необязательна)
+    for row in csv.DictReader(lines):
+        yield {
+            'date': row.get('date'),
+            'title': row.get('title') or '',
+            'description': row.get('description') or '',
+        }
+
+
+def detect_format(filename):
+    return 'csv' if filename.lower().endswith('.csv') else 'ics'
+
+
+def import_events(calendar, lines, file_format='ics', batch_size=None):
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    rows = parse_csv(lines) if file_format == 'csv' else parse_events(lines)
+    created = 0
+    error_count = 0
+    errors = []
+    batch = []
+
+    def error(number, message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({'row': number, 'message': message})
+
+    def flush():
+        # Правила повторения ссылаются на id, которые bulk_create возвращает для событий
+        Event.objects.bulk_create([event for event, _ in batch])
+        Recurrence.objects.bulk_create([
+            Recurrence(event=event, **recurrence) for event, recurrence in batch if recurrence
+        ])
+        return len(batch)
+
+    with transaction.atomic():
+        for number, row in enumerate(rows, start=1):
+            # Дата проверяется так же, как в add_event
+            date = parse_date(row['date'])
+            if date is None:
+                error(number, 'Invalid date')
+                continue
+            title = row['title'].strip()
+            if not title or len(title) > TITLE_MAX_LENGTH:
+                error(number, 'Invalid title')
+                continue
+            rrule = row.get('rrule')
+            recurrence = parse_recurrence(rrule) if rrule else rrule
+            if recurrence is False:
+                error(number, 'Invalid recurrence')
+                continue
+            if recurrence:
+                exdates = sorted(set(row.get('exdates', ())))
+                if any(parse_date(value) is None for value in exdates):
+                    error(number, 'Invalid exdate')
+                    continue
+                recurrence['exdates'] = exdates
+            event = Event(calendar=calendar, title=title, description=row['description'], date=date)
+            batch.append((event, recurrence))
+            if len(batch) >= batch_size:
+                created += flush()
+                batch = []
+        if batch:
+            created += flush()
+        if created:
+            bump_calendar_version(calendar.id)
+
+    return {'created': created, 'error_count': error_count, 'errors': errors}
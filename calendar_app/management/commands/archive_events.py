@@ -0,0 +1,42 @@
+# ./calendar_app/management/commands/archive_events.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calendar_app.partitioning import archive_partitions, has_active_series, is_partitioned, partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Отсоединяет секции событий старше N лет и переносит их в отдельную схему '
+        '(или удаляет с --drop). События из них пропадают из приложения без записей '
+        'об удалении; данные в схеме архива остаются доступны через SQL. Секции с '
+        'исходными событиями продолжающихся серий повторений остаются на месте.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=5, help='Хранить столько последних лет')
+        parser.add_argument('--schema', default='archive', help='Схема для отсоединённых секций')
+        parser.add_argument('--drop', action='store_true', help='Удалить секции вместо переноса')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать секции')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('Таблица событий не секционирована (см. partition_events)')
+        if options['years'] < 1:
+            raise CommandError('--years должно быть не меньше 1')
+        before = date(date.today().year - options['years'], 1, 1)
+
+        if options['dry_run']:
+            for name, start, end in partitions():
+                if end <= before:
+                    note = ' (skipped: active recurring series)' if has_active_series(start, end, before) else ''
+                    self.stdout.write(f'{name}{note}')
+            return
+        archived, skipped = archive_partitions(before, options['schema'], options['drop'])
+        for name in archived:
+            self.stdout.write(f"{'dropped' if options['drop'] else 'archived'} {name}")
+        for name in skipped:
+            self.stdout.write(self.style.WARNING(f'skipped {name}: active recurring series'))
+        self.stdout.write(self.style.SUCCESS(f'Секций: {len(archived)}'))
@@ -0,0 +1,52 @@
+# ./calendar_app/management/commands/bench_admin.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment
+
+from calendar_app.benchmarks import (
+    ADMIN_QUERY_BUDGETS, ScenarioFailed, admin_client, admin_scenarios, delete_admin_client, run,
+)
+from calendar_app.models import Calendar
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и число SQL-запросов страниц админки календарей и событий '
+        'на текущих данных (см. seed_data) и сравнивает точный COUNT(*) с оценкой '
+        'пагинатора. Завершается с ошибкой при превышении ADMIN_QUERY_BUDGETS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Повторов каждого сценария')
+        parser.add_argument('--calendar', help='UUID календаря вместо bench-scenarios')
+        parser.add_argument('--output', help='Куда записать отчёт в JSON')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        calendar = None
+        if options['calendar']:
+            calendar = Calendar.objects.filter(id=options['calendar']).first()
+            if calendar is None:
+                raise CommandError('Календарь не найден')
+        try:
+            report = run(calendar, repeat=options['repeat'], budgets=ADMIN_QUERY_BUDGETS,
+                         scenario_set=admin_scenarios, client=admin_client())
+        except ScenarioFailed as e:
+            raise CommandError(f'Сценарий завершился ошибкой: {e}')
+        finally:
+            delete_admin_client()
+
+        self.stdout.write(f"{'scenario':<28} {'p50, ms':>9} {'p95, ms':>9} {'queries':>8} {'budget':>7}")
+        for name, result in report['scenarios'].items():
+            line = (
+                f"{name:<28} {result['median_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['queries']:>8} {result['query_budget'] or '-':>7}"
+            )
+            self.stdout.write(line if result['within_budget'] else self.style.ERROR(line))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        if not report['ok']:
+            raise CommandError('Превышен бюджет SQL-запросов')
@@ -0,0 +1,70 @@
+# ./calendar_app/management/commands/bench_calendar_search.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from calendar_app.models import Calendar
+from calendar_app.views import calendars_page
+
+WORDS = ['Рабочий', 'Семейный', 'Отпуск', 'Спорт', 'Учёба', 'Проект', 'Команда', 'Дом', 'Встречи', 'Личный']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержку главной страницы и поиска календарей при росте их количества'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,100000',
+                            help='Количество календарей через запятую')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов на каждый замер')
+        parser.add_argument('--keep', action='store_true', help='Не откатывать созданные данные')
+
+    def handle(self, *args, **options):
+        scales = sorted(int(x) for x in options['scales'].split(','))
+        try:
+            with transaction.atomic():
+                self.run(scales, options['repeat'])
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, scales, repeat):
+        rnd = random.Random(0)
+        self.stdout.write(f"{'calendars':>10} {'home, ms':>10} {'next page, ms':>14} {'prefix, ms':>11} {'substr, ms':>11}")
+        for scale in scales:
+            missing = scale - Calendar.objects.count()
+            batch = [
+                Calendar(name=f'{rnd.choice(WORDS)} {rnd.choice(WORDS).lower()} {i}')
+                for i in range(missing)
+            ]
+            Calendar.objects.bulk_create(batch, batch_size=5000)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE calendar_app_calendar')
+
+            _, cursor = calendars_page(Calendar.objects.all())
+            row = [
+                self.measure(repeat, lambda: calendars_page(Calendar.objects.all())),
+                self.measure(repeat, lambda: calendars_page(Calendar.objects.all(), cursor)),
+                self.measure(repeat, lambda: calendars_page(
+                    Calendar.objects.filter(name__istartswith=rnd.choice(WORDS)[:4]))),
+                self.measure(repeat, lambda: calendars_page(
+                    Calendar.objects.filter(name__icontains=rnd.choice(WORDS)[2:6]))),
+            ]
+            self.stdout.write(f'{scale:>10} {row[0]:>10.2f} {row[1]:>14.2f} {row[2]:>11.2f} {row[3]:>11.2f}')
+
+    def measure(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,99 @@
+# ./calendar_app/management/commands/bench_concurrency.py
+
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер N одновременными клиентами (keep-alive) '
+        'и печатает пропускную способность и задержки. Запустите один раз '
+        'против WSGI-сервера и один раз против ASGI-сервера и сравните.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Например, http://127.0.0.1:8000/calendar/<uuid>/get_events/?date=2025-01-01')
+        parser.add_argument('--clients', type=int, default=1000, help='Одновременных соединений')
+        parser.add_argument('--requests', type=int, default=10, help='Запросов на одного клиента')
+        parser.add_argument('--timeout', type=float, default=30, help='Таймаут одного запроса, с')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Поддерживается только http://')
+        results = asyncio.run(self.run(url, options['clients'], options['requests'], options['timeout']))
+        self.report(*results)
+
+    async def run(self, url, clients, requests, timeout):
+        path = url.path + (f'?{url.query}' if url.query else '')
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nConnection: keep-alive\r\n\r\n'
+        ).encode()
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal errors
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(url.hostname, url.port or 80), timeout)
+            except (OSError, asyncio.TimeoutError):
+                errors += requests
+                return
+            try:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    writer.write(request)
+                    status = await asyncio.wait_for(self.read_response(reader), timeout)
+                    latencies.append(time.perf_counter() - start)
+                    if status != 200:
+                        errors += 1
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+            finally:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return latencies, errors, time.perf_counter() - started
+
+    async def read_response(self, reader):
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        chunked = False
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding' and 'chunked' in value.lower():
+                chunked = True
+        if chunked:
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await reader.readexactly(length)
+        return status
+
+    def report(self, latencies, errors, elapsed):
+        if not latencies:
+            raise CommandError('Ни один запрос не выполнен.')
+        latencies.sort()
+        ms = [x * 1000 for x in latencies]
+        self.stdout.write(f'requests: {len(latencies)}  errors: {errors}  time: {elapsed:.2f}s')
+        self.stdout.write(f'throughput: {len(latencies) / elapsed:.1f} req/s')
+        self.stdout.write(
+            f'latency ms: p50={statistics.median(ms):.1f} '
+            f'p95={ms[int(len(ms) * 0.95) - 1]:.1f} p99={ms[int(len(ms) * 0.99) - 1]:.1f} max={ms[-1]:.1f}'
+        )
@@ -0,0 +1,45 @@
+# ./calendar_app/management/commands/bench_db_connections.py
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from calendar_app.db import connection_stats
+from calendar_app.models import Calendar
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку небольшого запроса к БД с учётом жизненного цикла '
+        'соединения в рамках HTTP-запроса. Запустите с разными DB_POOL_MODE '
+        '(none, persistent, pool) и сравните.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Количество имитируемых запросов')
+
+    def handle(self, *args, **options):
+        timings = []
+        for _ in range(options['requests']):
+            # Те же сигналы, что шлёт обработчик запросов Django: по ним
+            # соединение закрывается, остаётся открытым или возвращается в пул
+            request_started.send(sender=self.__class__)
+            start = time.perf_counter()
+            Calendar.objects.exists()
+            timings.append((time.perf_counter() - start) * 1000)
+            request_finished.send(sender=self.__class__)
+
+        timings.sort()
+        stats = connection_stats()
+        self.stdout.write(f"mode: {stats['mode']}  conn_max_age: {stats['conn_max_age']}  "
+                          f"health_checks: {stats['health_checks']}")
+        self.stdout.write(
+            f'latency ms: mean={statistics.mean(timings):.2f} p50={statistics.median(timings):.2f} '
+            f'p99={timings[int(len(timings) * 0.99) - 1]:.2f} max={timings[-1]:.2f}'
+        )
+        if 'pool' in stats:
+            self.stdout.write(f"pool: {stats['pool']}")
+        connection.close()
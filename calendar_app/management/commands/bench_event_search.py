@@ -0,0 +1,79 @@
+# ./calendar_app/management/commands/bench_event_search.py
+
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from calendar_app.models import Calendar, Event
+from calendar_app.search import SEARCH_PAGE_SIZE, full_text_filter, full_text_supported, naive_filter
+
+WORDS = [
+    'встреча', 'проект', 'отчёт', 'клиент', 'бюджет', 'релиз', 'дизайн', 'тестирование', 'собеседование',
+    'презентация', 'договор', 'поставка', 'склад', 'ремонт', 'тренировка', 'врач', 'школа', 'концерт',
+    'поездка', 'аэропорт', 'гостиница', 'билеты', 'семинар', 'конференция', 'обучение', 'аудит', 'налог',
+    'юбилей', 'свадьба', 'праздник', 'магазин', 'ужин', 'завтрак', 'созвон', 'команда', 'планирование',
+]
+RARE_WORD = 'криптография'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает полнотекстовый поиск событий (tsvector + GIN) с icontains на одном большом календаре'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1_000_000, help='Событий в календаре')
+        parser.add_argument('--repeat', type=int, default=10, help='Повторов на каждый замер')
+        parser.add_argument('--keep', action='store_true', help='Не откатывать созданные данные')
+
+    def handle(self, *args, **options):
+        if not full_text_supported():
+            raise CommandError('Полнотекстовый поиск доступен только на PostgreSQL')
+        try:
+            with transaction.atomic():
+                self.run(options['events'], options['repeat'])
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, total, repeat):
+        rnd = random.Random(0)
+        calendar = Calendar.objects.create(name=f'Поиск {time.time_ns()}')
+        start = date(2020, 1, 1)
+        for offset in range(0, total, 10000):
+            Event.objects.bulk_create([
+                Event(
+                    calendar=calendar,
+                    title=' '.join(rnd.choices(WORDS, k=3)).capitalize(),
+                    description=' '.join(rnd.choices(WORDS, k=rnd.randint(5, 40)))
+                    + (f' {RARE_WORD}' if i % 10000 == 0 else ''),
+                    date=start + timedelta(days=rnd.randint(0, 2000)),
+                )
+                for i in range(offset, min(offset + 10000, total))
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE calendar_app_event')
+
+        events = Event.objects.filter(calendar=calendar)
+        self.stdout.write(f"{'query':<28} {'fts, ms':>9} {'icontains, ms':>14}")
+        for label, query in (('rare word', RARE_WORD), ('common word', 'встреча'), ('two words', 'ремонт склад')):
+            fts = self.measure(repeat, lambda: list(
+                full_text_filter(events, query).values_list('id', 'title')[:SEARCH_PAGE_SIZE]))
+            naive = self.measure(repeat, lambda: list(
+                naive_filter(events, query).values_list('id', 'title')[:SEARCH_PAGE_SIZE]))
+            self.stdout.write(f'{label + " (" + query + ")":<28} {fts:>9.2f} {naive:>14.2f}')
+
+    def measure(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,67 @@
+# ./calendar_app/management/commands/bench_push.py
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from calendar_app.push import LocalBroker
+
+
+class Command(BaseCommand):
+    help = (
+        'Подписывает N простаивающих клиентов на один канал LocalBroker и '
+        'замеряет память на подписчика и время доставки сообщения всем'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=10000, help='Число подписчиков')
+        parser.add_argument('--messages', type=int, default=20, help='Сколько сообщений опубликовать')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options['subscribers'], options['messages']))
+
+    async def run(self, subscribers, messages):
+        broker = LocalBroker()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        subscriptions = [broker.subscribe('bench') for _ in range(subscribers)]
+        # Подписчики ждут сообщений так же, как event_stream
+        remaining = [0]
+        done = asyncio.Event()
+
+        async def listen(subscription):
+            while True:
+                await subscription.get()
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+
+        tasks = [asyncio.create_task(listen(s)) for s in subscriptions]
+        await asyncio.sleep(0)
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        timings = []
+        for i in range(messages):
+            remaining[0] = subscribers
+            done.clear()
+            start = time.perf_counter()
+            broker.publish('bench', {'type': 'update', 'id': i, 'title': 'Бенчмарк'})
+            await done.wait()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscription in subscriptions:
+            subscription.close()
+
+        self.stdout.write(f'subscribers: {subscribers}  memory: {memory / subscribers / 1024:.1f} KiB each')
+        self.stdout.write(
+            f'fan-out ms: p50={statistics.median(timings):.1f} max={max(timings):.1f} '
+            f'({statistics.median(timings) * 1000 / subscribers:.1f} us per subscriber)'
+        )
+        self.stdout.write(f'left subscribed: {broker.subscriber_count()}')
@@ -0,0 +1,74 @@
+# ./calendar_app/management/commands/bench_scaling.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment
+
+from calendar_app.benchmarks import BENCH_CALENDAR, ScenarioFailed, run, seed
+from calendar_app.models import Calendar, Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и число SQL-запросов основных страниц и мутаций на '
+        'отдельном календаре bench-scenarios размером с самый большой календарь базы '
+        'и завершается с ошибкой, если превышен бюджет запросов из '
+        'calendar_app.benchmarks.QUERY_BUDGETS. С --scales база перед каждым замером '
+        'дополняется синтетическими событиями (как seed_data) до заданного размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого сценария')
+        parser.add_argument('--calendar', help='UUID календаря вместо bench-scenarios (его события изменяются)')
+        parser.add_argument('--scales', type=int, nargs='+',
+                            help='Размеры базы в событиях, например 100000 1000000 10000000')
+        parser.add_argument('--calendars', type=int, default=10000, help='Календарей в базе при дополнении (--scales)')
+        parser.add_argument('--output', help='Куда записать отчёт в JSON')
+
+    def handle(self, *args, **options):
+        # Тестовый клиент ходит на хост testserver
+        setup_test_environment()
+        calendar = None
+        if options['calendar']:
+            calendar = Calendar.objects.filter(id=options['calendar']).first()
+            if calendar is None:
+                raise CommandError('Календарь не найден')
+
+        scales = sorted(options['scales'] or [])
+        existing = Event.objects.exclude(calendar__name=BENCH_CALENDAR).count()
+        if scales and scales[0] < existing:
+            raise CommandError(f'В базе уже {existing} событий — больше, чем {scales[0]}')
+
+        reports = []
+        for scale in scales or [None]:
+            if scale is not None:
+                self.stdout.write(f'--- {scale} событий')
+                seed(options['calendars'], scale - existing)
+                existing = scale
+            # Откатывать мутации транзакцией нельзя: версия календаря вернулась бы
+            # назад, а кэш сетки месяца для новых версий остался бы. Каждый прогон
+            # сам удаляет созданное событие.
+            try:
+                report = run(calendar, repeat=options['repeat'])
+            except ScenarioFailed as e:
+                raise CommandError(f'Сценарий завершился ошибкой: {e}')
+            self.print_report(report)
+            reports.append(report)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(reports if scales else reports[0], f, ensure_ascii=False, indent=2)
+        if not all(report['ok'] for report in reports):
+            raise CommandError('Превышен бюджет SQL-запросов')
+
+    def print_report(self, report):
+        scale = report['scale']
+        self.stdout.write(f"events: {scale['events']}  target calendar: {scale['target_calendar_events']}")
+        self.stdout.write(f"{'scenario':<20} {'p50, ms':>9} {'p95, ms':>9} {'queries':>8} {'budget':>7}")
+        for name, result in report['scenarios'].items():
+            line = (
+                f"{name:<20} {result['median_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['queries']:>8} {result['query_budget'] or '-':>7}"
+            )
+            self.stdout.write(line if result['within_budget'] else self.style.ERROR(line))
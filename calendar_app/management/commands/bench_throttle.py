@@ -0,0 +1,68 @@
+# ./calendar_app/management/commands/bench_throttle.py
+
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory, override_settings
+
+from calendar_app.throttle import take, throttle_writes
+
+
+def noop_view(request, calendar_id):
+    return JsonResponse({'status': 'success'})
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы ограничения записей (calendar_app/throttle.py) на '
+        'настроенном кэше THROTTLE_CACHE: проверку счётчиков и полный проход пустой вьюхи с '
+        'throttle_writes и без него'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Запросов в каждом замере')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        # Лимиты заведомо не достигаются: замеряется путь пропущенного запроса
+        limits = dict(
+            WRITE_THROTTLE=True, WRITE_CONCURRENCY_LIMIT=0,
+            WRITE_THROTTLE_CLIENT_LIMIT=10 ** 9, WRITE_THROTTLE_CALENDAR_LIMIT=10 ** 9,
+        )
+        window = 3600
+
+        buckets = [(f'throttle:client:{prefix}', 10 ** 9), (f'throttle:calendar:{prefix}', 10 ** 9)]
+        self.report('take, 2 counters', self.measure(count, lambda: take(buckets, window)))
+
+        # Исчерпанный счётчик: отказ с откатом увеличения
+        exhausted = [(f'throttle:client:{prefix}-exhausted', 0)]
+        self.report('take, rejected', self.measure(count, lambda: take(exhausted, window)))
+
+        factory = RequestFactory()
+        calendar_id = uuid.uuid4()
+        request = factory.post('/', REMOTE_ADDR=prefix)
+        plain = self.measure(count, lambda: noop_view(request, calendar_id=calendar_id))
+        throttled_view = throttle_writes(noop_view)
+        with override_settings(**limits):
+            wrapped = self.measure(count, lambda: throttled_view(request, calendar_id=calendar_id))
+        self.report('view without throttle', plain)
+        self.report('view with throttle', wrapped)
+        overhead = (statistics.median(wrapped) - statistics.median(plain)) * 1000
+        self.stdout.write(self.style.SUCCESS(f'overhead per write: {overhead:.0f} us (p50)'))
+
+    def measure(self, count, func):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(f'{label}: p50={statistics.median(timings) * 1000:.0f} us p99={p99 * 1000:.0f} us')
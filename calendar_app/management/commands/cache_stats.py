@@ -0,0 +1,20 @@
+# ./calendar_app/management/commands/cache_stats.py
+
+from django.core.management.base import BaseCommand
+
+from calendar_app.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает счётчики попаданий и промахов кэша сетки месяца'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики')
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.1f}%")
+        if options['reset']:
+            reset_cache_stats()
@@ -0,0 +1,32 @@
+# ./calendar_app/management/commands/import_events.py
+
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from calendar_app.importer import IMPORT_BATCH_SIZE, detect_format, import_events
+from calendar_app.models import Calendar
+
+
+class Command(BaseCommand):
+    help = 'Импортирует события из .ics или .csv в календарь пакетными вставками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('calendar_id', help='UUID календаря')
+        parser.add_argument('path', help='Путь к файлу .ics или .csv')
+        parser.add_argument('--format', choices=['ics', 'csv'], help='Формат файла (по умолчанию — по расширению)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Размер пакета bulk_create')
+
+    def handle(self, *args, **options):
+        # Строка, не являющаяся UUID, даёт ValidationError
+        try:
+            calendar = Calendar.objects.get(id=options['calendar_id'])
+        except (Calendar.DoesNotExist, ValidationError):
+            raise CommandError('Календарь не найден.')
+
+        file_format = options['format'] or detect_format(options['path'])
+        with open(options['path'], encoding='utf-8-sig', newline='') as f:
+            report = import_events(calendar, f, file_format, options['batch_size'])
+
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,44 @@
+# ./calendar_app/management/commands/partition_events.py
+
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from calendar_app.partitioning import INTERVALS, convert, ensure_partitions, is_partitioned, next_period, period_start
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт секции таблицы событий на ahead периодов вперёд (запускайте по cron). '
+        'С --convert сначала переводит таблицу в секционированную.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=12, help='Сколько будущих периодов создать')
+        parser.add_argument('--convert', action='store_true',
+                            help='Перевести обычную таблицу в секционированную (блокирует таблицу)')
+
+    def handle(self, *args, **options):
+        interval = settings.EVENT_PARTITIONING
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование поддерживается только на PostgreSQL')
+        if interval not in INTERVALS:
+            raise CommandError("Задайте EVENT_PARTITIONING: 'year' или 'month'")
+
+        if not is_partitioned():
+            if not options['convert']:
+                raise CommandError('Таблица событий не секционирована; запустите с --convert')
+            convert(interval, options['ahead'])
+            self.stdout.write(self.style.SUCCESS('Таблица событий секционирована'))
+            return
+
+        first = period_start(interval, date.today())
+        last = first
+        for _ in range(options['ahead']):
+            last = next_period(interval, last)
+        created = ensure_partitions(interval, first, last)
+        for name in created:
+            self.stdout.write(f'created {name}')
+        self.stdout.write(self.style.SUCCESS(f'Новых секций: {len(created)}'))
@@ -0,0 +1,26 @@
+# ./calendar_app/management/commands/prune_tombstones.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from calendar_app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет записи об удалении для ленты изменений старше --days дней. Клиенты с более '
+        'старым курсором получат 410 и синхронизируются заново. Запускайте по cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+                            help='Сколько дней хранить записи')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days не может быть отрицательным')
+        pruned = prune_tombstones(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей: {pruned}'))
@@ -0,0 +1,35 @@
+# ./calendar_app/management/commands/purge_calendars.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calendar_app.deletion import PURGE_CHUNK_SIZE, purge_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет события календарей, помеченных на удаление, порциями по --chunk-size строк '
+        'и затем сами календари. Запускайте по cron или постоянно с --loop (один процесс).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE, help='Событий в одной транзакции')
+        parser.add_argument('--loop', action='store_true', help='Не завершаться, проверять новые запросы')
+        parser.add_argument('--interval', type=float, default=10, help='Пауза между проверками с --loop, секунд')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должно быть не меньше 1')
+        while True:
+            purged = purge_pending(options['chunk_size'], self.report)
+            if purged:
+                self.stdout.write(self.style.SUCCESS(f'Удалено календарей: {purged}'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def report(self, deletion):
+        total = deletion.total_events or 0
+        percent = 100 * deletion.deleted_events // total if total else 100
+        self.stdout.write(f'{deletion.calendar_id}: {deletion.deleted_events}/{total} ({percent}%)')
@@ -0,0 +1,27 @@
+# ./calendar_app/management/commands/seed_data.py
+
+from django.core.management.base import BaseCommand
+
+from calendar_app.benchmarks import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими календарями и событиями для бенчмарков: '
+        'размеры календарей распределены по Ципфу, даты сгущаются вокруг сегодняшнего дня'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calendars', type=int, default=10000, help='Сколько календарей должно быть в базе')
+        parser.add_argument('--events', type=int, default=10_000_000, help='Сколько событий добавить')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Размер пачки bulk_create')
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора для воспроизводимости')
+
+    def handle(self, *args, **options):
+        seed(
+            options['calendars'], options['events'], batch_size=options['batch_size'],
+            seed_value=options['seed'], stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: {options['calendars']} календарей, добавлено {options['events']} событий"
+        ))
@@ -0,0 +1,44 @@
+# ./calendar_app/management/commands/vendor_assets.py
+
+import base64
+import hashlib
+import os
+import re
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calendar_app.assets import VENDOR_ASSETS, VENDOR_DIR
+
+# Карт исходников в static нет, а ManifestStaticFilesStorage не соберёт файл
+# со ссылкой на отсутствующую карту
+SOURCE_MAP_RE = re.compile(rb'\n?(/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Скачивает сторонние библиотеки (calendar_app.assets.VENDOR_ASSETS) в '
+        'calendar_app/static/vendor, проверяя SRI-хеши. Уже имеющиеся файлы '
+        'пропускаются. Пока файла нет, страницы берут библиотеку с CDN '
+        '(предупреждение calendar_app.W001); скачанные файлы закоммитьте.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Скачать заново уже имеющиеся файлы')
+
+    def handle(self, *args, **options):
+        for path, url, integrity in VENDOR_ASSETS:
+            target = os.path.join(VENDOR_DIR, path)
+            if os.path.isfile(target) and not options['force']:
+                self.stdout.write(f'{path}: есть')
+                continue
+            with urlopen(url, timeout=30) as response:
+                data = response.read()
+            algorithm, expected = integrity.split('-', 1)
+            actual = base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+            if actual != expected:
+                raise CommandError(f'{url}: хеш {algorithm}-{actual} не совпадает с {integrity}')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(SOURCE_MAP_RE.sub(b'\n', data))
+            self.stdout.write(self.style.SUCCESS(f'{path}: {len(data)} байт'))
@@ -0,0 +1,194 @@
+# ./calendar_app/middleware.py
+
+import json
+import logging
+import random
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils.deprecation import MiddlewareMixin
+
+from .db import PRIMARY_COOKIE
+
+logger = logging.getLogger('calendar_app.timing')
+
+_timings = ContextVar('request_timings', default=None)
+
+
+class Timings:
+    __slots__ = ('queries', 'db', 'template', 'depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.depth = 0
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _timings.get()
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.queries += 1
+            timings.db += perf_counter() - start
+
+
+def wrap_queries():
+    # Обёртки действуют на соединения текущего потока и снимаются stack.close()
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(record_query))
+    return stack
+
+
+class TimedTemplate(Template):
+    # Django не сообщает время рендеринга шаблонов вне тестов. Замеряется
+    # рендеринг через бэкенд (render(), render_to_string(), TemplateResponse);
+    # вложенные шаблоны ({% include %}) считаются в составе внешнего.
+    def render(self, context=None, request=None):
+        timings = _timings.get()
+        if timings is None or timings.depth:
+            return super().render(context, request)
+        timings.depth += 1
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template += perf_counter() - start
+            timings.depth -= 1
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    # Бэкенд шаблонов (settings.TEMPLATES) для RequestTimingMiddleware; без
+    # замера — один ContextVar.get() на рендеринг
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class RequestTimingMiddleware:
+    # Включается REQUEST_TIMING. Для доли запросов REQUEST_TIMING_SAMPLE_RATE
+    # считает SQL-запросы, время БД и шаблонов, отдаёт их в заголовке
+    # Server-Timing и пишет строку JSON в лог calendar_app.timing. Запросы
+    # дольше REQUEST_TIMING_SLOW_MS попадают в лог с уровнем WARNING всегда,
+    # даже если не попали в выборку. Под ASGI работает без перехода в поток.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        self.slow_ms = settings.REQUEST_TIMING_SLOW_MS
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            start = perf_counter()
+            response = self.get_response(request)
+            return self.finish(request, response, perf_counter() - start, None)
+
+        timings = Timings()
+        token = _timings.set(timings)
+        try:
+            with wrap_queries():
+                start = perf_counter()
+                response = self.get_response(request)
+                elapsed = perf_counter() - start
+        finally:
+            _timings.reset(token)
+        return self.finish(request, response, elapsed, timings)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            start = perf_counter()
+            response = await self.get_response(request)
+            return self.finish(request, response, perf_counter() - start, None)
+
+        timings = Timings()
+        token = _timings.set(timings)
+        try:
+            # ORM асинхронных вьюх работает в одном потоке на запрос
+            # (thread_sensitive), там и ставятся обёртки запросов
+            stack = await sync_to_async(wrap_queries)()
+            try:
+                start = perf_counter()
+                response = await self.get_response(request)
+                elapsed = perf_counter() - start
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _timings.reset(token)
+        return self.finish(request, response, elapsed, timings)
+
+    def finish(self, request, response, elapsed, timings):
+        view_ms = elapsed * 1000
+        if timings is None:
+            if view_ms >= self.slow_ms:
+                self.log(request, response, view_ms, None)
+            return response
+        response['Server-Timing'] = (
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries", '
+            f'tpl;dur={timings.template * 1000:.1f}, '
+            f'view;dur={view_ms:.1f}'
+        )
+        self.log(request, response, view_ms, timings)
+        return response
+
+    def log(self, request, response, view_ms, timings):
+        slow = view_ms >= self.slow_ms
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view_ms': round(view_ms, 1),
+            'sampled': timings is not None,
+            'slow': slow,
+        }
+        if timings is not None:
+            record.update(
+                queries=timings.queries,
+                db_ms=round(timings.db * 1000, 1),
+                template_ms=round(timings.template * 1000, 1),
+            )
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record))
+
+
+class PrimaryStickinessMiddleware(MiddlewareMixin):
+    # Включается при настроенных репликах. После успешного изменяющего
+    # запроса клиент DB_REPLICA_STICKY_SECONDS секунд читает с основной базы
+    # (см. read_from_replica в db.py) и видит свои изменения сразу.
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        # POST вьюх только для чтения (вход в календарь) ничего не меняет
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400
+                and not getattr(request, 'reads_from_replica', False)):
+            response.set_cookie(
+                PRIMARY_COOKIE, '1', max_age=settings.DB_REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
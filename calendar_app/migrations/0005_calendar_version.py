@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0004_event_calendar_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendar',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
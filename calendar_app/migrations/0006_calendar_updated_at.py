@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0005_calendar_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendar',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+from django.db import migrations, models
+
+
+# Поиск на главной идёт через name__icontains / name__istartswith, которые
+# PostgreSQL-бэкенд Django превращает в UPPER("name") LIKE UPPER(...),
+# поэтому триграммный индекс строится именно по UPPER(name).
+def create_name_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS calendar_name_trgm_idx '
+        'ON calendar_app_calendar USING gin (UPPER(name) gin_trgm_ops)'
+    )
+
+
+def drop_name_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS calendar_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0006_calendar_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendar',
+            index=models.Index(fields=['-created_at', '-id'], name='calendar_created_id_idx'),
+        ),
+        migrations.RunPython(create_name_trgm_index, drop_name_trgm_index),
+    ]
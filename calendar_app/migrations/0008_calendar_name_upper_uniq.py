@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:23
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+
+# Перед добавлением уникального ограничения переименовываем дубликаты:
+# самый старый календарь сохраняет имя, остальные получают суффикс « (2)», « (3)»...
+def rename_duplicate_names(apps, schema_editor):
+    Calendar = apps.get_model('calendar_app', 'Calendar')
+    duplicates = (
+        Calendar.objects.annotate(name_upper=Upper('name'))
+        .values('name_upper')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('name_upper', flat=True)
+    )
+    for name_upper in duplicates:
+        calendars = (
+            Calendar.objects.annotate(name_upper=Upper('name'))
+            .filter(name_upper=name_upper)
+            .order_by('created_at', 'id')
+        )
+        for calendar in list(calendars)[1:]:
+            suffix = 2
+            while True:
+                new_name = f'{calendar.name[:240]} ({suffix})'
+                if not Calendar.objects.filter(name__iexact=new_name).exists():
+                    break
+                suffix += 1
+            calendar.name = new_name
+            calendar.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0007_calendar_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='calendar',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), name='calendar_name_upper_uniq'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0008_calendar_name_upper_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('freq', models.CharField(choices=[('DAILY', 'Ежедневно'), ('WEEKLY', 'Еженедельно'), ('MONTHLY', 'Ежемесячно'), ('YEARLY', 'Ежегодно')], max_length=7, verbose_name='Частота')),
+                ('interval', models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Интервал')),
+                ('until', models.DateField(blank=True, null=True, verbose_name='Повторять до')),
+                ('count', models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Количество повторений')),
+                ('exdates', models.JSONField(blank=True, default=list, verbose_name='Исключённые даты')),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence', to='calendar_app.event')),
+            ],
+        ),
+    ]
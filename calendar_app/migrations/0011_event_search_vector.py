@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+# Полнотекстовый поиск по событиям (см. calendar_app/search.py). Столбец
+# search_vector — генерируемый (PostgreSQL 12+): база сама пересчитывает его
+# при INSERT и UPDATE, включая bulk_create, bulk_update и update(), поэтому
+# в модели его нет. Добавление столбца переписывает таблицу — на большой
+# базе запускайте миграцию в окно обслуживания.
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE calendar_app_event ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS event_search_vector_idx '
+        'ON calendar_app_event USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS event_search_vector_idx')
+    schema_editor.execute('ALTER TABLE calendar_app_event DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0010_event_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations
+
+
+# Секционирование включается настройкой EVENT_PARTITIONING ('year' или
+# 'month') и только на PostgreSQL. Если его включают позже, после применения
+# этой миграции, используйте python manage.py partition_events --convert.
+def partition_events(apps, schema_editor):
+    interval = getattr(settings, 'EVENT_PARTITIONING', '')
+    if not interval or schema_editor.connection.vendor != 'postgresql':
+        return
+    from calendar_app.partitioning import convert, is_partitioned
+    if not is_partitioned():
+        convert(interval)
+
+
+class Migration(migrations.Migration):
+
+    # Перенос строк идёт одной транзакцией внутри convert()
+    atomic = False
+
+    dependencies = [
+        ('calendar_app', '0011_event_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_events, migrations.RunPython.noop),
+    ]
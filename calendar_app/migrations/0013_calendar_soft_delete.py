@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:48
+
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_app', '0012_event_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.UUIDField(unique=True)),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('total_events', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('deleted_events', models.PositiveBigIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='calendar',
+            name='calendar_name_upper_uniq',
+        ),
+        migrations.AddField(
+            model_name='calendar',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='calendar',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), condition=models.Q(('deleted_at__isnull', True)), name='calendar_name_upper_uniq'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+from calendar_app.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется в транзакции
+    atomic = False
+
+    dependencies = [
+        ('calendar_app', '0013_calendar_soft_delete'),
+    ]
+
+    operations = [
+        # Секционированная таблица (миграция 0012, partition_events --convert)
+        # получает этот индекс при переводе, тогда операция его пропускает
+        AddIndexConcurrently(
+            model_name='event',
+            index=models.Index(fields=['date'], name='event_date_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+from calendar_app.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется в транзакции
+    atomic = False
+
+    dependencies = [
+        ('calendar_app', '0014_event_date_idx'),
+    ]
+
+    # Существующие строки получают change_seq = 0 и видны в ленте сразу.
+    # Столбец с постоянным значением по умолчанию PostgreSQL добавляет без
+    # перезаписи таблицы. Курсоры старого формата (время изменения) больше
+    # текущей версии календаря: клиенты получат 410 и синхронизируются заново.
+    operations = [
+        migrations.AddField(
+            model_name='calendar',
+            name='sync_floor',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='change_seq',
+            field=models.IntegerField(blank=True, default=0, editable=False, null=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='change_seq',
+            field=models.IntegerField(blank=True, default=0, editable=False, null=True),
+            preserve_default=False,
+        ),
+        AddIndexConcurrently(
+            model_name='event',
+            index=models.Index(fields=['calendar', 'change_seq', 'id'], name='event_calendar_change_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_calendar_updated_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='tombstone',
+            index=models.Index(fields=['calendar_id', 'change_seq', 'id'], name='tombstone_calendar_change_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='tombstone',
+            name='tombstone_calendar_idx',
+        ),
+    ]
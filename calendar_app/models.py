@@ -1,25 +1,199 @@
 import uuid
+from datetime import date, timedelta
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import RowNumber
+from django.db.models.functions import Upper
 from django.utils import timezone
 
+class CalendarManager(models.Manager):
+    # Календари, помеченные на удаление, скрыты сразу; строки удаляет
+    # фоновая задача (см. deletion.py)
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Calendar(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField("Название календаря", max_length=255, blank=False, null=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Увеличивается при каждом изменении событий календаря (см. cache.py)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Записи об удалении до этой версии стёрты (sync.prune_tombstones):
+    # курсоры ленты изменений старше неё требуют полной синхронизации
+    sync_floor = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CalendarManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Keyset-пагинация списка на главной: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='calendar_created_id_idx'),
+        ]
+        constraints = [
+            # Уникальность без учёта регистра; индекс используется для name__iexact.
+            # Имя удаляемого календаря сразу освобождается.
+            models.UniqueConstraint(
+                Upper('name'), name='calendar_name_upper_uniq', condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class EventQuerySet(models.QuerySet):
+    def in_range(self, start, end):
+        # Полуоткрытый интервал [start, end) — использует индекс (calendar, date),
+        # в отличие от date__year/date__month, которые превращаются в EXTRACT.
+        return self.filter(date__gte=start, date__lt=end)
+
+    def on_day(self, day):
+        return self.in_range(day, day + timedelta(days=1))
+
+    def in_month(self, year, month):
+        return self.in_range(*month_bounds(year, month))
+
+    def capped_per_day(self, limit):
+        # Не больше limit первых (по id) событий каждого дня и общее число
+        # событий этого дня: (id, date, title, day_total). Текст описаний не
+        # читается, и объём выборки не зависит от загруженности дня.
+        return self.annotate(
+            day_rank=models.Window(RowNumber(), partition_by=models.F('date'), order_by=models.F('id').asc()),
+            day_total=models.Window(models.Count('id'), partition_by=models.F('date')),
+        ).filter(day_rank__lte=limit).order_by('date', 'id').values_list('id', 'date', 'title', 'day_total')
+
+    def counts_by_date(self):
+        # Пары (дата, число событий) одним GROUP BY date; строки событий
+        # (и description) при этом не читаются
+        return self.order_by().values('date').annotate(total=models.Count('id')).values_list('date', 'total')
+
+
+def year_bounds(year):
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
+
+
 class Event(models.Model):
     calendar = models.ForeignKey(Calendar, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # bulk_update и update() не обновляют auto_now, поле нужно передавать явно
+    updated_at = models.DateTimeField(auto_now=True)
+    # Версия календаря, с которой изменение видно в ленте (см. sync.py);
+    # None — изменение ещё не отмечено bump_calendar_version
+    change_seq = models.IntegerField(null=True, blank=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['calendar', 'date'], name='event_calendar_date_idx'),
+            models.Index(fields=['calendar', 'change_seq', 'id'], name='event_calendar_change_idx'),
+            # Список событий в админке без фильтра по календарю (date_hierarchy)
+            models.Index(fields=['date'], name='event_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.date} — {self.title}"
+
+    def save(self, *args, **kwargs):
+        # bulk_update и update() поле не сбрасывают, его нужно передавать явно
+        self.change_seq = None
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+        super().save(*args, **kwargs)
+
     
-    
-    
\ No newline at end of file
+
+class RecurrenceQuerySet(models.QuerySet):
+    def overlapping(self, calendar_id, start, end):
+        # Правила, которые могут дать вхождения в [start, end); таблица правил
+        # мала, поэтому соединение с Event и Calendar идёт по первичному ключу.
+        # Правила удалённого календаря не попадают в выборку.
+        return self.filter(
+            models.Q(until__isnull=True) | models.Q(until__gte=start),
+            event__calendar_id=calendar_id,
+            event__calendar__deleted_at__isnull=True,
+            event__date__lt=end,
+        ).select_related('event')
+
+
+class Recurrence(models.Model):
+    DAILY = 'DAILY'
+    WEEKLY = 'WEEKLY'
+    MONTHLY = 'MONTHLY'
+    YEARLY = 'YEARLY'
+    FREQ_CHOICES = [
+        (DAILY, 'Ежедневно'),
+        (WEEKLY, 'Еженедельно'),
+        (MONTHLY, 'Ежемесячно'),
+        (YEARLY, 'Ежегодно'),
+    ]
+
+    # Дата самого события — DTSTART правила и его первое вхождение
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='recurrence')
+    freq = models.CharField("Частота", max_length=7, choices=FREQ_CHOICES)
+    interval = models.PositiveIntegerField("Интервал", default=1, validators=[MinValueValidator(1)])
+    until = models.DateField("Повторять до", null=True, blank=True)
+    count = models.PositiveIntegerField("Количество повторений", null=True, blank=True,
+                                        validators=[MinValueValidator(1)])
+    # Исключённые даты в формате YYYY-MM-DD
+    exdates = models.JSONField("Исключённые даты", default=list, blank=True)
+
+    objects = RecurrenceQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.get_freq_display()} — {self.event}"
+
+
+class Tombstone(models.Model):
+    # Запись об удалении для ленты изменений (см. sync.py). Внешних ключей нет:
+    # удалённых строк уже не существует. event_id = None — удалён весь календарь.
+    calendar_id = models.UUIDField()
+    event_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+    # Как Event.change_seq
+    change_seq = models.IntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['calendar_id', 'change_seq', 'id'], name='tombstone_calendar_change_idx'),
+            # Очистка старых записей (prune_tombstones)
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.calendar_id}/{self.event_id or '*'} — {self.deleted_at}"
+
+
+class CalendarDeletion(models.Model):
+    # Фоновое удаление календаря (см. deletion.py) и его прогресс. Календарь
+    # скрыт с момента запроса; строка остаётся после удаления календаря.
+    calendar_id = models.UUIDField(unique=True)
+    requested_at = models.DateTimeField(default=timezone.now)
+    total_events = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted_events = models.PositiveBigIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def status(self):
+        if self.finished_at:
+            return 'done'
+        return 'pending' if self.total_events is None else 'running'
+
+    def __str__(self):
+        return f"{self.calendar_id} — {self.status}"
@@ -0,0 +1,85 @@
+# ./calendar_app/operations.py
+
+# Операции миграций для больших таблиц. Обычный CREATE INDEX блокирует запись
+# в таблицу на всё время построения, поэтому на PostgreSQL индекс строится
+# CONCURRENTLY. Такой индекс нельзя строить в транзакции: миграция с этими
+# операциями должна объявлять atomic = False.
+
+from django.db import migrations
+from django.db.backends.utils import truncate_name
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    # Для секционированной таблицы (partitioning.py) CONCURRENTLY недоступен:
+    # индекс создаётся ON ONLY родителя, строится по секциям и присоединяется
+    # к ним. Уже существующий индекс (например, созданный partition_events
+    # --convert) не пересоздаётся, прерванное построение можно повторить.
+    # На других СУБД — обычный AddIndex.
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        table = model._meta.db_table
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [table])
+            if cursor.fetchone()[0] != 'p':
+                self._create(cursor, schema_editor, model, table, self.index.name)
+                return
+            # Невалидный индекс родителя — это индекс, присоединённый не ко всем секциям
+            if _index_state(cursor, self.index.name) is None:
+                statement = self.index.create_sql(model, schema_editor)
+                statement.parts['table'] = f'ONLY {schema_editor.quote_name(table)}'
+                cursor.execute(str(statement))
+            cursor.execute(
+                'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                'WHERE i.inhparent = %s::regclass '
+                'AND NOT EXISTS (SELECT 1 FROM pg_inherits pi JOIN pg_index x ON x.indexrelid = pi.inhrelid '
+                'WHERE pi.inhparent = %s::regclass AND x.indrelid = c.oid)',
+                [table, self.index.name],
+            )
+            for (partition,) in cursor.fetchall():
+                name = truncate_name(f'{partition}_{self.index.name}', schema_editor.connection.ops.max_name_length())
+                self._create(cursor, schema_editor, model, partition, name)
+                cursor.execute(
+                    f'ALTER INDEX {schema_editor.quote_name(self.index.name)} '
+                    f'ATTACH PARTITION {schema_editor.quote_name(name)}'
+                )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [self.index.name])
+            row = cursor.fetchone()
+            if row:
+                # Индекс секционированной таблицы удаляется только без CONCURRENTLY
+                concurrently = '' if row[0] == 'I' else 'CONCURRENTLY '
+                cursor.execute(f'DROP INDEX {concurrently}{schema_editor.quote_name(self.index.name)}')
+
+    def describe(self):
+        return f'{super().describe()} concurrently'
+
+    def _create(self, cursor, schema_editor, model, table, name):
+        # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс
+        state = _index_state(cursor, name)
+        if state:
+            return
+        if state is False:
+            cursor.execute(f'DROP INDEX CONCURRENTLY {schema_editor.quote_name(name)}')
+        statement = self.index.create_sql(model, schema_editor, concurrently=True)
+        statement.parts['table'] = schema_editor.quote_name(table)
+        statement.parts['name'] = schema_editor.quote_name(name)
+        cursor.execute(str(statement))
+
+
+def _index_state(cursor, name):
+    # None — индекса нет, иначе признак валидности
+    cursor.execute('SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)', [name])
+    row = cursor.fetchone()
+    return row[0] if row else None
@@ -0,0 +1,243 @@
+# ./calendar_app/partitioning.py
+
+# Секционирование calendar_app_event по диапазонам дат (PostgreSQL, по
+# желанию: EVENT_PARTITIONING = 'year' | 'month'). Запросы вьюх не меняются:
+# фильтр date >= ... AND date < ... (EventQuerySet.in_range) позволяет
+# планировщику отбросить лишние секции.
+#
+# Ограничения секционированной таблицы:
+# - первичный ключ — (id, date), уникальность id обеспечивает общая
+#   последовательность;
+# - внешний ключ Recurrence.event на таблицу снимается (он требует
+#   уникального индекса по одному id); каскадное удаление правил Django
+#   выполняет сам;
+# - даты вне созданных секций попадают в секцию по умолчанию и переносятся
+#   в свою секцию при её создании (create_partition).
+
+import re
+from datetime import date
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Recurrence
+
+TABLE = 'calendar_app_event'
+DEFAULT_PARTITION = f'{TABLE}_default'
+INTERVALS = ('year', 'month')
+# Секции при переводе создаются не глубже этого числа лет в прошлое; более
+# старые события остаются в секции по умолчанию
+HISTORY_YEARS = 20
+
+BOUND_RE = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def period_start(interval, day):
+    return date(day.year, 1, 1) if interval == 'year' else date(day.year, day.month, 1)
+
+
+def next_period(interval, start):
+    if interval == 'year':
+        return date(start.year + 1, 1, 1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(interval, start):
+    if interval == 'year':
+        return f'{TABLE}_y{start.year}'
+    return f'{TABLE}_m{start.year}_{start.month:02d}'
+
+
+def periods(interval, first, last):
+    # Начала периодов, покрывающих даты [first, last]
+    start = period_start(interval, first)
+    while start <= last:
+        yield start
+        start = next_period(interval, start)
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def partitions():
+    # [(имя, начало, конец)] по возрастанию; секция по умолчанию не входит
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass',
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    result = []
+    for name, bound in rows:
+        match = BOUND_RE.search(bound)
+        if match:
+            result.append((name, date.fromisoformat(match[1]), date.fromisoformat(match[2])))
+    return sorted(result, key=lambda row: row[1])
+
+
+def _insert_columns(cursor, table):
+    # Генерируемые столбцы (search_vector) база вычисляет сама
+    cursor.execute(
+        'SELECT column_name FROM information_schema.columns '
+        "WHERE table_name = %s AND is_generated = 'NEVER' ORDER BY ordinal_position",
+        [table],
+    )
+    return ', '.join(f'"{row[0]}"' for row in cursor.fetchall())
+
+
+def create_partition(interval, start):
+    # Создаёт секцию периода, если её нет; строки этого периода из секции
+    # по умолчанию переносятся в новую. Возвращает имя или None.
+    name = partition_name(interval, start)
+    end = next_period(interval, start)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0]:
+            return None
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+        cursor.execute(
+            f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+            [start.isoformat(), end.isoformat()],
+        )
+        columns = _insert_columns(cursor, DEFAULT_PARTITION)
+        cursor.execute(
+            f'INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} '
+            'WHERE date >= %s AND date < %s',
+            [start, end],
+        )
+        cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s', [start, end])
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+    return name
+
+
+def ensure_partitions(interval, first, last):
+    return [name for name in (create_partition(interval, start) for start in periods(interval, first, last)) if name]
+
+
+def convert(interval, ahead=12):
+    # Переводит обычную таблицу в секционированную копированием строк в одной
+    # транзакции (таблица заблокирована на всё время — окно обслуживания).
+    # Создаются секции с первой даты по текущий период плюс ahead периодов вперёд.
+    if interval not in INTERVALS:
+        raise ValueError(interval)
+    legacy = f'{TABLE}_legacy'
+    # Последовательность identity-столбца старой таблицы удаляется вместе с ней
+    sequence = f'{TABLE}_part_id_seq'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT min(date), max(id) FROM {TABLE}')
+        first, max_id = cursor.fetchone()
+        cursor.execute(
+            'SELECT column_name FROM information_schema.columns '
+            "WHERE table_name = %s AND column_name IN ('search_vector', 'change_seq')",
+            [TABLE],
+        )
+        optional = {row[0] for row in cursor.fetchall()}
+        has_search_vector = 'search_vector' in optional
+        # Миграция 0012 переводит таблицу раньше, чем 0015 добавляет change_seq
+        if 'change_seq' in optional:
+            feed_index, feed_column = 'event_calendar_change_idx', 'change_seq'
+        else:
+            feed_index, feed_column = 'event_calendar_updated_idx', 'updated_at'
+
+        # Внешние ключи на таблицу событий (Recurrence.event) секционированная
+        # таблица поддержать не может
+        cursor.execute(
+            "SELECT conrelid::regclass, conname FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        for table, constraint in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {constraint}')
+
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {legacy}')
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE) '
+            'PARTITION BY RANGE (date)'
+        )
+        cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {TABLE}.id')
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute('SELECT setval(%s, %s)', [sequence, max_id or 1])
+        cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, date)')
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_calendar_id_fk FOREIGN KEY (calendar_id) '
+            'REFERENCES calendar_app_calendar (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(f'CREATE INDEX event_calendar_date_idx_p ON {TABLE} (calendar_id, date)')
+        cursor.execute(f'CREATE INDEX {feed_index}_p ON {TABLE} (calendar_id, {feed_column}, id)')
+        cursor.execute(f'CREATE INDEX event_date_idx_p ON {TABLE} (date)')
+        if has_search_vector:
+            cursor.execute(f'CREATE INDEX event_search_vector_idx_p ON {TABLE} USING gin (search_vector)')
+        cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+
+        today = date.today()
+        last = period_start(interval, today)
+        for _ in range(ahead):
+            last = next_period(interval, last)
+        first = max(min(first or today, today), date(today.year - HISTORY_YEARS, 1, 1))
+        for start in periods(interval, first, last):
+            cursor.execute(
+                f'CREATE TABLE {partition_name(interval, start)} PARTITION OF {TABLE} '
+                'FOR VALUES FROM (%s) TO (%s)',
+                [start.isoformat(), next_period(interval, start).isoformat()],
+            )
+
+        columns = _insert_columns(cursor, legacy)
+        cursor.execute(f'INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {legacy}')
+        cursor.execute(f'DROP TABLE {legacy}')
+        # Имена индексов как в моделях и миграциях
+        indexes = ['event_calendar_date_idx', feed_index, 'event_date_idx']
+        if has_search_vector:
+            indexes.append('event_search_vector_idx')
+        for index in indexes:
+            cursor.execute(f'ALTER INDEX {index}_p RENAME TO {index}')
+        cursor.execute(f'ANALYZE {TABLE}')
+
+
+def has_active_series(start, end, before):
+    # Есть ли серии повторений, начатые в [start, end) и дающие вхождения с
+    # before и позже. Вхождения строятся из исходного события, поэтому его
+    # секцию архивировать нельзя. Серия с count без until считается
+    # продолжающейся.
+    return Recurrence.objects.filter(
+        Q(until__isnull=True) | Q(until__gte=before), event__date__gte=start, event__date__lt=end,
+    ).exists()
+
+
+def archive_partitions(before, schema='archive', drop=False):
+    # Отсоединяет секции, целиком лежащие раньше before, и переносит их в
+    # схему schema (или удаляет при drop). Правила повторения их событий
+    # переносятся в таблицу <секция>_recurrence той же схемы (или удаляются).
+    # Секции с продолжающимися сериями остаются. Возвращает (архивированные,
+    # пропущенные) имена секций.
+    archived, skipped = [], []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not drop:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {schema}')
+        # Новые серии не появятся, пока секции проверяются и отсоединяются
+        cursor.execute(f'LOCK TABLE {Recurrence._meta.db_table} IN SHARE MODE')
+        for name, start, end in partitions():
+            if end > before:
+                continue
+            if has_active_series(start, end, before):
+                skipped.append(name)
+                continue
+            rules = f'SELECT r.* FROM {Recurrence._meta.db_table} r JOIN {name} e ON e.id = r.event_id'
+            if not drop:
+                cursor.execute(f'CREATE TABLE {schema}.{name}_recurrence AS {rules}')
+            cursor.execute(
+                f'DELETE FROM {Recurrence._meta.db_table} WHERE event_id IN (SELECT id FROM {name})'
+            )
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            if drop:
+                cursor.execute(f'DROP TABLE {name}')
+            else:
+                cursor.execute(f'ALTER TABLE {name} SET SCHEMA {schema}')
+            archived.append(name)
+    return archived, skipped
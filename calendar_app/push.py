@@ -0,0 +1,121 @@
+# ./calendar_app/push.py
+
+# Рассылка изменений событий открытым страницам календаря (см. event_stream
+# в async_views.py). Брокер задаётся PUSH_BROKER; LocalBroker работает в
+# памяти процесса и доставляет сообщения только подписчикам того же процесса.
+# Для нескольких воркеров нужен брокер с тем же интерфейсом поверх общей шины
+# (Redis pub/sub, PostgreSQL LISTEN/NOTIFY).
+
+import asyncio
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Сообщение для подписчика, который не успевает читать: страница перезагружается
+RESET = {'type': 'reset'}
+
+
+class Subscription:
+    def __init__(self, broker, channel, queue_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def deliver(self, message):
+        # Выполняется в цикле событий подписчика
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._channels = {}
+        # publish вызывается из потоков синхронных вьюх
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._channels.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        # Один вызов call_soon_threadsafe на цикл событий, а не на подписчика:
+        # каждый такой вызов будит цикл записью в служебный сокет
+        by_loop = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver_all, group, message)
+            except RuntimeError:
+                # Цикл событий подписчиков уже закрыт
+                for subscription in group:
+                    self.unsubscribe(subscription)
+
+
+def deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'PUSH_BROKER', 'calendar_app.push.LocalBroker'))()
+
+
+def subscribe(calendar_id):
+    return get_broker().subscribe(str(calendar_id))
+
+
+def publish(calendar_id, message):
+    # Сообщение уходит только после фиксации транзакции, чтобы подписчики
+    # не увидели изменение, которое откатится
+    transaction.on_commit(lambda: publish_now(calendar_id, message))
+
+
+def publish_now(calendar_id, message):
+    # Для асинхронных вьюх: transaction.on_commit обращается к соединению и
+    # в асинхронном контексте недоступен, а их запись уже зафиксирована
+    get_broker().publish(str(calendar_id), message)
+
+
+def event_message(kind, event, recurring=False):
+    return {
+        'type': kind,
+        'id': event.id,
+        'date': event.date.strftime('%Y-%m-%d'),
+        'title': event.title,
+        'recurring': recurring,
+    }
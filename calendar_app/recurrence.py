@@ -0,0 +1,170 @@
+# ./calendar_app/recurrence.py
+
+from collections import Counter
+from datetime import MAXYEAR, date, timedelta
+from functools import lru_cache
+
+from .models import Recurrence
+from .utils import parse_date
+
+DAILY, WEEKLY, MONTHLY, YEARLY = Recurrence.DAILY, Recurrence.WEEKLY, Recurrence.MONTHLY, Recurrence.YEARLY
+
+
+def parse_recurrence(data):
+    # Параметры правила из формы add_event или RRULE импорта (см. ical.parse_rrule).
+    # None — событие без повторов, False — некорректные параметры
+    freq = data.get('freq')
+    if not freq:
+        return None
+    if freq not in dict(Recurrence.FREQ_CHOICES):
+        return False
+    try:
+        interval = int(data.get('interval') or 1)
+        count = int(data['count']) if data.get('count') else None
+    except ValueError:
+        return False
+    until = parse_date(data['until']) if data.get('until') else None
+    if interval < 1 or (count is not None and count < 1) or (data.get('until') and until is None):
+        return False
+    return {'freq': freq, 'interval': interval, 'until': until, 'count': count}
+
+
+def _shift(dtstart, freq, steps):
+    # Возвращает (дата, начало периода). Дата равна None, если такого дня нет
+    # (31 число в коротком месяце, 29 февраля) — по RFC 5545 такое вхождение
+    # пропускается. Начало периода None — вышли за пределы календаря.
+    try:
+        if freq in (DAILY, WEEKLY):
+            day = dtstart + timedelta(days=steps * (7 if freq == WEEKLY else 1))
+            return day, day
+    except OverflowError:
+        return None, None
+    if freq == MONTHLY:
+        year, month = divmod(dtstart.month - 1 + steps, 12)
+        year, month = dtstart.year + year, month + 1
+    else:
+        year, month = dtstart.year + steps, dtstart.month
+    if year > MAXYEAR:
+        return None, None
+    try:
+        return date(year, month, dtstart.day), date(year, month, 1)
+    except ValueError:
+        return None, date(year, month, 1)
+
+
+def _periods_between(dtstart, day, freq):
+    if freq == DAILY:
+        return (day - dtstart).days
+    if freq == WEEKLY:
+        return (day - dtstart).days // 7
+    if freq == MONTHLY:
+        return (day.year - dtstart.year) * 12 + day.month - dtstart.month
+    return day.year - dtstart.year
+
+
+def iter_occurrences(dtstart, freq, interval=1, until=None, count=None, exdates=(), start=None, end=None):
+    # Лениво перечисляет даты вхождений в [start, end). Без until/count/end
+    # генератор бесконечен.
+    last = until
+    if end is not None:
+        last = min(last, end - timedelta(days=1)) if last else end - timedelta(days=1)
+    excluded = set(exdates)
+
+    index = 0
+    # Каждый шаг DAILY/WEEKLY — настоящее вхождение, поэтому к окну можно
+    # перейти сразу, не теряя счёт для COUNT. Для MONTHLY/YEARLY пропущенные
+    # дни не считаются, и при заданном count перебор идёт с начала.
+    if start is not None and start > dtstart and (count is None or freq in (DAILY, WEEKLY)):
+        index = _periods_between(dtstart, start, freq) // interval
+    number = index
+
+    while count is None or number < count:
+        day, period_start = _shift(dtstart, freq, index * interval)
+        if period_start is None or (last is not None and period_start > last):
+            return
+        index += 1
+        if day is None:
+            continue
+        number += 1
+        if last is not None and day > last:
+            return
+        if start is not None and day < start:
+            continue
+        if day.isoformat() in excluded:
+            continue
+        yield day
+
+
+@lru_cache(maxsize=4096)
+def expand(dtstart, freq, interval, until, count, exdates, start, end):
+    # Мемоизация по содержимому правила и окну: изменённое правило даёт
+    # другой ключ, поэтому явная инвалидация не нужна
+    return tuple(iter_occurrences(dtstart, freq, interval, until, count, exdates, start, end))
+
+
+def occurrences(recurrence, start, end):
+    return expand(
+        recurrence.event.date, recurrence.freq, recurrence.interval, recurrence.until,
+        recurrence.count, tuple(recurrence.exdates), start, end,
+    )
+
+
+def expand_recurrences(recurrences, start, end):
+    # Повторы в окне [start, end) как пары (дата, событие). Первое вхождение
+    # (дата самого события) уже попадает в обычную выборку по диапазону,
+    # поэтому здесь оно пропускается. Второй элемент результата — id событий,
+    # у которых первое вхождение исключено и его нужно убрать.
+    pairs = []
+    hidden = set()
+    for recurrence in recurrences:
+        event = recurrence.event
+        if event.date.isoformat() in recurrence.exdates:
+            hidden.add(event.id)
+        pairs.extend((day, event) for day in occurrences(recurrence, start, end) if day != event.date)
+    return pairs, hidden
+
+
+def recurring_occurrences(calendar_id, start, end):
+    return expand_recurrences(Recurrence.objects.overlapping(calendar_id, start, end), start, end)
+
+
+async def arecurring_occurrences(calendar_id, start, end):
+    recurrences = [r async for r in Recurrence.objects.overlapping(calendar_id, start, end)]
+    return expand_recurrences(recurrences, start, end)
+
+
+def recurring_titles(calendar_id, start, end):
+    # Как recurring_occurrences, но без описаний событий — для сетки месяца
+    recurrences = Recurrence.objects.overlapping(calendar_id, start, end).defer('event__description')
+    return expand_recurrences(recurrences, start, end)
+
+
+def recurring_counts(calendar_id, start, end):
+    # Поправка к counts_by_date за счёт повторов: +1 на каждое вхождение и -1
+    # за исключённое первое вхождение. Текст событий не нужен.
+    recurrences = list(
+        Recurrence.objects.overlapping(calendar_id, start, end).defer('event__title', 'event__description')
+    )
+    pairs, hidden = expand_recurrences(recurrences, start, end)
+    counts = Counter(day for day, _ in pairs)
+    for recurrence in recurrences:
+        event = recurrence.event
+        if event.id in hidden and start <= event.date < end:
+            counts[event.date] -= 1
+    return counts
+
+
+def group_by_date(events, recurring):
+    # Обычные события окна вместе с развёрнутыми повторами, сгруппированные по дате
+    pairs, hidden = recurring
+    result = {}
+    for event in events:
+        if event.id not in hidden:
+            result.setdefault(event.date, []).append(event)
+    for day, event in sorted(pairs, key=lambda pair: (pair[0], pair[1].id)):
+        result.setdefault(day, []).append(event)
+    return result
+
+
+def events_by_date(events, calendar_id, start, end):
+    return group_by_date(events, recurring_occurrences(calendar_id, start, end))
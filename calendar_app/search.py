@@ -0,0 +1,56 @@
+# ./calendar_app/search.py
+
+# Поиск событий календаря по заголовку и описанию. На PostgreSQL — по
+# генерируемому столбцу search_vector с GIN-индексом (миграция 0011),
+# с ранжированием ts_rank_cd: совпадения в заголовке весят больше. На
+# других базах — icontains без ранжирования (для разработки и тестов).
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Substr
+
+from .models import Event
+
+SEARCH_PAGE_SIZE = 20
+# Глубже листать ранжированную выдачу смысла нет, а OFFSET растёт линейно
+SEARCH_MAX_PAGES = 50
+SNIPPET_LENGTH = 200
+
+TSQUERY = "websearch_to_tsquery('russian', %s)"
+
+
+def full_text_supported(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def full_text_filter(events, query):
+    column = f'"{Event._meta.db_table}"."search_vector"'
+    return events.filter(
+        RawSQL(f'{column} @@ {TSQUERY}', [query], output_field=BooleanField())
+    ).annotate(
+        rank=RawSQL(f'ts_rank_cd({column}, {TSQUERY})', [query], output_field=FloatField())
+    ).order_by('-rank', '-date', '-id')
+
+
+def naive_filter(events, query):
+    return events.filter(Q(title__icontains=query) | Q(description__icontains=query)).order_by('-date', '-id')
+
+
+def search_events(calendar_id, query, page=1, page_size=SEARCH_PAGE_SIZE):
+    # Возвращает (результаты страницы, есть ли следующая страница)
+    events = Event.objects.filter(calendar_id=calendar_id)
+    if full_text_supported(events.db):
+        events = full_text_filter(events, query)
+    else:
+        events = naive_filter(events, query)
+    offset = (page - 1) * page_size
+    rows = list(
+        events.annotate(snippet=Substr('description', 1, SNIPPET_LENGTH))
+        .values_list('id', 'date', 'title', 'snippet')[offset:offset + page_size + 1]
+    )
+    results = [
+        {'id': event_id, 'date': date.strftime('%Y-%m-%d'), 'title': title, 'snippet': snippet}
+        for event_id, date, title, snippet in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
@@ -0,0 +1,185 @@
+// ./calendar_app/static/calendar_app/calendar.js
+
+function copyCalendarUrl() {
+    let urlInput = document.getElementById('calendarUrl');
+    urlInput.select();
+    document.execCommand('copy');
+    alert('Ссылка скопирована!');
+}
+
+$(document).ready(function () {
+    // Параметры страницы — в data-атрибутах body (шаблон calendar.html)
+    const config = document.body.dataset;
+    let calendarId = config.calendarId;
+    let selectedDate = '';
+
+    function showDayEvents(events) {
+        let html = events.length 
+            ? `<ul>${events.map(e => `
+                <li>
+                    <a href="#" class="event-link" 
+                       data-id="${e.id}" 
+                       data-title="${e.title.replace(/"/g, '&quot;')}" 
+                       data-desc="${e.description.replace(/"/g, '&quot;}')}">
+                        ${e.title}
+                    </a>
+                </li>
+            `).join('')}</ul>` 
+            : '<p>Событий нет</p>';
+
+        $('#eventModalBody').html(html);
+        $('#eventModal').modal('show');
+    }
+
+    // Клик по дню
+    $('.day-cell').click(function () {
+        selectedDate = $(this).data('date');
+        if (!selectedDate) return;
+
+        // В сетке только первые события дня без описаний — полный список по запросу
+        $.get(`/calendar/${calendarId}/get_events/`, { date: selectedDate }, function (res) {
+            showDayEvents(res.events);
+        });
+    });
+
+    // Изменения от других пользователей применяются к сетке без перезагрузки
+    function patchGrid(msg) {
+        if (msg.type === 'reset' || msg.recurring) {
+            location.reload();
+        } else if (msg.type === 'create') {
+            let cell = $(`.day-cell[data-date="${msg.date}"]`);
+            if (!cell.length) return;
+            if (cell.find('.event-indicator').length < Number(config.dayEventLimit)) {
+                let indicator = $('<div class="event-indicator"><span></span></div>');
+                indicator.find('span').attr('data-event-id', msg.id).text(msg.title);
+                let more = cell.find('.event-more');
+                more.length ? indicator.insertBefore(more) : cell.append(indicator);
+            } else {
+                let more = cell.find('.event-more');
+                if (!more.length) more = $('<div class="event-more" data-more="0"></div>').appendTo(cell);
+                let count = Number(more.attr('data-more')) + 1;
+                more.attr('data-more', count).text(`+${count} ещё`);
+            }
+        } else if (msg.type === 'update') {
+            $(`[data-event-id="${msg.id}"]`).text(msg.title);
+        } else if (msg.type === 'delete') {
+            let cell = $(`.day-cell[data-date="${msg.date}"]`);
+            if (!cell.length) return;
+            let indicator = cell.find(`[data-event-id="${msg.id}"]`).closest('.event-indicator');
+            let more = cell.find('.event-more');
+            if (!more.length) {
+                indicator.remove();
+            } else if (indicator.length) {
+                // На освободившееся место встаёт скрытое событие, его на странице нет
+                location.reload();
+            } else {
+                // Удалено одно из скрытых событий
+                let count = Number(more.attr('data-more')) - 1;
+                count ? more.attr('data-more', count).text(`+${count} ещё`) : more.remove();
+            }
+        }
+    }
+    if (config.liveUpdates && window.EventSource) {
+        new EventSource(`/calendar/${calendarId}/stream/`).onmessage = function (e) {
+            patchGrid(JSON.parse(e.data));
+        };
+    }
+
+    // Поиск: результаты постранично в окне событий, клик ведёт на месяц события
+    function searchEvents(query, page) {
+        $.get(`/calendar/${calendarId}/search/`, { q: query, page: page }, function (res) {
+            if (page === 1) {
+                $('#eventModalBody').html('<ul id="searchResults"></ul>');
+                $('#eventModal').modal('show');
+            }
+            $('#searchMore').remove();
+            $.each(res.results, function (_, r) {
+                let [y, m] = r.date.split('-');
+                let item = $('<li><a></a> <small class="text-muted"></small></li>');
+                item.find('a').attr('href', `/calendar/${calendarId}/${Number(y)}/${Number(m)}/`).text(r.title);
+                item.find('small').text(r.date);
+                $('#searchResults').append(item);
+            });
+            if (page === 1 && !res.results.length) {
+                $('#eventModalBody').html('<p>Ничего не найдено</p>');
+            }
+            if (res.next) {
+                $('<button id="searchMore" class="btn btn-sm btn-link">Ещё</button>')
+                    .click(function () { searchEvents(query, res.next); })
+                    .appendTo('#eventModalBody');
+            }
+        });
+    }
+    $('#eventSearchForm').submit(function (e) {
+        e.preventDefault();
+        let query = $('#eventSearchQuery').val().trim();
+        if (query) searchEvents(query, 1);
+    });
+
+    // Обработчик клика на "Добавить событие"
+    $('#addEventBtn').click(function () {
+        if (!selectedDate) {
+            alert('Выберите день');
+            return;
+        }
+        $('#eventForm')[0].reset();
+        $('#eventDate').val(selectedDate);
+        $('#eventRecurrence').show();
+        $('#eventFormModal').modal('show');
+    });
+
+    // Обработчик клика на событие
+    $(document).on('click', '.event-link', function () {
+        let id = $(this).data('id');
+        let title = $(this).data('title');
+        let desc = $(this).data('desc');
+
+        let modalContent = `
+            <h5>${title}</h5>
+            <p>${desc}</p>
+            <button class="btn btn-sm btn-warning edit-event" data-id="${id}">Редактировать</button>
+            <button class="btn btn-sm btn-danger delete-event" data-id="${id}">Удалить</button>
+        `;
+        $('#eventModalBody').html(modalContent);
+    });
+
+    // Редактирование события
+    $(document).on('click', '.edit-event', function () {
+        let id = $(this).data('id');
+        let title = $(this).closest('div').find('h5').text().trim();
+        let desc = $(this).closest('div').find('p').text().trim();
+
+        $('#eventTitle').val(title);
+        $('#eventDescription').val(desc);
+        $('#eventDate').val(selectedDate);
+        $('#eventRecurrence').hide();
+        $('#eventFormModal').modal('show');
+
+        $('#eventForm').off('submit').submit(function (e) {
+            e.preventDefault();
+            let formData = $(this).serialize();
+            $.post(`/calendar/${calendarId}/edit_event/${id}/`, formData, function () {
+                location.reload();
+            });
+        });
+    });
+
+    // Удаление события
+    $(document).on('click', '.delete-event', function () {
+        let id = $(this).data('id');
+        if (confirm('Удалить?')) {
+            $.post(`/calendar/${calendarId}/delete_event/${id}/`, function () {
+                location.reload();
+            });
+        }
+    });
+
+    // Сохранение события
+    $('#eventForm').submit(function (e) {
+        e.preventDefault();
+        let formData = $(this).serialize();
+        $.post(`/calendar/${calendarId}/add_event/`, formData, function () {
+            location.reload();
+        });
+    });
+});
@@ -0,0 +1,50 @@
+// ./calendar_app/static/calendar_app/home.js
+
+document.addEventListener('DOMContentLoaded', function () {
+    const searchInput = document.getElementById('searchInput');
+    const calendarList = document.getElementById('calendarList');
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    const emptyList = document.getElementById('emptyList');
+    const searchUrl = document.body.dataset.searchUrl;
+    let query = '';
+    let request = 0;
+    let timer = null;
+
+    // Поиск и подгрузка выполняются на сервере постранично
+    function loadCalendars(cursor) {
+        const params = new URLSearchParams({ q: query });
+        if (cursor) params.set('cursor', cursor);
+        const current = ++request;
+        fetch(`${searchUrl}?${params}`)
+            .then(response => response.json())
+            .then(function (res) {
+                if (current !== request) return;
+                if (!cursor) calendarList.innerHTML = '';
+                res.calendars.forEach(function (calendar) {
+                    const item = document.createElement('li');
+                    const link = document.createElement('a');
+                    item.className = 'list-group-item calendar-item';
+                    link.className = 'text-decoration-none';
+                    link.href = calendar.url;
+                    link.textContent = calendar.name;
+                    item.appendChild(link);
+                    calendarList.appendChild(item);
+                });
+                emptyList.style.display = calendarList.children.length ? 'none' : '';
+                loadMoreBtn.dataset.cursor = res.next || '';
+                loadMoreBtn.style.display = res.next ? '' : 'none';
+            });
+    }
+
+    searchInput.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            query = searchInput.value.trim();
+            loadCalendars(null);
+        }, 250);
+    });
+
+    loadMoreBtn.addEventListener('click', function () {
+        loadCalendars(loadMoreBtn.dataset.cursor);
+    });
+});
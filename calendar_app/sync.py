@@ -0,0 +1,153 @@
+# ./calendar_app/sync.py
+
+# Инкрементальная синхронизация: лента изменений календаря из событий и
+# записей об удалении (Tombstone), упорядоченных по (change_seq, вид, id),
+# где вид 0 — событие, 1 — удаление. change_seq — версия календаря, которой
+# bump_calendar_version отметил изменение. Версия увеличивается под
+# блокировкой строки календаря до конца транзакции, поэтому номера идут в
+# порядке фиксации: строка с номером не больше текущей версии уже видна, и
+# долгая транзакция (импорт, пакет) не может оказаться позади курсора.
+# Курсор — позиция в ленте и основа «версия:вид:id:основа»; вид 2 — конец
+# версии. Основа — sync_floor календаря на момент, когда клиент начал
+# синхронизацию: его копия не зависит от стёртых до неё записей об удалении.
+
+from django.db import transaction
+from django.db.models import Max, Q, Subquery
+
+from .models import Calendar, Event, Tombstone
+
+CHANGES_PAGE_SIZE = 500
+
+UPSERT, DELETE, END = 0, 1, 2
+
+
+class CursorExpired(Exception):
+    # Курсор старше стёртых записей об удалении или не из этой ленты:
+    # клиенту нужна полная синхронизация (запрос без курсора)
+    pass
+
+
+def mark_changes(calendar_id):
+    # Вызывается из bump_calendar_version после увеличения версии
+    version = Calendar.all_objects.filter(id=calendar_id).values('version')
+    Event.objects.filter(calendar_id=calendar_id, change_seq__isnull=True).update(change_seq=Subquery(version))
+    Tombstone.objects.filter(calendar_id=calendar_id, change_seq__isnull=True).update(change_seq=Subquery(version))
+
+
+def record_deletions(calendar_id, event_ids):
+    Tombstone.objects.bulk_create([
+        Tombstone(calendar_id=calendar_id, event_id=event_id) for event_id in event_ids
+    ])
+
+
+def delete_events(calendar_id, event_ids):
+    # Удаление событий вместе с записями об удалении — в одной транзакции.
+    # Повторы id (пакет с двумя удалениями одного события) дали бы лишние записи.
+    event_ids = list(dict.fromkeys(event_ids))
+    with transaction.atomic():
+        Event.objects.filter(calendar_id=calendar_id, id__in=event_ids).delete()
+        record_deletions(calendar_id, event_ids)
+
+
+def record_calendar_deletion(calendar_id):
+    # Поштучные удаления больше не нужны: клиент получит одну запись о календаре
+    Tombstone.objects.filter(calendar_id=calendar_id).delete()
+    Tombstone.objects.create(calendar_id=calendar_id, event_id=None)
+
+
+def calendar_deleted(calendar_id):
+    return Tombstone.objects.filter(calendar_id=calendar_id, event_id=None).exists()
+
+
+def prune_tombstones(before):
+    # Стирает записи об удалении старше before, кроме записей с наибольшим
+    # номером среди них: этот номер становится sync_floor календаря, и
+    # курсор с позицией не меньше него ничего не пропустил.
+    old = Tombstone.objects.filter(deleted_at__lt=before, change_seq__isnull=False)
+    pruned = Tombstone.objects.filter(event_id=None, deleted_at__lt=before).delete()[0]
+    floors = old.values('calendar_id').annotate(seq=Max('change_seq')).values_list('calendar_id', 'seq')
+    for calendar_id, seq in floors.order_by():
+        with transaction.atomic():
+            Calendar.all_objects.filter(id=calendar_id, sync_floor__lt=seq).update(sync_floor=seq)
+            pruned += Tombstone.objects.filter(calendar_id=calendar_id, change_seq__lt=seq).delete()[0]
+    return pruned
+
+
+def format_cursor(seq, kind, pk, base):
+    return f'{seq}:{kind}:{pk}:{base}'
+
+
+def parse_cursor(cursor):
+    # ValueError для некорректного курсора. У курсоров без основы она 0.
+    parts = [int(part) for part in cursor.split(':')]
+    if len(parts) == 3:
+        parts.append(0)
+    seq, kind, pk, base = parts
+    if kind not in (UPSERT, DELETE, END):
+        raise ValueError(cursor)
+    return seq, kind, pk, base
+
+
+def _after(queryset, kind, position):
+    # Строки вида kind, идущие в ленте после позиции position
+    seq, cursor_kind, pk, _ = position
+    if kind < cursor_kind:
+        return queryset.filter(change_seq__gt=seq)
+    if kind > cursor_kind:
+        return queryset.filter(change_seq__gte=seq)
+    return queryset.filter(Q(change_seq__gt=seq) | Q(change_seq=seq, id__gt=pk))
+
+
+def changes_since(calendar_id, cursor=None, limit=CHANGES_PAGE_SIZE):
+    # Возвращает (изменения, курсор для следующего запроса, есть ли ещё).
+    # Обе выборки идут по индексам (calendar, change_seq, id) и ограничены
+    # limit + 1 строками.
+    version, floor = Calendar.all_objects.filter(id=calendar_id).values_list('version', 'sync_floor').get()
+    events = Event.objects.filter(calendar_id=calendar_id, change_seq__lte=version)
+    tombstones = Tombstone.objects.filter(calendar_id=calendar_id, event_id__isnull=False, change_seq__lte=version)
+    base = floor
+    if cursor:
+        position = parse_cursor(cursor)
+        seq, _, _, cursor_base = position
+        # Записи об удалении после позиции стёрты, а копия клиента старше них.
+        # Страницы полной синхронизации (основа не ниже floor) проходят и
+        # через строки со старыми номерами.
+        if (seq < floor and cursor_base < floor) or seq > version:
+            raise CursorExpired(cursor)
+        base = max(base, cursor_base)
+        events = _after(events, UPSERT, position)
+        tombstones = _after(tombstones, DELETE, position)
+
+    rows = [
+        (change_seq, UPSERT, event_id, {
+            'type': 'upsert', 'id': event_id, 'date': date.isoformat(), 'title': title,
+            'description': description, 'updated_at': updated_at.isoformat(),
+            'recurrence': {
+                'freq': freq, 'interval': interval, 'until': until.isoformat() if until else None,
+                'count': count, 'exdates': exdates,
+            } if freq else None,
+        })
+        for event_id, change_seq, updated_at, date, title, description, freq, interval, until, count, exdates in (
+            events.order_by('change_seq', 'id').values_list(
+                'id', 'change_seq', 'updated_at', 'date', 'title', 'description',
+                'recurrence__freq', 'recurrence__interval', 'recurrence__until',
+                'recurrence__count', 'recurrence__exdates',
+            )[:limit + 1]
+        )
+    ]
+    rows.extend(
+        (change_seq, DELETE, pk, {'type': 'delete', 'id': event_id, 'deleted_at': deleted_at.isoformat()})
+        for pk, change_seq, deleted_at, event_id in (
+            tombstones.order_by('change_seq', 'id').values_list('id', 'change_seq', 'deleted_at', 'event_id')[:limit + 1]
+        )
+    )
+    rows.sort(key=lambda row: row[:3])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        cursor = format_cursor(*rows[-1][:3], base)
+    else:
+        # Лента прочитана до текущей версии включительно
+        cursor = format_cursor(version, END, 0, base)
+    return [row[3] for row in rows], cursor, has_more
@@ -1,9 +1,27 @@
 # ./calendar_app/templatetags/custom_filters.py
 
 from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from calendar_app.assets import VENDOR_SOURCES, vendored
 
 register = template.Library()
 
 @register.filter
 def get_item(dictionary, key):
-    return dictionary.get(key)
\ No newline at end of file
+    return dictionary.get(key)
+
+
+@register.simple_tag
+def vendor_asset(path):
+    # <link> или <script> сторонней библиотеки: из static/vendor, если файл
+    # скачан (vendor_assets), иначе с CDN с проверкой SRI-хеша
+    if vendored(path):
+        url, attrs = static(path), ''
+    else:
+        url, integrity = VENDOR_SOURCES[path]
+        attrs = format_html(' integrity="{}" crossorigin="anonymous"', integrity)
+    if path.endswith('.css'):
+        return format_html('<link rel="stylesheet" href="{}"{}>', url, attrs)
+    return format_html('<script src="{}"{}></script>', url, attrs)
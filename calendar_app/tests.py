@@ -1,5 +1,1397 @@
 # ./calendar_app/tests.py
 
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, router
+from django.db.migrations.loader import MigrationLoader
+from django.http import Http404, HttpResponse
+from django.template.base import Template as DjangoTemplate
+from django.template.loader import render_to_string
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import async_views, push, views
+from .admin import EstimatedCountPaginator
+from .assets import build_id, check_vendor_assets, hashed_names, serve_static, vendored
+from .benchmarks import BENCH_CALENDAR, ScenarioFailed, largest_calendar_size, run, seed
+from .cache import bump_calendar_version, cache_stats, clear_calendar_names
+from .db import PRIMARY_COOKIE, read_from_replica
+from .deletion import purge_calendar, purge_pending, request_calendar_deletion
+from .ical import fold_line
+from .middleware import RequestTimingMiddleware
+from .models import Calendar, CalendarDeletion, Event, Recurrence, Tombstone, month_bounds
+from .operations import AddIndexConcurrently
+from .partitioning import has_active_series, partition_name, periods
+from .push import LocalBroker
+from .recurrence import expand, iter_occurrences
+from .search import full_text_filter, search_events
+from .sync import changes_since, prune_tombstones
+from .throttle import acquire_write_slot, active_writes, client_ip, release_write_slot, shed_stats, take
+
+
+# База replica для ReplicaRoutingTests есть в calendar_project/test_settings.py
+HAS_REPLICA = 'replica' in settings.DATABASES
+
+
+def seed_events(calendar, count, description='', start=date(2025, 1, 1), step=1):
+    # count событий одним запросом, через step дней начиная со start
+    Event.objects.bulk_create(
+        Event(calendar=calendar, title=f'Событие {i}', description=description,
+              date=start + timedelta(days=i * step))
+        for i in range(count)
+    )
+
+
+class PeakMemoryMixin:
+    def peak_memory(self, run):
+        # Пик памяти Python за время run()
+        tracemalloc.start()
+        try:
+            run()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def assertPeakMemoryBounded(self, measure, small, large):
+        # measure(count) — пик памяти на count строках; с ростом объёма в
+        # несколько раз пик почти не меняется, если данные идут порциями
+        small_peak = measure(small)
+        self.assertLess(measure(large), small_peak * 1.5)
+
+
+class EventRangeQueryTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Тест')
+        for d in (date(2025, 1, 31), date(2025, 2, 1), date(2025, 2, 28), date(2025, 3, 1)):
+            Event.objects.create(calendar=self.calendar, title=str(d), date=d)
+
+    def test_month_bounds(self):
+        self.assertEqual(month_bounds(2025, 2), (date(2025, 2, 1), date(2025, 3, 1)))
+        self.assertEqual(month_bounds(2025, 12), (date(2025, 12, 1), date(2026, 1, 1)))
+
+    def test_in_month_is_half_open(self):
+        events = Event.objects.filter(calendar=self.calendar).in_month(2025, 2)
+        self.assertEqual(sorted(e.date for e in events), [date(2025, 2, 1), date(2025, 2, 28)])
+
+    def test_on_day(self):
+        events = Event.objects.filter(calendar=self.calendar).on_day(date(2025, 3, 1))
+        self.assertEqual([e.date for e in events], [date(2025, 3, 1)])
+
+    def test_month_query_has_no_extract(self):
+        qs = Event.objects.filter(calendar=self.calendar).in_month(2025, 2)
+        sql = str(qs.query).upper()
+        self.assertNotIn('EXTRACT', sql)
+        self.assertNotIn('DJANGO_DATE_EXTRACT', sql)
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN проверяется только на PostgreSQL')
+    def test_month_query_uses_calendar_date_index(self):
+        qs = Event.objects.filter(calendar=self.calendar).in_month(2025, 2)
+        with connection.cursor() as cursor:
+            # На маленькой таблице планировщик выберет seq scan, поэтому запрещаем его
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = qs.explain()
+        self.assertIn('event_calendar_date_idx', plan)
+
+
+class EventsRangeApiTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Диапазон')
+        self.url = f'/calendar/{self.calendar.id}/events/'
+        for d in (date(2025, 2, 1), date(2025, 2, 1), date(2025, 2, 10), date(2025, 3, 1)):
+            Event.objects.create(calendar=self.calendar, title=str(d), date=d)
+
+    def test_groups_by_date_in_single_query(self):
+        # Выборка событий и выборка правил повторения
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'start': '2025-02-01', 'end': '2025-03-01'})
+        data = response.json()
+        self.assertEqual(sorted(data['events']), ['2025-02-01', '2025-02-10'])
+        self.assertEqual(len(data['events']['2025-02-01']), 2)
+        self.assertIsNone(data['next'])
+
+    def test_rejects_invalid_and_too_wide_ranges(self):
+        for params in ({'start': 'x', 'end': '2025-03-01'},
+                       {'start': '2025-03-01', 'end': '2025-02-01'},
+                       {'start': '2025-01-01', 'end': '2025-12-01'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_cursor_pagination(self):
+        params = {'start': '2025-02-01', 'end': '2025-03-02'}
+        seen = []
+        with mock.patch.object(views, 'EVENTS_RANGE_PAGE_SIZE', 3):
+            while True:
+                data = self.client.get(self.url, params).json()
+                for events in data['events'].values():
+                    seen.extend(e['id'] for e in events)
+                if not data['next']:
+                    break
+                params['cursor'] = data['next']
+        self.assertEqual(sorted(seen), sorted(Event.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_unknown_calendar_is_404(self):
+        response = self.client.get('/calendar/00000000-0000-0000-0000-000000000000/events/',
+                                   {'start': '2025-02-01', 'end': '2025-03-01'})
+        self.assertEqual(response.status_code, 404)
+
+
+class MonthGridCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calendar = Calendar.objects.create(name='Кэш')
+        self.url = f'/calendar/{self.calendar.id}/2025/2/'
+
+    def test_second_hit_skips_event_query(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_mutations_bump_version(self):
+        self.client.get(self.url)
+        self.client.post(f'/calendar/{self.calendar.id}/add_event/',
+                         {'title': 'Новое', 'description': '', 'date': '2025-02-03'})
+        response = self.client.get(self.url)
+        self.assertContains(response, '<div class="event-indicator">', count=1)
+        event = Event.objects.get()
+
+        self.client.post(f'/calendar/{self.calendar.id}/edit_event/{event.id}/', {'title': 'Другое'})
+        self.client.post(f'/calendar/{self.calendar.id}/delete_event/{event.id}/')
+        self.calendar.refresh_from_db()
+        self.assertEqual(self.calendar.version, 3)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, '<div class="event-indicator">')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='ETag')
+        self.month_url = f'/calendar/{self.calendar.id}/2025/2/'
+        self.day_url = f'/calendar/{self.calendar.id}/get_events/'
+
+    def test_calendar_view_not_modified(self):
+        etag = self.client.get(self.month_url)['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.month_url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_static_build_changes_page_etags(self):
+        year_url = f'/calendar/{self.calendar.id}/year/2025/'
+        etags = {url: self.client.get(url)['ETag'] for url in (self.month_url, year_url)}
+        with mock.patch('calendar_app.views.build_id', return_value='0123abcd'):
+            for url, etag in etags.items():
+                self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 200, url)
+
+    def test_get_events_not_modified_until_mutation(self):
+        response = self.client.get(self.day_url, {'date': '2025-02-03'})
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.day_url, {'date': '2025-02-03'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(f'/calendar/{self.calendar.id}/add_event/',
+                         {'title': 'Новое', 'description': '', 'date': '2025-02-03'})
+        response = self.client.get(self.day_url, {'date': '2025-02-03'}, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['events']), 1)
+
+
+class CalendarSearchTests(TestCase):
+    def setUp(self):
+        for i in range(7):
+            Calendar.objects.create(name=f'Рабочий {i}')
+        Calendar.objects.create(name='Семейный')
+
+    def test_home_renders_first_page_only(self):
+        with mock.patch.object(views, 'HOME_PAGE_SIZE', 5):
+            response = self.client.get('/')
+        self.assertEqual(len(response.context['calendars']), 5)
+        self.assertTrue(response.context['next_cursor'])
+
+    def test_search_pages_through_matches(self):
+        names = []
+        params = {'q': 'абоч'}
+        with mock.patch.object(views, 'HOME_PAGE_SIZE', 3):
+            while True:
+                data = self.client.get('/search/', params).json()
+                names.extend(c['name'] for c in data['calendars'])
+                if not data['next']:
+                    break
+                params['cursor'] = data['next']
+        self.assertEqual(sorted(names), [f'Рабочий {i}' for i in range(7)])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/search/', {'cursor': 'bad'}).status_code, 400)
+
+
+class EnterCalendarTests(TestCase):
+    def setUp(self):
+        clear_calendar_names()
+        self.calendar = Calendar.objects.create(name='Вход')
+        self.url = '/calendar/Вход/enter/'
+
+    def test_repeated_entry_hits_name_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'uuid': str(self.calendar.id)})
+        self.assertRedirects(response, f'/calendar/{self.calendar.id}/', fetch_redirect_response=False)
+
+    def test_rename_and_delete_invalidate_cache(self):
+        self.client.get(self.url)
+        self.calendar.name = 'Другой'
+        self.calendar.save()
+        self.assertRedirects(self.client.get(self.url), '/', fetch_redirect_response=False)
+        self.assertEqual(self.client.get('/calendar/Другой/enter/').status_code, 200)
+        self.calendar.delete()
+        self.assertRedirects(self.client.get('/calendar/Другой/enter/'), '/', fetch_redirect_response=False)
+
+    def test_cache_keeps_names_that_only_python_folds_together(self):
+        # 'ß'.upper() == 'SS' в Python, но не в UPPER() базы: это разные календари
+        street = Calendar.objects.create(name='Straße')
+        shouting = Calendar.objects.create(name='STRASSE')
+        self.client.get('/calendar/Straße/enter/')
+        response = self.client.post('/calendar/STRASSE/enter/', {'uuid': str(shouting.id)})
+        self.assertRedirects(response, f'/calendar/{shouting.id}/', fetch_redirect_response=False)
+        response = self.client.post('/calendar/Straße/enter/', {'uuid': str(street.id)})
+        self.assertRedirects(response, f'/calendar/{street.id}/', fetch_redirect_response=False)
+
+    def test_duplicate_names_are_rejected(self):
+        response = self.client.post('/create/', {'name': 'Вход'})
+        self.assertContains(response, 'уже существует')
+        self.assertEqual(Calendar.objects.count(), 1)
+
+
+class IcalExportTests(PeakMemoryMixin, TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Экспорт')
+        self.url = f'/calendar/{self.calendar.id}/export.ics'
+
+    def seed(self, count):
+        seed_events(self.calendar, count, description='Описание, длинное; ' * 10)
+
+    def export_peak_memory(self, count):
+        # Календарь дополняется до count событий
+        self.seed(count - Event.objects.filter(calendar=self.calendar).count())
+        response = self.client.get(self.url)
+
+        def consume():
+            for _ in response.streaming_content:
+                pass
+        return self.peak_memory(consume)
+
+    def test_export_format_and_range(self):
+        self.seed(3)
+        body = b''.join(self.client.get(self.url, {'start': '2025-01-02', 'end': '2025-01-04'}).streaming_content)
+        text = body.decode('utf-8')
+        self.assertTrue(text.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(text.count('BEGIN:VEVENT'), 2)
+        self.assertIn('DTSTART;VALUE=DATE:20250102', text)
+        self.assertIn('Описание\\, длинное\;', text.replace('\r\n ', ''))
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in text.split('\r\n')))
+
+    def test_fold_line_keeps_utf8_characters(self):
+        folded = fold_line('SUMMARY:' + 'Я' * 100)
+        self.assertEqual(folded.replace('\r\n ', '').rstrip('\r\n'), 'SUMMARY:' + 'Я' * 100)
+
+    def test_peak_memory_is_bounded(self):
+        # Оба объёма больше chunk_size, поэтому пик определяется размером порции
+        self.assertPeakMemoryBounded(self.export_peak_memory, 5000, 20000)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Импорт')
+        self.url = f'/calendar/{self.calendar.id}/import/'
+
+    def test_csv_import_reports_bad_rows(self):
+        data = 'date,title,description\n2025-02-01,Первое,\n2025-02-30,Плохая дата,\n2025-02-02,,\n2025-02-03,Второе,"a, b"\n'
+        upload = SimpleUploadedFile('events.csv', data.encode('utf-8'))
+        with mock.patch('calendar_app.importer.IMPORT_BATCH_SIZE', 1):
+            report = self.client.post(self.url, {'file': upload}).json()
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'], [{'row': 2, 'message': 'Invalid date'},
+                                            {'row': 3, 'message': 'Invalid title'}])
+        self.assertEqual(Event.objects.get(title='Второе').description, 'a, b')
+        self.calendar.refresh_from_db()
+        self.assertEqual(self.calendar.version, 1)
+
+    def test_command_rejects_unknown_calendar(self):
+        for calendar_id in ('не-uuid', str(uuid.uuid4())):
+            with self.assertRaisesMessage(CommandError, 'Календарь не найден.'):
+                call_command('import_events', calendar_id, 'events.csv')
+
+    def test_ics_round_trip(self):
+        Event.objects.create(calendar=self.calendar, title='Встреча; важная', description='Строка 1\nСтрока 2, ' * 5,
+                             date=date(2025, 3, 1))
+        body = b''.join(self.client.get(f'/calendar/{self.calendar.id}/export.ics').streaming_content)
+        other = Calendar.objects.create(name='Копия')
+        upload = SimpleUploadedFile('export.ics', body)
+        report = self.client.post(f'/calendar/{other.id}/import/', {'file': upload}).json()
+        self.assertEqual(report['created'], 1)
+        original = Event.objects.get(calendar=self.calendar)
+        copy = Event.objects.get(calendar=other)
+        self.assertEqual((copy.title, copy.description, copy.date),
+                         (original.title, original.description, original.date))
+
+    def test_ics_round_trip_keeps_recurrence(self):
+        event = Event.objects.create(calendar=self.calendar, title='Планёрка', description='', date=date(2025, 3, 3))
+        Recurrence.objects.create(event=event, freq=Recurrence.WEEKLY, interval=2, until=date(2025, 6, 30),
+                                  exdates=['2025-03-31', '2025-04-14'])
+        body = b''.join(self.client.get(f'/calendar/{self.calendar.id}/export.ics').streaming_content)
+        other = Calendar.objects.create(name='Копия')
+        report = self.client.post(f'/calendar/{other.id}/import/', {'file': SimpleUploadedFile('a.ics', body)}).json()
+        self.assertEqual(report['created'], 1)
+        rule = Recurrence.objects.get(event__calendar=other)
+        self.assertEqual((rule.event.date, rule.freq, rule.interval, rule.until, rule.count, rule.exdates),
+                         (date(2025, 3, 3), 'WEEKLY', 2, date(2025, 6, 30), None, ['2025-03-31', '2025-04-14']))
+
+    def test_ics_rules_the_model_cannot_store_are_rejected(self):
+        body = (
+            'BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nDTSTART;VALUE=DATE:20250303\r\nSUMMARY:По будням\r\n'
+            'RRULE:FREQ=WEEKLY;BYDAY=MO,TU\r\nEND:VEVENT\r\n'
+            'BEGIN:VEVENT\r\nDTSTART:20250304T090000Z\r\nSUMMARY:Каждый день\r\n'
+            'RRULE:FREQ=DAILY;COUNT=3;WKST=MO\r\nEXDATE:20250305T090000Z\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n'
+        )
+        report = self.client.post(self.url, {'file': SimpleUploadedFile('a.ics', body.encode())}).json()
+        self.assertEqual((report['created'], report['errors']), (1, [{'row': 1, 'message': 'Invalid recurrence'}]))
+        rule = Recurrence.objects.get(event__calendar=self.calendar)
+        self.assertEqual((rule.freq, rule.count, rule.exdates), ('DAILY', 3, ['2025-03-05']))
+
+
+class RecurrenceTests(TestCase):
+    def expand(self, dtstart, freq, start, end, **kwargs):
+        return list(iter_occurrences(dtstart, freq, start=start, end=end, **kwargs))
+
+    def test_monthly_skips_missing_month_end(self):
+        days = self.expand(date(2025, 1, 31), Recurrence.MONTHLY, date(2025, 1, 1), date(2025, 8, 1))
+        self.assertEqual(days, [date(2025, 1, 31), date(2025, 3, 31), date(2025, 5, 31), date(2025, 7, 31)])
+
+    def test_monthly_count_ignores_skipped_months(self):
+        days = self.expand(date(2025, 1, 31), Recurrence.MONTHLY, date(2025, 5, 1), date(2026, 1, 1), count=4)
+        self.assertEqual(days, [date(2025, 5, 31), date(2025, 7, 31)])
+
+    def test_yearly_leap_day(self):
+        days = self.expand(date(2024, 2, 29), Recurrence.YEARLY, date(2024, 1, 1), date(2033, 1, 1))
+        self.assertEqual(days, [date(2024, 2, 29), date(2028, 2, 29), date(2032, 2, 29)])
+
+    def test_weekly_across_dst_transitions(self):
+        # Переходы на летнее/зимнее время в Европе: 30.03.2025 и 26.10.2025.
+        # Вхождения считаются в датах, поэтому день недели и шаг не сдвигаются.
+        days = self.expand(date(2025, 3, 24), Recurrence.WEEKLY, date(2025, 3, 1), date(2025, 11, 10),
+                           interval=2, exdates=('2025-04-07',))
+        self.assertEqual(days[:2], [date(2025, 3, 24), date(2025, 4, 21)])
+        self.assertTrue(all(d.weekday() == 0 for d in days))
+        self.assertTrue(all((b - a).days % 14 == 0 for a, b in zip(days, days[1:])))
+        self.assertEqual(days[-2:], [date(2025, 10, 20), date(2025, 11, 3)])
+
+    def test_until_count_and_window_skip(self):
+        self.assertEqual(
+            self.expand(date(2025, 1, 1), Recurrence.DAILY, date(2025, 1, 10), date(2025, 2, 1), count=12),
+            [date(2025, 1, 10), date(2025, 1, 11), date(2025, 1, 12)],
+        )
+        self.assertEqual(
+            self.expand(date(2025, 1, 1), Recurrence.WEEKLY, date(2025, 1, 1), date(2026, 1, 1), until=date(2025, 1, 15)),
+            [date(2025, 1, 1), date(2025, 1, 8), date(2025, 1, 15)],
+        )
+
+    def test_expansion_is_memoized(self):
+        expand.cache_clear()
+        args = (date(2025, 1, 1), Recurrence.DAILY, 1, None, None, (), date(2025, 2, 1), date(2025, 3, 1))
+        expand(*args)
+        expand(*args)
+        self.assertEqual(expand.cache_info().hits, 1)
+
+    def test_views_show_occurrences(self):
+        calendar = Calendar.objects.create(name='Повторы')
+        self.client.post(f'/calendar/{calendar.id}/add_event/', {
+            'title': 'Планёрка', 'description': '', 'date': '2025-01-06', 'freq': 'WEEKLY', 'until': '2025-03-01',
+        })
+        self.assertEqual(Event.objects.count(), 1)
+        day = self.client.get(f'/calendar/{calendar.id}/get_events/', {'date': '2025-02-03'}).json()
+        self.assertEqual([e['title'] for e in day['events']], ['Планёрка'])
+        grid = self.client.get(f'/calendar/{calendar.id}/2025/2/')
+        self.assertContains(grid, '<div class="event-indicator">', count=4)
+        data = self.client.get(f'/calendar/{calendar.id}/events/', {'start': '2025-01-01', 'end': '2025-02-01'}).json()
+        self.assertEqual(sorted(data['events']), ['2025-01-06', '2025-01-13', '2025-01-20', '2025-01-27'])
+        export = b''.join(self.client.get(f'/calendar/{calendar.id}/export.ics').streaming_content).decode()
+        self.assertIn('RRULE:FREQ=WEEKLY;UNTIL=20250301', export)
+
+    def test_invalid_recurrence_is_rejected(self):
+        calendar = Calendar.objects.create(name='Ошибка')
+        response = self.client.post(f'/calendar/{calendar.id}/add_event/', {
+            'title': 'x', 'description': '', 'date': '2025-01-06', 'freq': 'HOURLY',
+        })
+        self.assertEqual(response.json()['message'], 'Invalid recurrence')
+        self.assertFalse(Event.objects.exists())
+
+
+class AsyncEventViewsTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Async')
+        self.factory = AsyncRequestFactory()
+
+    async def test_add_get_edit_delete(self):
+        calendar_id = self.calendar.id
+        request = self.factory.post('/', {'title': 'Асинхронно', 'description': '', 'date': '2025-02-03'})
+        response = await async_views.add_event(request, calendar_id)
+        self.assertEqual(json.loads(response.content), {'status': 'success'})
+        event = await Event.objects.aget(calendar_id=calendar_id)
+
+        request = self.factory.post('/', {'title': 'Изменено'})
+        await async_views.edit_event(request, calendar_id, event.id)
+        response = await async_views.get_events(self.factory.get('/', {'date': '2025-02-03'}), calendar_id)
+        self.assertEqual([e['title'] for e in json.loads(response.content)['events']], ['Изменено'])
+
+        etag = response['ETag']
+        request = self.factory.get('/', {'date': '2025-02-03'}, headers={'if-none-match': etag})
+        self.assertEqual((await async_views.get_events(request, calendar_id)).status_code, 304)
+
+        await async_views.delete_event(self.factory.post('/'), calendar_id, event.id)
+        self.assertFalse(await Event.objects.filter(calendar_id=calendar_id).aexists())
+        calendar = await Calendar.objects.aget(id=calendar_id)
+        self.assertEqual(calendar.version, 3)
+
+    async def test_add_recurring_event(self):
+        request = self.factory.post('/', {'title': 'Повтор', 'description': '', 'date': '2025-02-03', 'freq': 'DAILY'})
+        await async_views.add_event(request, self.calendar.id)
+        response = await async_views.get_events(self.factory.get('/', {'date': '2025-02-05'}), self.calendar.id)
+        self.assertEqual(len(json.loads(response.content)['events']), 1)
+
+    async def test_unknown_calendar(self):
+        with self.assertRaises(Http404):
+            await async_views.get_events(self.factory.get('/', {'date': '2025-02-05'}), uuid.uuid4())
+
+
+class DbStatsTests(TestCase):
+    def test_stats_require_staff(self):
+        self.assertEqual(self.client.get('/metrics/db/').status_code, 302)
+        user = User.objects.create_user('admin', password='x', is_staff=True)
+        self.client.force_login(user)
+        stats = self.client.get('/metrics/db/').json()
+        self.assertEqual(stats['mode'], 'none')
+        self.assertIn('conn_max_age', stats)
+
+
+class BatchEventsTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Пакет')
+        self.url = f'/calendar/{self.calendar.id}/batch/'
+        self.first = Event.objects.create(calendar=self.calendar, title='Первое', date=date(2025, 2, 3))
+        self.second = Event.objects.create(calendar=self.calendar, title='Второе', date=date(2025, 2, 4))
+
+    def post(self, operations):
+        return self.client.post(self.url, json.dumps({'operations': operations}), content_type='application/json')
+
+    def test_applies_operations_in_constant_queries(self):
+        operations = [{'op': 'create', 'title': f'Новое {i}', 'date': '2025-02-10'} for i in range(20)]
+        operations += [
+            {'op': 'update', 'id': self.first.id, 'date': '2025-02-05', 'title': 'Перенесено'},
+            {'op': 'delete', 'id': self.second.id},
+        ]
+        response = self.post(operations)
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertEqual(Event.objects.filter(date=date(2025, 2, 10)).count(), 20)
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.title, self.first.date), ('Перенесено', date(2025, 2, 5)))
+        self.assertFalse(Event.objects.filter(id=self.second.id).exists())
+        self.calendar.refresh_from_db()
+        self.assertEqual(self.calendar.version, 1)
+
+        with CaptureQueriesContext(connection) as many:
+            self.post(operations[:20] * 5)
+        with CaptureQueriesContext(connection) as few:
+            self.post(operations[:2])
+        self.assertEqual(len(many), len(few))
+
+    def test_duplicate_deletes_record_one_deletion(self):
+        response = self.post([{'op': 'delete', 'id': self.second.id}, {'op': 'delete', 'id': self.second.id}])
+        self.assertEqual([r['status'] for r in response.json()['results']], ['success', 'success'])
+        self.assertEqual(Tombstone.objects.filter(event_id=self.second.id).count(), 1)
+
+    def test_invalid_operation_rolls_back_everything(self):
+        other = Calendar.objects.create(name='Чужой')
+        foreign = Event.objects.create(calendar=other, title='Чужое', date=date(2025, 2, 3))
+        response = self.post([
+            {'op': 'create', 'title': 'Не создастся', 'date': '2025-02-10'},
+            {'op': 'delete', 'id': foreign.id},
+        ])
+        self.assertEqual(response.status_code, 400)
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['skipped', 'error'])
+        self.assertFalse(Event.objects.filter(title='Не создастся').exists())
+        self.assertTrue(Event.objects.filter(id=foreign.id).exists())
+
+        response = self.post([{'op': 'create', 'title': 'x', 'date': '2025-02-30'}])
+        self.assertEqual(response.json()['results'][0]['message'], 'Invalid date')
+
+
+class QueryBudgetTests(TestCase):
+    def test_scenarios_within_query_budgets(self):
+        seed(calendars=20, events=500, batch_size=200)
+        versions = dict(Calendar.objects.values_list('id', 'version'))
+        with override_settings(WRITE_THROTTLE=True, WRITE_THROTTLE_CLIENT_LIMIT=1):
+            report = run(repeat=1)
+        over = {
+            name: (result['queries'], result['query_budget'])
+            for name, result in report['scenarios'].items() if not result['within_budget']
+        }
+        self.assertEqual(over, {})
+        # Сценарии работают на отдельном календаре размером с самый большой
+        largest = largest_calendar_size()
+        self.assertEqual(report['scale']['target_calendar_events'], largest)
+        self.assertEqual(report['scale']['events'], 500 + largest)
+        self.assertEqual(dict(Calendar.objects.exclude(name=BENCH_CALENDAR).values_list('id', 'version')), versions)
+        self.assertFalse(Event.objects.filter(title='Бенчмарк').exists())
+
+    def test_failed_responses_are_not_timed(self):
+        calendar = Calendar.objects.create(name='Статусы')
+
+        def broken(calendar):
+            return [('missing', lambda: None, lambda c: c.get(f'/calendar/{uuid.uuid4()}/'))]
+
+        with self.assertRaisesMessage(ScenarioFailed, 'missing: HTTP 404'):
+            run(calendar, repeat=1, scenario_set=broken)
+
+
+@override_settings(REQUEST_TIMING=True, REQUEST_TIMING_SAMPLE_RATE=1.0, REQUEST_TIMING_SLOW_MS=60_000)
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Замер')
+        Event.objects.create(calendar=self.calendar, title='Событие', date=date(2025, 2, 3))
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        with self.assertLogs('calendar_app.timing', 'INFO') as logs:
+            response = self.client.get(f'/calendar/{self.calendar.id}/2025/2/')
+        header = response['Server-Timing']
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(header, r'view;dur=[\d.]+')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], f'/calendar/{self.calendar.id}/2025/2/')
+        self.assertGreater(record['template_ms'], 0)
+        self.assertFalse(record['slow'])
+
+    async def test_async_requests_are_timed_without_thread_hop(self):
+        calendar_id = self.calendar.id
+
+        async def view(request):
+            await Event.objects.filter(calendar_id=calendar_id).acount()
+            return HttpResponse(await sync_to_async(render_to_string)('create_calendar.html'))
+
+        middleware = RequestTimingMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        with self.assertLogs('calendar_app.timing', 'INFO') as logs:
+            response = await middleware(AsyncRequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertGreater(json.loads(logs.records[0].getMessage())['template_ms'], 0)
+
+    def test_templates_are_not_patched(self):
+        self.assertFalse(hasattr(DjangoTemplate.render, 'timed'))
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get('/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0, REQUEST_TIMING_SLOW_MS=0)
+    def test_slow_request_logged_without_sampling(self):
+        with self.assertLogs('calendar_app.timing', 'WARNING') as logs:
+            self.client.get('/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record['slow'])
+        self.assertFalse(record['sampled'])
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get('/'))
+
+
+class YearCountsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calendar = Calendar.objects.create(name='Год')
+        for d in (date(2025, 1, 5), date(2025, 1, 5), date(2025, 7, 1), date(2024, 12, 31), date(2026, 1, 1)):
+            Event.objects.create(calendar=self.calendar, title='x', description='длинное описание', date=d)
+        weekly = Event.objects.create(calendar=self.calendar, title='Еженедельно', date=date(2025, 12, 17))
+        Recurrence.objects.create(event=weekly, freq=Recurrence.WEEKLY, exdates=['2025-12-24'])
+
+    def url(self, year):
+        return f'/calendar/{self.calendar.id}/year/{year}/counts/'
+
+    def test_counts_by_day(self):
+        counts = self.client.get(self.url(2025)).json()['counts']
+        self.assertEqual(counts, {'2025-01-05': 2, '2025-07-01': 1, '2025-12-17': 1, '2025-12-31': 1})
+
+    def test_single_aggregate_without_description(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url(2025))
+        aggregates = [q['sql'] for q in queries if 'GROUP BY' in q['sql']]
+        self.assertEqual(len(aggregates), 1)
+        self.assertTrue(all('description' not in q['sql'] for q in queries))
+
+    def test_cached_per_version(self):
+        self.client.get(self.url(2025))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url(2025))
+        self.assertEqual(len(queries), 1)  # только сам календарь
+
+        self.client.post(f'/calendar/{self.calendar.id}/add_event/', {'title': 'y', 'description': '', 'date': '2025-07-01'})
+        self.assertEqual(self.client.get(self.url(2025)).json()['counts']['2025-07-01'], 2)
+
+    def test_year_view(self):
+        response = self.client.get(f'/calendar/{self.calendar.id}/year/2025/')
+        self.assertContains(response, 'title="2025-01-05: 2"')
+        self.assertContains(response, 'Событий за год: 5')
+        self.assertEqual(self.client.get(f'/calendar/{self.calendar.id}/year/0/').status_code, 404)
+
+
+class MonthDayCapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calendar = Calendar.objects.create(name='Загруженный')
+        Event.objects.bulk_create([
+            Event(calendar=self.calendar, title=f'Событие {i}', description='x' * 1000, date=date(2025, 3, 10))
+            for i in range(10)
+        ])
+        daily = Event.objects.create(calendar=self.calendar, title='Каждый день', date=date(2025, 3, 9))
+        Recurrence.objects.create(event=daily, freq=Recurrence.DAILY, until=date(2025, 3, 10), exdates=['2025-03-09'])
+
+    def test_cell_shows_first_events_and_overflow(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/calendar/{self.calendar.id}/2025/3/')
+        self.assertContains(response, '<div class="event-indicator">', count=3)
+        self.assertContains(response, '+8 ещё')
+        self.assertContains(response, 'Событие 2')
+        self.assertNotContains(response, 'Событие 3')
+        self.assertNotContains(response, 'Каждый день')  # 9-е исключено, 10-го не влезло
+        self.assertTrue(all('description' not in q['sql'] for q in queries))
+
+    def test_day_limit(self):
+        days = views.month_day_events(self.calendar, date(2025, 3, 1), date(2025, 4, 1), limit=20)
+        self.assertEqual(days['2025-03-10']['more'], 0)
+        self.assertEqual(len(days['2025-03-10']['events']), 11)
+        self.assertNotIn('2025-03-09', days)
+
+
+class ChangesSyncTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Синхронизация')
+        self.url = f'/calendar/{self.calendar.id}/changes/'
+
+    def changes(self, since=None):
+        return self.client.get(self.url, {'since': since} if since else {}).json()
+
+    def test_inserts_updates_and_deletes_after_cursor(self):
+        first = Event.objects.create(calendar=self.calendar, title='Первое', date=date(2025, 1, 1))
+        second = Event.objects.create(calendar=self.calendar, title='Второе', date=date(2025, 1, 2))
+        bump_calendar_version(self.calendar.id)
+        initial = self.changes()
+        self.assertEqual([c['id'] for c in initial['changes']], [first.id, second.id])
+        self.assertFalse(initial['has_more'])
+
+        self.assertEqual(self.changes(initial['next'])['changes'], [])
+        self.assertEqual(self.changes(initial['next'])['next'], initial['next'])
+
+        self.client.post(f'/calendar/{self.calendar.id}/edit_event/{first.id}/', {'title': 'Изменено'})
+        self.client.post(f'/calendar/{self.calendar.id}/delete_event/{second.id}/')
+        delta = self.changes(initial['next'])
+        self.assertEqual(
+            [(c['type'], c['id']) for c in delta['changes']],
+            [('upsert', first.id), ('delete', second.id)],
+        )
+        self.assertEqual(delta['changes'][0]['title'], 'Изменено')
+        self.assertEqual(self.changes(delta['next'])['changes'], [])
+
+    def test_pagination(self):
+        Event.objects.bulk_create([
+            Event(calendar=self.calendar, title=str(i), date=date(2025, 1, 1)) for i in range(5)
+        ])
+        bump_calendar_version(self.calendar.id)
+        seen, cursor, has_more = [], None, True
+        while has_more:
+            changes, cursor, has_more = changes_since(self.calendar.id, cursor, limit=2)
+            seen.extend(c['title'] for c in changes)
+        self.assertEqual(sorted(seen), ['0', '1', '2', '3', '4'])
+
+    def test_batch_changes_are_tracked(self):
+        event = Event.objects.create(calendar=self.calendar, title='a', date=date(2025, 1, 1))
+        cursor = self.changes()['next']
+        self.client.post(f'/calendar/{self.calendar.id}/batch/', json.dumps({'operations': [
+            {'op': 'update', 'id': event.id, 'title': 'b'},
+        ]}), content_type='application/json')
+        self.assertEqual([c['title'] for c in self.changes(cursor)['changes']], ['b'])
+        self.client.post(f'/calendar/{self.calendar.id}/batch/', json.dumps({'operations': [
+            {'op': 'delete', 'id': event.id},
+        ]}), content_type='application/json')
+        self.assertEqual(Tombstone.objects.filter(event_id=event.id).count(), 1)
+
+    def test_unmarked_changes_are_hidden(self):
+        # Изменение видно в ленте только после bump_calendar_version
+        Event.objects.create(calendar=self.calendar, title='a', date=date(2025, 1, 1))
+        self.assertEqual(self.changes()['changes'], [])
+
+    def test_late_commit_is_not_skipped(self):
+        # Долгая транзакция (импорт) начала писать раньше, а зафиксировалась
+        # после того, как клиент получил курсор
+        self.client.post(f'/calendar/{self.calendar.id}/add_event/', {'title': 'Быстрое', 'description': '', 'date': '2025-01-01'})
+        cursor = self.changes()['next']
+        late = Event.objects.create(calendar=self.calendar, title='Импорт', date=date(2025, 1, 2))
+        Event.objects.filter(id=late.id).update(updated_at=timezone.now() - timedelta(hours=1))
+        bump_calendar_version(self.calendar.id)
+        self.assertEqual([c['title'] for c in self.changes(cursor)['changes']], ['Импорт'])
+
+    def sync(self, cursor=None, limit=2):
+        # Все страницы ленты: (изменения, курсор после последней страницы)
+        seen, has_more = [], True
+        while has_more:
+            changes, cursor, has_more = changes_since(self.calendar.id, cursor, limit=limit)
+            seen.extend(changes)
+        return seen, cursor
+
+    def migrated_events(self, count):
+        # Миграция 0015 ставит существующим событиям change_seq = 0
+        return Event.objects.bulk_create([
+            Event(calendar=self.calendar, title=str(i), date=date(2025, 1, 1), change_seq=0) for i in range(count)
+        ])
+
+    def test_first_sync_pages_through_migrated_rows(self):
+        self.migrated_events(5)
+        changes, cursor = self.sync()
+        self.assertEqual(sorted(c['title'] for c in changes), ['0', '1', '2', '3', '4'])
+        self.assertEqual(self.sync(cursor)[0], [])
+
+    def test_pruned_tombstones_expire_old_cursors(self):
+        first, second, *rest = self.migrated_events(6)
+        _, stale = self.sync()
+        self.client.post(f'/calendar/{self.calendar.id}/delete_event/{first.id}/')
+        self.client.post(f'/calendar/{self.calendar.id}/delete_event/{second.id}/')
+        _, current = self.sync(stale)
+        self.assertEqual(prune_tombstones(timezone.now() - timedelta(days=1)), 0)
+        # Запись с наибольшим номером остаётся, её номер становится границей
+        self.assertEqual(prune_tombstones(timezone.now() + timedelta(seconds=1)), 1)
+        self.assertEqual(Calendar.all_objects.get(id=self.calendar.id).sync_floor, 2)
+
+        response = self.client.get(self.url, {'since': stale})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['resync'])
+        # Курсор на границе ничего не пропустил
+        self.assertEqual(self.sync(current)[0], [])
+
+        # Полная синхронизация проходит страницы со строками старше границы
+        changes, cursor = self.sync()
+        self.assertEqual(
+            sorted(c['id'] for c in changes if c['type'] == 'upsert'), sorted(e.id for e in rest),
+        )
+        self.assertEqual(self.sync(cursor)[0], [])
+        self.client.post(f'/calendar/{self.calendar.id}/delete_event/{rest[0].id}/')
+        self.assertEqual([(c['type'], c['id']) for c in self.sync(cursor)[0]], [('delete', rest[0].id)])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'abc'}).status_code, 400)
+        # Курсор прежнего формата (время в микросекундах) — полная синхронизация
+        self.assertEqual(self.client.get(self.url, {'since': '1760000000000000:0:1'}).status_code, 410)
+
+    def test_deleted_calendar(self):
+        Event.objects.create(calendar=self.calendar, title='a', date=date(2025, 1, 1))
+        request = mock.Mock(user=User.objects.create_user('u'))
+        with mock.patch.object(views.messages, 'success'):
+            views.delete_calendar.__wrapped__(request, self.calendar.id)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(Tombstone.objects.get().event_id, None)
+        self.assertEqual(self.client.get(f'/calendar/{uuid.uuid4()}/changes/').status_code, 404)
+
+
+class PushTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Живой')
+
+    def test_local_broker_fanout_and_overflow(self):
+        async def scenario():
+            broker = LocalBroker(queue_size=2)
+            subscribers = [broker.subscribe('a') for _ in range(2000)]
+            other = broker.subscribe('b')
+            broker.publish('a', {'n': 1})
+            received = await asyncio.gather(*(s.get(1) for s in subscribers))
+            self.assertEqual(received, [{'n': 1}] * 2000)
+            with self.assertRaises(asyncio.TimeoutError):
+                await other.get(0.01)
+
+            for n in range(3):
+                broker.publish('b', {'n': n})
+            await asyncio.sleep(0)
+            self.assertEqual(await other.get(1), push.RESET)
+
+            for subscription in subscribers + [other]:
+                subscription.close()
+            self.assertEqual(broker.subscriber_count(), 0)
+
+        asyncio.run(scenario())
+
+    def test_views_publish_after_commit(self):
+        event = Event.objects.create(calendar=self.calendar, title='Было', date=date(2025, 1, 1))
+        with mock.patch('calendar_app.push.get_broker') as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f'/calendar/{self.calendar.id}/edit_event/{event.id}/', {'title': 'Стало'})
+                self.client.post(f'/calendar/{self.calendar.id}/delete_event/{event.id}/')
+        channel = str(self.calendar.id)
+        get_broker().publish.assert_has_calls([
+            mock.call(channel, {'type': 'update', 'id': event.id, 'date': '2025-01-01',
+                                'title': 'Стало', 'recurring': False}),
+            mock.call(channel, {'type': 'delete', 'id': event.id, 'date': '2025-01-01',
+                                'title': 'Стало', 'recurring': False}),
+        ])
+
+    async def test_event_stream(self):
+        request = AsyncRequestFactory().get(f'/calendar/{self.calendar.id}/stream/')
+        response = await async_views.event_stream(request, self.calendar.id)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+
+        push.publish_now(self.calendar.id, {'type': 'delete', 'id': 7})
+        chunk = await anext(chunks)
+        self.assertEqual(json.loads(chunk.decode().removeprefix('data: ')), {'type': 'delete', 'id': 7})
+
+        # Отключение клиента под ASGI отменяет задачу, читающую поток
+        waiting = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(push.get_broker().subscriber_count(str(self.calendar.id)), 0)
+
+
+class EventSearchTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Поиск')
+        self.other = Calendar.objects.create(name='Чужой')
+        Event.objects.create(calendar=self.calendar, title='Кухня: ремонт', description='', date=date(2025, 1, 1))
+        Event.objects.create(calendar=self.calendar, title='Звонок', description='обсудить ремонт', date=date(2025, 2, 1))
+        Event.objects.create(calendar=self.calendar, title='Обед', description='', date=date(2025, 3, 1))
+        Event.objects.create(calendar=self.other, title='ремонт', description='', date=date(2025, 1, 1))
+        self.url = f'/calendar/{self.calendar.id}/search/'
+
+    def test_title_and_description(self):
+        data = self.client.get(self.url, {'q': 'ремонт'}).json()
+        self.assertEqual(sorted(r['title'] for r in data['results']), ['Звонок', 'Кухня: ремонт'])
+        self.assertIsNone(data['next'])
+        if connection.vendor == 'postgresql':
+            # Совпадение в заголовке ранжируется выше
+            self.assertEqual(data['results'][0]['title'], 'Кухня: ремонт')
+
+    def test_pagination(self):
+        results, has_next = search_events(self.calendar.id, 'ремонт', page=1, page_size=1)
+        self.assertEqual(len(results), 1)
+        self.assertTrue(has_next)
+        results, has_next = search_events(self.calendar.id, 'ремонт', page=2, page_size=1)
+        self.assertFalse(has_next)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'x', 'page': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'x', 'page': 1000}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).json()['results'], [])
+        self.assertEqual(self.client.get(f'/calendar/{uuid.uuid4()}/search/', {'q': 'x'}).status_code, 404)
+
+    @skipUnless(connection.vendor == 'postgresql', 'tsvector есть только на PostgreSQL')
+    def test_search_uses_gin_index(self):
+        events = full_text_filter(Event.objects.filter(calendar=self.calendar), 'ремонт')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('event_search_vector_idx', events.explain())
+
+
+class PartitioningTests(TestCase):
+    def test_periods(self):
+        self.assertEqual(
+            list(periods('month', date(2024, 11, 15), date(2025, 2, 1))),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)],
+        )
+        self.assertEqual(list(periods('year', date(2024, 6, 1), date(2025, 1, 1))), [date(2024, 1, 1), date(2025, 1, 1)])
+        self.assertEqual(partition_name('month', date(2025, 3, 1)), 'calendar_app_event_m2025_03')
+        self.assertEqual(partition_name('year', date(2025, 1, 1)), 'calendar_app_event_y2025')
+
+    def test_partition_with_open_ended_series_is_not_archived(self):
+        calendar = Calendar.objects.create(name='Архив')
+        ended = Event.objects.create(calendar=calendar, title='Закончилась', date=date(2015, 3, 1))
+        Recurrence.objects.create(event=ended, freq=Recurrence.WEEKLY, until=date(2016, 1, 1))
+        before = date(2020, 1, 1)
+        self.assertFalse(has_active_series(date(2015, 1, 1), date(2016, 1, 1), before))
+
+        weekly = Event.objects.create(calendar=calendar, title='Планёрка', date=date(2015, 6, 1))
+        Recurrence.objects.create(event=weekly, freq=Recurrence.WEEKLY)
+        self.assertTrue(has_active_series(date(2015, 1, 1), date(2016, 1, 1), before))
+        self.assertFalse(has_active_series(date(2016, 1, 1), date(2017, 1, 1), before))
+
+        Recurrence.objects.filter(event=weekly).update(until=date(2021, 1, 1))
+        self.assertTrue(has_active_series(date(2015, 1, 1), date(2016, 1, 1), before))
+
+    @skipUnless(connection.vendor != 'postgresql', 'проверка отказа на других базах')
+    def test_commands_require_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command('partition_events')
+        with self.assertRaises(CommandError):
+            call_command('archive_events')
+
+
+class ConcurrentIndexTests(TestCase):
+    def test_index_migration_runs_outside_transaction(self):
+        migration = import_module('calendar_app.migrations.0014_event_date_idx').Migration
+        self.assertFalse(migration.atomic)
+        self.assertIsInstance(migration.operations[0], AddIndexConcurrently)
+
+    @skipUnless(connection.vendor == 'postgresql', 'только PostgreSQL')
+    def test_existing_index_is_kept(self):
+        migration = import_module('calendar_app.migrations.0014_event_date_idx').Migration
+        state = MigrationLoader(connection).project_state(('calendar_app', '0014_event_date_idx'))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('event_date_idx')::oid")
+            before = cursor.fetchone()[0]
+            with connection.schema_editor(atomic=False) as editor:
+                migration.operations[0].database_forwards('calendar_app', editor, state, state)
+            cursor.execute("SELECT to_regclass('event_date_idx')::oid")
+            self.assertEqual(cursor.fetchone()[0], before)
+
+
+class CalendarDeletionTests(PeakMemoryMixin, TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Удаляемый')
+        self.other = Calendar.objects.create(name='Остающийся')
+        Event.objects.create(calendar=self.other, title='Чужое', date=date(2025, 1, 1))
+
+    def seed(self, count):
+        seed_events(self.calendar, count, description='Описание ' * 50)
+
+    def test_calendar_is_hidden_immediately(self):
+        self.seed(3)
+        request_calendar_deletion(self.calendar)
+        self.assertEqual(self.client.get(f'/calendar/{self.calendar.id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/calendar/{self.calendar.id}/changes/').status_code, 410)
+        self.assertNotContains(self.client.get('/'), 'Удаляемый')
+        self.assertEqual(self.client.get(f'/calendar/{self.calendar.id}/deletion/').json(),
+                         {'status': 'pending', 'total': None, 'deleted': 0})
+        # Имя сразу свободно
+        Calendar.objects.create(name='удаляемый')
+        self.assertEqual(Event.objects.filter(calendar_id=self.calendar.id).count(), 3)
+
+    def test_events_are_unreachable_after_request(self):
+        self.seed(2)
+        event = Event.objects.filter(calendar=self.calendar).first()
+        Recurrence.objects.create(event=event, freq=Recurrence.DAILY)
+        base = f'/calendar/{self.calendar.id}'
+        self.assertEqual(len(self.client.get(f'{base}/events/', {'start': '2025-01-01', 'end': '2025-01-10'}).json()['events']), 9)
+        request_calendar_deletion(self.calendar)
+        self.assertEqual(self.client.get(f'{base}/events/', {'start': '2025-01-01', 'end': '2025-01-10'}).status_code, 404)
+        self.assertEqual(self.client.post(f'{base}/edit_event/{event.id}/', {'title': 'x'}).status_code, 404)
+        self.assertEqual(self.client.post(f'{base}/delete_event/{event.id}/').status_code, 404)
+        self.assertEqual(Event.objects.get(id=event.id).title, event.title)
+
+    async def test_async_edit_and_delete_after_request(self):
+        await sync_to_async(self.seed)(1)
+        event = await Event.objects.aget(calendar=self.calendar)
+        await sync_to_async(request_calendar_deletion)(self.calendar)
+        factory = AsyncRequestFactory()
+        with self.assertRaises(Http404):
+            await async_views.edit_event(factory.post('/', {'title': 'x'}), self.calendar.id, event.id)
+        with self.assertRaises(Http404):
+            await async_views.delete_event(factory.post('/'), self.calendar.id, event.id)
+        self.assertTrue(await Event.objects.filter(id=event.id).aexists())
+
+    def test_purge_in_chunks(self):
+        self.seed(30)
+        event = Event.objects.filter(calendar=self.calendar).first()
+        Recurrence.objects.create(event=event, freq=Recurrence.DAILY)
+        request_calendar_deletion(self.calendar)
+        progress = []
+        self.assertEqual(purge_pending(chunk_size=7, progress=lambda d: progress.append(d.deleted_events)), 1)
+        self.assertEqual(progress, [7, 14, 21, 28, 30])
+        self.assertFalse(Calendar.all_objects.filter(id=self.calendar.id).exists())
+        self.assertFalse(Recurrence.objects.exists())
+        self.assertEqual(Event.objects.get().title, 'Чужое')
+        self.assertEqual(self.client.get(f'/calendar/{self.calendar.id}/deletion/').json(),
+                         {'status': 'done', 'total': 30, 'deleted': 30})
+        self.assertEqual(purge_pending(), 0)
+
+    def purge_peak_memory(self, count):
+        self.seed(count)
+        request_calendar_deletion(self.calendar)
+        deletion = CalendarDeletion.objects.get(calendar_id=self.calendar.id)
+        peak = self.peak_memory(lambda: purge_calendar(deletion, chunk_size=500))
+        # Для следующего замера — тот же календарь снова
+        CalendarDeletion.objects.all().delete()
+        self.calendar = Calendar.objects.create(name='Удаляемый')
+        return peak
+
+    def test_peak_memory_is_bounded(self):
+        self.assertPeakMemoryBounded(self.purge_peak_memory, 2000, 8000)
+
+
+class AdminScalingTests(TestCase):
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Админка')
+        self.other = Calendar.objects.create(name='Соседний')
+        self.client.force_login(User.objects.create_superuser('admin'))
+        self.url = '/admin/calendar_app/event/'
+
+    def seed(self, calendar, count):
+        seed_events(calendar, count, start=date(2024, 12, 30), step=3)
+
+    def count_queries(self, *args):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url, *args).status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.seed(self.calendar, 5)
+        self.seed(self.other, 5)
+        small = self.count_queries()
+        self.seed(self.calendar, 40)
+        self.seed(self.other, 40)
+        self.assertEqual(self.count_queries(), small)
+
+    def test_calendar_id_filter(self):
+        self.seed(self.calendar, 3)
+        self.seed(self.other, 2)
+        response = self.client.get(self.url, {'calendar': str(self.other.id), 'date__year': 2024})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        # В фильтре нет списка календарей, параметры остальных фильтров сохраняются
+        self.assertNotContains(response, f'calendar={self.calendar.id}')
+        self.assertContains(response, 'name="date__year" value="2024"')
+        self.assertRedirects(self.client.get(self.url, {'calendar': 'x'}), f'{self.url}?e=1')
+
+    def test_change_form_uses_autocomplete(self):
+        self.seed(self.calendar, 1)
+        event = Event.objects.get()
+        response = self.client.get(f'{self.url}{event.id}/change/')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Соседний')
+
+    def test_probed_dates_match_distinct_dates(self):
+        self.seed(self.calendar, 150)
+        events = admin.site._registry[Event].get_queryset(None).filter(calendar=self.calendar)
+        for kind, lookup in (('year', {}), ('month', {'date__year': 2025}), ('day', {'date__year': 2025, 'date__month': 3})):
+            expected = list(Event.objects.filter(calendar=self.calendar, **lookup).dates('date', kind))
+            self.assertEqual(events.filter(**lookup).dates('date', kind), expected)
+        self.assertEqual(events.dates('date', 'year', 'DESC'), [date(2026, 1, 1), date(2025, 1, 1), date(2024, 1, 1)])
+
+    def test_paginator_counts_small_results_exactly(self):
+        self.seed(self.calendar, 7)
+        paginator = EstimatedCountPaginator(Event.objects.order_by('id'), 5)
+        self.assertEqual((paginator.count, paginator.num_pages), (7, 2))
+
+    @skipUnless(connection.vendor == 'postgresql', 'оценка планировщика есть только на PostgreSQL')
+    def test_paginator_uses_planner_estimate(self):
+        self.seed(self.calendar, 7)
+        with mock.patch('calendar_app.admin.ESTIMATED_COUNT_THRESHOLD', 0), \
+                CaptureQueriesContext(connection) as queries:
+            EstimatedCountPaginator(Event.objects.order_by('id'), 5).count
+        self.assertTrue(queries[0]['sql'].startswith('EXPLAIN'))
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+
+
+class StaticAssetsTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        hashed_names.cache_clear()
+        self.addCleanup(hashed_names.cache_clear)
+        build_id.cache_clear()
+        self.addCleanup(build_id.cache_clear)
+        vendored.cache_clear()
+        self.addCleanup(vendored.cache_clear)
+
+    def test_pages_use_no_external_assets(self):
+        calendar = Calendar.objects.create(name='Офлайн')
+        # Все сторонние файлы скачаны vendor_assets
+        with mock.patch('calendar_app.templatetags.custom_filters.vendored', return_value=True):
+            for url in ('/', '/create/', f'/calendar/{calendar.name}/enter/', f'/calendar/{calendar.id}/',
+                        f'/calendar/{calendar.id}/year/2025/'):
+                html = self.client.get(url).content.decode()
+                self.assertNotIn('https://', html, url)
+                self.assertNotIn('<style>', html, url)
+
+    def test_missing_vendor_files_come_from_cdn(self):
+        calendar = Calendar.objects.create(name='CDN')
+        with mock.patch('calendar_app.assets.VENDOR_DIR', self.root):
+            html = self.client.get(f'/calendar/{calendar.id}/').content.decode()
+        self.assertIn(
+            '<script src="https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/js/bootstrap.bundle.min.js" '
+            'integrity="sha384-', html,
+        )
+        # С манифестом страницы не ссылаются на несобранные файлы
+        with self.manifest(), mock.patch('calendar_app.assets.VENDOR_DIR', self.root):
+            vendored.cache_clear()
+            call_command('collectstatic', interactive=False, verbosity=0)
+            self.assertEqual(self.client.get('/').status_code, 200)
+            self.assertEqual(self.client.get(f'/calendar/{calendar.id}/').status_code, 200)
+
+    def manifest(self):
+        return override_settings(STATIC_ROOT=self.root, STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'calendar_app.assets.PrecompressedManifestStaticFilesStorage'},
+        })
+
+    def test_collectstatic_hashes_and_precompresses(self):
+        with self.manifest():
+            call_command('collectstatic', interactive=False, verbosity=0)
+            name = staticfiles_storage.stored_name('calendar_app/calendar.js')
+        self.assertRegex(name, r'^calendar_app/calendar\.[0-9a-f]{12}\.js$')
+        with open(os.path.join(self.root, name), 'rb') as f:
+            original = f.read()
+        with open(os.path.join(self.root, name + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), original)
+
+    def test_serve_static(self):
+        factory = RequestFactory()
+        with self.manifest():
+            call_command('collectstatic', interactive=False, verbosity=0)
+            name = staticfiles_storage.stored_name('calendar_app/calendar.js')
+            response = serve_static(factory.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate, br;q=0'), name)
+            last_modified = response['Last-Modified']
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('javascript', response['Content-Type'])
+            self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(len(build_id()), 12)
+            response.close()
+
+            response = serve_static(factory.get('/'), 'calendar_app/calendar.js')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+            response.close()
+
+            modified = factory.get('/', HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(serve_static(modified, name).status_code, 304)
+            with self.assertRaises(Http404):
+                serve_static(factory.get('/'), '../manage.py')
+
+    def test_vendored_files_are_checked(self):
+        with mock.patch('calendar_app.assets.VENDOR_DIR', self.root):
+            self.assertEqual([w.id for w in check_vendor_assets(None)], ['calendar_app.W001'])
+
+
+@skipUnless(HAS_REPLICA, 'нужна база replica: --settings=calendar_project.test_settings')
+@override_settings(
+    DATABASE_REPLICAS=['replica'],
+    DATABASE_ROUTERS=['calendar_app.db.ReplicaRouter'],
+    DB_REPLICA_STICKY_SECONDS=5,
+)
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'} if HAS_REPLICA else {'default'}
+
+    def setUp(self):
+        self.calendar = Calendar.objects.create(name='Основной')
+        # Та же строка на «реплике», но под другим именем
+        Calendar.objects.using('replica').create(id=self.calendar.id, name='Реплика')
+        self.events_url = f'/calendar/{self.calendar.id}/get_events/'
+
+    def test_read_only_views_read_from_replica(self):
+        self.assertContains(self.client.get('/'), 'Реплика')
+        self.assertNotContains(self.client.get('/'), 'Основной')
+        self.assertEqual(self.client.get('/calendar/Реплика/enter/').status_code, 200)
+        # Лента изменений не помечена и читает с основной базы
+        self.assertEqual(self.client.get(f'/calendar/{self.calendar.id}/changes/').status_code, 200)
+
+    def test_writes_go_to_primary_and_pin_the_client(self):
+        response = self.client.post(f'/calendar/{self.calendar.id}/add_event/',
+                                    {'title': 'Новое', 'description': '', 'date': '2025-03-01'})
+        self.assertEqual(response.cookies[PRIMARY_COOKIE]['max-age'], 5)
+        self.assertEqual(Event.objects.using('default').count(), 1)
+        self.assertEqual(Event.objects.using('replica').count(), 0)
+        # Свои изменения клиент видит сразу, другие — когда их получит реплика
+        self.assertEqual(len(self.client.get(self.events_url, {'date': '2025-03-01'}).json()['events']), 1)
+        self.assertEqual(len(Client().get(self.events_url, {'date': '2025-03-01'}).json()['events']), 0)
+
+    def test_read_only_post_does_not_pin(self):
+        response = self.client.post('/calendar/Реплика/enter/', {'uuid': str(self.calendar.id)})
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_async_views_keep_the_replica(self):
+        async def scenario():
+            @read_from_replica
+            async def view(request):
+                return await sync_to_async(router.db_for_read)(Event)
+
+            return await view(AsyncRequestFactory().get('/'))
+
+        self.assertEqual(asyncio.run(scenario()), 'replica')
+        self.assertEqual(router.db_for_read(Event), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        self.assertContains(self.client.get('/'), 'Основной')
+        response = self.client.post(f'/calendar/{self.calendar.id}/add_event/',
+                                    {'title': 'Новое', 'description': '', 'date': '2025-03-01'})
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+
+@override_settings(
+    WRITE_THROTTLE=True,
+    WRITE_THROTTLE_WINDOW=3600,
+    WRITE_THROTTLE_CLIENT_LIMIT=2,
+    WRITE_THROTTLE_CALENDAR_LIMIT=3,
+    WRITE_CONCURRENCY_LIMIT=4,
+)
+class WriteThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calendar = Calendar.objects.create(name='Лимиты')
+        self.add_url = f'/calendar/{self.calendar.id}/add_event/'
+
+    def add(self, client='10.0.0.1', url=None, **headers):
+        return self.client.post(url or self.add_url, {'title': 'Событие', 'description': '', 'date': '2025-04-01'},
+                                REMOTE_ADDR=client, **headers)
+
+    def test_client_bucket(self):
+        self.assertEqual(self.add().json(), {'status': 'success'})
+        self.assertEqual(self.add().status_code, 200)
+        response = self.add()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['reason'], 'client')
+        self.assertGreater(int(response['Retry-After']), 1)
+        self.assertEqual(Event.objects.count(), 2)
+        # Другой клиент и другой календарь не затронуты
+        self.assertEqual(self.add(client='10.0.0.2').status_code, 200)
+        self.assertEqual(shed_stats(), {'client': 1, 'calendar': 0, 'concurrency': 0})
+
+    def test_calendar_bucket(self):
+        for n in range(3):
+            self.assertEqual(self.add(client=f'10.0.1.{n}').status_code, 200)
+        response = self.add(client='10.0.1.9')
+        self.assertEqual(response.json()['reason'], 'calendar')
+        other = Calendar.objects.create(name='Другой')
+        self.assertEqual(self.add(client='10.0.1.9', url=f'/calendar/{other.id}/add_event/').status_code, 200)
+
+    def test_rejection_does_not_spend_other_counters(self):
+        buckets = [('throttle:test:a', 5), ('throttle:test:b', 1)]
+        self.assertEqual(take(buckets, 10, now=100), (None, None))
+        retry_after, key = take(buckets, 10, now=102.5)
+        self.assertEqual(key, 'throttle:test:b')
+        self.assertAlmostEqual(retry_after, 7.5)
+        # Отказ не засчитан в a; в следующем окне счёт идёт заново
+        self.assertEqual(cache.get('throttle:test:a:10'), 1)
+        self.assertEqual(take(buckets, 10, now=110), (None, None))
+
+    def test_window_boundary_allows_at_most_two_limits(self):
+        # Фиксированное окно: в конце одного окна и в начале следующего проходит
+        # по лимиту, но не больше двух лимитов за любые WRITE_THROTTLE_WINDOW секунд
+        buckets = [('throttle:test:edge', 3)]
+        accepted = [take(buckets, 10, now=now)[0] is None for now in (109, 109, 109, 109, 110, 110, 110, 110)]
+        self.assertEqual(accepted, [True, True, True, False, True, True, True, False])
+        self.assertEqual(take(buckets, 10, now=119.9)[1], 'throttle:test:edge')
+
+    def test_concurrent_requests_do_not_exceed_limit(self):
+        start = threading.Barrier(20)
+        results = []
+
+        def request():
+            start.wait()
+            results.append(take([('throttle:test:race', 5)], 3600)[0] is None)
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+
+    def test_client_ip_from_trusted_proxy(self):
+        forwarded = {'HTTP_X_FORWARDED_FOR': '198.51.100.7, 203.0.113.5'}
+        request = RequestFactory().post('/', REMOTE_ADDR='10.9.9.9', **forwarded)
+        self.assertEqual(client_ip(request), '10.9.9.9')
+        with override_settings(WRITE_THROTTLE_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            self.assertEqual(client_ip(request), '203.0.113.5')
+            with override_settings(WRITE_THROTTLE_TRUSTED_PROXIES=2):
+                self.assertEqual(client_ip(request), '198.51.100.7')
+            # Без заголовка — адрес соединения
+            self.assertEqual(client_ip(RequestFactory().post('/', REMOTE_ADDR='10.9.9.9')), '10.9.9.9')
+            # Разные клиенты за одним прокси не делят счётчик, подделка слева не помогает
+            self.assertEqual(self.add('10.9.9.9', HTTP_X_FORWARDED_FOR='203.0.113.5').status_code, 200)
+            self.assertEqual(self.add('10.9.9.9', HTTP_X_FORWARDED_FOR='203.0.113.6').status_code, 200)
+            self.assertEqual(self.add('10.9.9.9', HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.5').status_code, 200)
+            response = self.add('10.9.9.9', HTTP_X_FORWARDED_FOR='2.2.2.2, 203.0.113.5')
+        self.assertEqual(response.json()['reason'], 'client')
+
+    def test_concurrency_cap(self):
+        # Место занято записью другого воркера: счётчик общий
+        self.assertTrue(acquire_write_slot(1))
+        try:
+            with override_settings(WRITE_CONCURRENCY_LIMIT=1):
+                response = self.add()
+        finally:
+            release_write_slot()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.json()['reason'], 'concurrency')
+        self.assertEqual(active_writes(), 0)
+        self.assertEqual(self.add().status_code, 200)
+        self.assertEqual(active_writes(), 0)
+
+    def test_concurrent_slots_do_not_exceed_limit(self):
+        start = threading.Barrier(20)
+        results = []
+
+        def request():
+            start.wait()
+            results.append(acquire_write_slot(5))
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(active_writes(), 5)
+        for _ in range(5):
+            release_write_slot()
+        self.assertEqual(active_writes(), 0)
+
+    def test_only_writes_are_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get('/create/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+        self.client.post('/create/', {'name': 'Первый'}, REMOTE_ADDR='10.0.0.1')
+        self.client.post('/create/', {'name': 'Второй'}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.client.post('/create/', {'name': 'Третий'}, REMOTE_ADDR='10.0.0.1').status_code, 429)
+
+    async def test_async_views(self):
+        factory = AsyncRequestFactory()
+        statuses = []
+        for _ in range(3):
+            request = factory.post('/', {'title': 'Асинхронно', 'description': '', 'date': '2025-04-01'})
+            statuses.append((await async_views.add_event(request, self.calendar.id)).status_code)
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_stats_require_staff(self):
+        self.assertEqual(self.client.get('/metrics/throttle/').status_code, 302)
+        self.client.force_login(User.objects.create_user('admin', password='x', is_staff=True))
+        stats = self.client.get('/metrics/throttle/').json()
+        self.assertEqual(stats['shed'], {'client': 0, 'calendar': 0, 'concurrency': 0})
+        self.assertEqual((stats['active_writes'], stats['concurrency_limit']), (0, 4))
+
+    @override_settings(WRITE_THROTTLE=False)
+    def test_disabled(self):
+        for _ in range(5):
+            self.assertEqual(self.add().status_code, 200)
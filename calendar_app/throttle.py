@@ -0,0 +1,182 @@
+# ./calendar_app/throttle.py
+
+# Ограничение изменяющих запросов (WRITE_THROTTLE). Вьюхи записи помечаются
+# throttle_writes; для их POST-запросов проверяются два счётчика — клиента
+# (по IP) и календаря — и число одновременных записей. Лишние запросы
+# получают 429 с Retry-After, не доходя до базы.
+#
+# Счётчики — фиксированные окна по WRITE_THROTTLE_WINDOW секунд в кэше
+# THROTTLE_CACHE. Счётчик окна увеличивается атомарно (incr, а для первого
+# запроса окна — add), поэтому одновременные запросы не превышают лимит.
+# Общими для всех воркеров и атомарными их делает общий кэш Redis или
+# memcached; у кэша в памяти счётчики свои в каждом процессе, у файлового
+# incr не атомарен. На стыке окон клиент может успеть сделать до двух лимитов.
+#
+# Одновременные записи (предел WRITE_CONCURRENCY_LIMIT) считает один счётчик
+# в том же кэше на все процессы: запись увеличивает его перед вьюхой и
+# уменьшает после. Счётчик живёт WRITE_SLOTS_TIMEOUT секунд после последней
+# принятой записи, поэтому место, которое занял убитый посреди записи
+# процесс, освобождается, когда записей нет дольше этого времени.
+
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+SHED_REASONS = ('client', 'calendar', 'concurrency')
+WRITE_SLOTS_KEY = 'throttle:writes'
+WRITE_SLOTS_TIMEOUT = 300
+
+
+def throttle_cache():
+    return caches[settings.THROTTLE_CACHE]
+
+
+def client_ip(request):
+    # За прокси адрес клиента берётся из заголовка WRITE_THROTTLE_CLIENT_IP_HEADER
+    # (ключ request.META, например HTTP_X_FORWARDED_FOR). В X-Forwarded-For
+    # клиент может дописать что угодно слева, поэтому берётся запись, которую
+    # добавил первый из WRITE_THROTTLE_TRUSTED_PROXIES доверенных прокси.
+    header = settings.WRITE_THROTTLE_CLIENT_IP_HEADER
+    if header:
+        addresses = [address.strip() for address in request.META.get(header, '').split(',') if address.strip()]
+        if addresses:
+            return addresses[-min(settings.WRITE_THROTTLE_TRUSTED_PROXIES, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    return f'throttle:client:{client_ip(request)}'
+
+
+def incr(cache, key, timeout=None):
+    # add создаёт счётчик, только если его ещё нет: из одновременных первых
+    # запросов его создаёт один, остальные увеличивают
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def take(buckets, window, now=None):
+    # buckets — [(ключ, лимит за окно)]. Засчитывает запрос в счётчики
+    # текущего окна и возвращает (None, None) при успехе или (секунд до
+    # конца окна, ключ переполненного счётчика). При отказе уже увеличенные
+    # счётчики уменьшаются обратно.
+    cache = throttle_cache()
+    now = time.time() if now is None else now
+    number = int(now // window)
+    counted = []
+    for key, limit in buckets:
+        counter = f'{key}:{number}'
+        counted.append(counter)
+        if incr(cache, counter, math.ceil(window) + 1) > limit:
+            for taken in counted:
+                try:
+                    cache.decr(taken)
+                except ValueError:
+                    pass
+            return (number + 1) * window - now, key
+    return None, None
+
+
+def count_shed(reason):
+    incr(throttle_cache(), f'throttle:shed:{reason}')
+
+
+def shed_stats():
+    cache = throttle_cache()
+    return {reason: cache.get(f'throttle:shed:{reason}', 0) for reason in SHED_REASONS}
+
+
+def reset_shed_stats():
+    throttle_cache().delete_many([f'throttle:shed:{reason}' for reason in SHED_REASONS])
+
+
+def acquire_write_slot(limit):
+    # Занимает место среди выполняющихся записей всех процессов, не дожидаясь
+    # освобождения; limit = 0 — без предела. После принятой записи нужен
+    # release_write_slot.
+    cache = throttle_cache()
+    active = incr(cache, WRITE_SLOTS_KEY, WRITE_SLOTS_TIMEOUT)
+    if limit and active > limit:
+        release_write_slot()
+        return False
+    cache.touch(WRITE_SLOTS_KEY, WRITE_SLOTS_TIMEOUT)
+    return True
+
+
+def release_write_slot():
+    try:
+        throttle_cache().decr(WRITE_SLOTS_KEY)
+    except ValueError:  # счётчик истёк
+        pass
+
+
+def active_writes():
+    return throttle_cache().get(WRITE_SLOTS_KEY, 0)
+
+
+def too_many_requests(reason, retry_after):
+    count_shed(reason)
+    response = JsonResponse({'status': 'error', 'message': 'Too many requests', 'reason': reason}, status=429)
+    response['Retry-After'] = max(1, math.ceil(retry_after))
+    return response
+
+
+def check_buckets(request, calendar_id):
+    buckets = [(client_key(request), settings.WRITE_THROTTLE_CLIENT_LIMIT)]
+    if calendar_id is not None:
+        buckets.append((f'throttle:calendar:{calendar_id}', settings.WRITE_THROTTLE_CALENDAR_LIMIT))
+    retry_after, key = take(buckets, settings.WRITE_THROTTLE_WINDOW)
+    if retry_after is None:
+        return None
+    return too_many_requests(key.split(':')[1], retry_after)
+
+
+def admit(request, calendar_id):
+    # None — запрос выполняется и занимает место среди одновременных записей,
+    # иначе ответ 429
+    response = check_buckets(request, calendar_id)
+    if response is None and not acquire_write_slot(settings.WRITE_CONCURRENCY_LIMIT):
+        response = too_many_requests('concurrency', 1)
+    return response
+
+
+def throttled(request):
+    return settings.WRITE_THROTTLE and request.method == 'POST'
+
+
+def throttle_writes(view):
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if not throttled(request):
+                return await view(request, *args, **kwargs)
+            # Кэш синхронный: все счётчики — один переход в поток
+            response = await sync_to_async(admit)(request, kwargs.get('calendar_id'))
+            if response is not None:
+                return response
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                await sync_to_async(release_write_slot)()
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not throttled(request):
+                return view(request, *args, **kwargs)
+            response = admit(request, kwargs.get('calendar_id'))
+            if response is not None:
+                return response
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                release_write_slot()
+    return wrapper
@@ -1,17 +1,45 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import assets, async_views, views
 from django.contrib import admin
 
+# Под ASGI JSON-эндпоинты событий обслуживаются асинхронными вьюхами
+event_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     path('admin/', admin.site.urls),                                                                                        # ← Новый маршрут
     path('', views.home, name='home'),                                                                                      # ← Новый маршрут
+    path('metrics/db/', views.db_stats, name='db_stats'),
+    path('metrics/throttle/', views.throttle_stats, name='throttle_stats'),
+    path('search/', views.search_calendars, name='search_calendars'),
     path('create/', views.create_calendar, name='create_calendar'),
     path('calendar/<uuid:calendar_id>/', views.calendar_view, name='calendar_view'),
     path('calendar/<uuid:calendar_id>/<int:year>/<int:month>/', views.calendar_view, name='calendar_view_with_params'),
+    path('calendar/<uuid:calendar_id>/year/<int:year>/', views.year_view, name='year_view'),
+    path('calendar/<uuid:calendar_id>/year/<int:year>/counts/', views.get_year_counts, name='get_year_counts'),
     path('calendar/<str:calendar_name>/enter/', views.enter_calendar, name='enter_calendar'),                               # ← Новый маршрут
-    path('calendar/<uuid:calendar_id>/get_events/', views.get_events, name='get_events'),
-    path('calendar/<uuid:calendar_id>/add_event/', views.add_event, name='add_event'),
-    path('calendar/<uuid:calendar_id>/edit_event/<int:event_id>/', views.edit_event, name='edit_event'),
-    path('calendar/<uuid:calendar_id>/delete_event/<int:event_id>/', views.delete_event, name='delete_event'),
+    path('calendar/<uuid:calendar_id>/get_events/', event_views.get_events, name='get_events'),
+    path('calendar/<uuid:calendar_id>/events/', views.get_events_range, name='get_events_range'),
+    path('calendar/<uuid:calendar_id>/search/', views.search_events_view, name='search_events'),
+    path('calendar/<uuid:calendar_id>/changes/', views.get_changes, name='get_changes'),
+    path('calendar/<uuid:calendar_id>/deletion/', views.calendar_deletion_status, name='calendar_deletion_status'),
+    path('calendar/<uuid:calendar_id>/export.ics', views.export_calendar, name='export_calendar'),
+    path('calendar/<uuid:calendar_id>/import/', views.import_calendar, name='import_calendar'),
+    path('calendar/<uuid:calendar_id>/batch/', views.batch_events, name='batch_events'),
+    path('calendar/<uuid:calendar_id>/add_event/', event_views.add_event, name='add_event'),
+    path('calendar/<uuid:calendar_id>/edit_event/<int:event_id>/', event_views.edit_event, name='edit_event'),
+    path('calendar/<uuid:calendar_id>/delete_event/<int:event_id>/', event_views.delete_event, name='delete_event'),
 ]
 
+# Поток изменений держит соединение открытым, поэтому обслуживается только под ASGI
+if settings.ASYNC_VIEWS:
+    urlpatterns.append(
+        path('calendar/<uuid:calendar_id>/stream/', async_views.event_stream, name='event_stream'),
+    )
+
+
+# Без nginx статику отдаёт приложение: сжатые копии и immutable-кэш (см. assets.py)
+if settings.SERVE_STATIC:
+    urlpatterns.append(
+        path(f"{settings.STATIC_URL.strip('/')}/<path:path>", assets.serve_static, name='static'),
+    )
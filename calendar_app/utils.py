@@ -0,0 +1,12 @@
+# ./calendar_app/utils.py
+
+from datetime import datetime
+
+
+def parse_date(date_str):
+    # Формат YYYY-MM-DD; None, если строка отсутствует или дата некорректна
+    try:
+        year, month, day = map(int, date_str.split('-'))
+        return datetime(year, month, day).date()
+    except (AttributeError, ValueError):
+        return None
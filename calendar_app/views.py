@@ -1,13 +1,36 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition
 from django.utils import timezone
 import calendar as calendar_lib
-from datetime import datetime
-from .models import Calendar, Event
-from django.core.exceptions import ObjectDoesNotExist
+import csv
+import io
+import json
+import uuid
+from collections import Counter
+from datetime import MAXYEAR, datetime, timedelta
+from django.template.loader import render_to_string
+from django.urls import reverse
+from . import push
+from .assets import build_id
+from .cache import bump_calendar_version, cached_month_grid, cached_year_counts, resolve_calendar_name
+from .db import connection_stats, read_from_replica
+from .deletion import request_calendar_deletion
+from .ical import export_events
+from .importer import detect_format, import_events
+from .models import Calendar, CalendarDeletion, Event, Recurrence, month_bounds, year_bounds
+from .recurrence import events_by_date, parse_recurrence, recurring_counts, recurring_occurrences, recurring_titles
+from .search import SEARCH_MAX_PAGES, search_events
+from .sync import CursorExpired, calendar_deleted, changes_since, delete_events, record_deletions
+from .throttle import active_writes, shed_stats, throttle_writes
+from .utils import parse_date
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 
 ru_months = {
     1: 'Январь', 2: 'Февраль', 3: 'Март', 4: 'Апрель',
@@ -16,44 +39,186 @@ ru_months = {
 }
 ru_week_days = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
 
+# Размер страницы списка календарей на главной и в поиске
+HOME_PAGE_SIZE = 50
 
+# Сколько событий дня показывать в ячейке сетки месяца; остальные — «+N ещё»
+MONTH_DAY_EVENTS = 3
+
+# Максимум операций в одном пакетном запросе
+BATCH_MAX_OPERATIONS = 1000
+
+# Ограничения для диапазонного API событий
+EVENTS_RANGE_MAX_DAYS = 62
+EVENTS_RANGE_PAGE_SIZE = 500
+
+
+def calendars_page(calendars, cursor=None, page_size=None):
+    # Keyset-пагинация по (created_at, id) вместо OFFSET: стоимость страницы
+    # не зависит от того, насколько далеко пролистан список
+    page_size = page_size or HOME_PAGE_SIZE
+    if cursor:
+        # Некорректный курсор приводит к ValueError — его обрабатывает вызывающая вьюха
+        created_at, calendar_id = cursor.split('|')
+        created_at = datetime.fromisoformat(created_at)
+        calendar_id = uuid.UUID(calendar_id)
+        calendars = calendars.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=calendar_id)
+        )
+    calendars = list(calendars.order_by('-created_at', '-id').only('id', 'name', 'created_at')[:page_size + 1])
+    next_cursor = None
+    if len(calendars) > page_size:
+        calendars = calendars[:page_size]
+        last = calendars[-1]
+        next_cursor = f'{last.created_at.isoformat()}|{last.id}'
+    return calendars, next_cursor
+
+
+@read_from_replica
 def home(request):
-    calendars = Calendar.objects.all().order_by('-created_at')
-    return render(request, 'home.html', {'calendars': calendars})
+    calendars, next_cursor = calendars_page(Calendar.objects.all())
+    return render(request, 'home.html', {'calendars': calendars, 'next_cursor': next_cursor})
+
+
+@read_from_replica
+def search_calendars(request):
+    query = request.GET.get('q', '').strip()
+    calendars = Calendar.objects.all()
+    if query:
+        calendars = calendars.filter(name__icontains=query)
+    try:
+        calendars, next_cursor = calendars_page(calendars, request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'calendars': [
+            {'name': c.name, 'url': reverse('enter_calendar', args=[c.name])} for c in calendars
+        ],
+        'next': next_cursor,
+    })
 
 
 @csrf_exempt
+@throttle_writes
 def create_calendar(request):
     if request.method == 'POST':
         name = request.POST.get('name')
         if not name or len(name.strip()) == 0:
             messages.error(request, "Название календаря обязательно!")
             return render(request, 'create_calendar.html', {'error': True})
-        calendar = Calendar.objects.create(name=name.strip())
+        try:
+            with transaction.atomic():
+                calendar = Calendar.objects.create(name=name.strip())
+        except IntegrityError:
+            return render(request, 'create_calendar.html', {
+                'error': True,
+                'error_message': "Календарь с таким названием уже существует!",
+            })
         return redirect('calendar_view', calendar_id=calendar.id)
     return render(request, 'create_calendar.html')
 
 
 @csrf_protect
+@read_from_replica
 def enter_calendar(request, calendar_name):
-    try:
-        calendar = Calendar.objects.get(name=calendar_name)
-    except Calendar.DoesNotExist:
+    calendar = resolve_calendar_name(calendar_name)
+    if calendar is None:
         messages.error(request, "Календарь не найден.")
         return redirect('home')
+    calendar_id, name = calendar
 
     if request.method == 'POST':
         entered_uuid = request.POST.get('uuid')
-        if str(calendar.id) == entered_uuid:
-            return redirect('calendar_view', calendar_id=calendar.id)
+        if str(calendar_id) == entered_uuid:
+            return redirect('calendar_view', calendar_id=calendar_id)
         else:
             messages.error(request, "Неверный пароль (UUID).")
 
-    return render(request, 'enter_calendar.html', {'calendar_name': calendar.name})
+    return render(request, 'enter_calendar.html', {'calendar_name': name})
+
+
+def render_month_grid(calendar, year, month, month_dates):
+    weeks = []
+    for week in month_dates:
+        new_week = []
+        for date in week:
+            is_current_month = (date.month == month)
+            new_week.append((date.day, date.strftime('%Y-%m-%d'), not is_current_month))
+        weeks.append(new_week)
+
+    start, end = month_bounds(year, month)
+    return render_to_string('month_grid.html', {
+        'ru_week_days': ru_week_days,
+        'weeks': weeks,
+        'days': month_day_events(calendar, start, end),
+    })
+
+
+def month_day_events(calendar, start, end, limit=MONTH_DAY_EVENTS):
+    # {'YYYY-MM-DD': {'events': [{'id', 'title'}, ...], 'more': N}}: в ячейку
+    # попадает не больше limit событий, остальные подгружаются через get_events
+    recurring, hidden = recurring_titles(calendar.id, start, end)
+    events = Event.objects.filter(calendar=calendar).in_range(start, end)
+    if hidden:
+        events = events.exclude(id__in=hidden)
+
+    days = {}
+    for event_id, day, title, day_total in events.capped_per_day(limit):
+        entry = days.setdefault(day, {'events': [], 'total': day_total})
+        entry['events'].append({'id': event_id, 'title': title})
+    for day, event in sorted(recurring, key=lambda pair: (pair[0], pair[1].id)):
+        entry = days.setdefault(day, {'events': [], 'total': 0})
+        entry['total'] += 1
+        if len(entry['events']) < limit:
+            entry['events'].append({'id': event.id, 'title': event.title})
+
+    return {
+        day.strftime('%Y-%m-%d'): {'events': entry['events'], 'more': entry['total'] - len(entry['events'])}
+        for day, entry in days.items()
+    }
+
+
+def request_calendar(request, calendar_id):
+    # Календарь выбирается один раз за запрос: и для проверки ETag, и для самой вьюхи
+    if not hasattr(request, '_calendar'):
+        request._calendar = Calendar.objects.filter(id=calendar_id).first()
+    return request._calendar
 
 
+def request_calendar_or_404(request, calendar_id):
+    calendar = request_calendar(request, calendar_id)
+    if calendar is None:
+        raise Http404
+    return calendar
+
+
+def calendar_last_modified(request, calendar_id, *args, **kwargs):
+    calendar = request_calendar(request, calendar_id)
+    return calendar.updated_at if calendar else None
+
+
+def calendar_view_etag(request, calendar_id, year=None, month=None):
+    calendar = request_calendar(request, calendar_id)
+    if not calendar:
+        return None
+    now = timezone.now()
+    page = request.GET.get('page', '')
+    # Страница зависит от текущего года (подсветка) и месяца по умолчанию, а
+    # после деплоя — от новых имён статики в HTML
+    return f'W/"{calendar.version}-{year or now.year}-{month or now.month}-{page}-{now.year}-{build_id()}"'
+
+
+def get_events_etag(request, calendar_id):
+    calendar = request_calendar(request, calendar_id)
+    if not calendar:
+        return None
+    return f'"{calendar.version}-{request.GET.get("date", "")}"'
+
+
+@read_from_replica
+@condition(etag_func=calendar_view_etag, last_modified_func=calendar_last_modified)
 def calendar_view(request, calendar_id, year=None, month=None):
-    calendar = get_object_or_404(Calendar, id=calendar_id)
+    calendar = request_calendar_or_404(request, calendar_id)
     now = timezone.now()
     if not year:
         year = now.year
@@ -66,19 +231,10 @@ def calendar_view(request, calendar_id, year=None, month=None):
         month = now.month
         month_dates = calendar_lib.Calendar().monthdatescalendar(year, month)
 
-    weeks = []
-    for week in month_dates:
-        new_week = []
-        for date in week:
-            is_current_month = (date.month == month)
-            new_week.append((date.day, date.strftime('%Y-%m-%d'), not is_current_month))
-        weeks.append(new_week)
-
-    events = Event.objects.filter(calendar=calendar, date__year=year, date__month=month)
-    events_by_day = {}
-    for event in events:
-        key = event.date.strftime('%Y-%m-%d')
-        events_by_day.setdefault(key, []).append(event)
+    month_grid = cached_month_grid(
+        calendar, year, month,
+        lambda: render_month_grid(calendar, year, month, month_dates),
+    )
 
     years_per_page = 15
     current_page = int(request.GET.get('page', (year - 1900) // years_per_page))
@@ -95,8 +251,7 @@ def calendar_view(request, calendar_id, year=None, month=None):
         'month_name': ru_months[month],
         'ru_months': ru_months,
         'ru_week_days': ru_week_days,
-        'weeks': weeks,
-        'events_by_day': events_by_day,
+        'month_grid': month_grid,
         'prev_year': year - 1 if month == 1 else year,
         'prev_month': 12 if month == 1 else month - 1,
         'next_year': year + 1 if month == 12 else year,
@@ -109,70 +264,417 @@ def calendar_view(request, calendar_id, year=None, month=None):
         'end_year': end_year,
         'current_year': now.year,
         'base_calendar_url': request.build_absolute_uri(f'/calendar/{calendar.id}/'),
+        'live_updates': settings.ASYNC_VIEWS,
+        'day_event_limit': MONTH_DAY_EVENTS,
     }
     return render(request, 'calendar.html', context)
 
 
+def year_counts(calendar, year):
+    # Число событий по дням года: один GROUP BY date по событиям и поправка
+    # за повторы. Ключи — 'YYYY-MM-DD', дни без событий не включаются.
+    start, end = year_bounds(year)
+    counts = Counter(dict(Event.objects.filter(calendar=calendar).in_range(start, end).counts_by_date()))
+    counts.update(recurring_counts(calendar.id, start, end))
+    return {day.strftime('%Y-%m-%d'): total for day, total in sorted(counts.items()) if total > 0}
+
+
+def heat_level(count):
+    if count >= 8:
+        return 4
+    if count >= 4:
+        return 3
+    if count >= 2:
+        return 2
+    return count
+
+
+def year_etag(request, calendar_id, year):
+    calendar = request_calendar(request, calendar_id)
+    if not calendar:
+        return None
+    # Та же функция для страницы года, поэтому в ETag входит сборка статики
+    return f'"{calendar.version}-y{year}-{build_id()}"'
+
+
+def calendar_year_counts(request, calendar_id, year):
+    calendar = request_calendar_or_404(request, calendar_id)
+    if not 1 <= year < MAXYEAR:
+        raise Http404
+    return calendar, cached_year_counts(calendar, year, lambda: year_counts(calendar, year))
+
+
+@read_from_replica
+@condition(etag_func=year_etag, last_modified_func=calendar_last_modified)
+def year_view(request, calendar_id, year):
+    calendar, counts = calendar_year_counts(request, calendar_id, year)
+    months = []
+    for month in range(1, 13):
+        weeks = []
+        for week in calendar_lib.Calendar().monthdatescalendar(year, month):
+            cells = []
+            for date in week:
+                if date.month != month:
+                    cells.append(None)
+                    continue
+                date_str = date.strftime('%Y-%m-%d')
+                count = counts.get(date_str, 0)
+                cells.append((date.day, date_str, count, heat_level(count)))
+            weeks.append(cells)
+        months.append((month, ru_months[month], weeks))
+
+    return render(request, 'year.html', {
+        'calendar': calendar,
+        'year': year,
+        'months': months,
+        'ru_week_days': ru_week_days,
+        'total': sum(counts.values()),
+    })
+
+
+@read_from_replica
+@condition(etag_func=year_etag, last_modified_func=calendar_last_modified)
+def get_year_counts(request, calendar_id, year):
+    _, counts = calendar_year_counts(request, calendar_id, year)
+    return JsonResponse({'year': year, 'counts': counts})
+
+
+def create_event(calendar, title, description, date, recurrence=None):
+    with transaction.atomic():
+        event = Event.objects.create(
+            calendar=calendar,
+            title=title,
+            description=description,
+            date=date
+        )
+        if recurrence:
+            Recurrence.objects.create(event=event, **recurrence)
+    return event
+
+
 @csrf_exempt
+@throttle_writes
 def add_event(request, calendar_id):
     if request.method == 'POST':
         calendar = get_object_or_404(Calendar, id=calendar_id)
         title = request.POST.get('title')
         description = request.POST.get('description')
-        date_str = request.POST.get('date')
-        try:
-            year, month, day = map(int, date_str.split('-'))
-            date = datetime(year, month, day).date()
-        except ValueError:
+        date = parse_date(request.POST.get('date'))
+        if date is None:
             return JsonResponse({'status': 'error', 'message': 'Invalid date'})
-        Event.objects.create(
-            calendar=calendar,
-            title=title,
-            description=description,
-            date=date
-        )
+        recurrence = parse_recurrence(request.POST)
+        if recurrence is False:
+            return JsonResponse({'status': 'error', 'message': 'Invalid recurrence'})
+        event = create_event(calendar, title, description, date, recurrence)
+        bump_calendar_version(calendar.id)
+        push.publish(calendar.id, push.event_message('create', event, recurring=bool(recurrence)))
         return JsonResponse({'status': 'success'})
     return JsonResponse({'status': 'error', 'message': 'Invalid request'})
 
 
+def validate_operation(operation):
+    # Возвращает текст ошибки или None; дата и заголовок проверяются как в add_event/импорте
+    op = operation.get('op') if isinstance(operation, dict) else None
+    if op not in ('create', 'update', 'delete'):
+        return 'Invalid operation'
+    if op != 'create' and not isinstance(operation.get('id'), int):
+        return 'Invalid id'
+    if op == 'create' or 'date' in operation:
+        if parse_date(operation.get('date')) is None:
+            return 'Invalid date'
+    if op == 'create' or 'title' in operation:
+        title = operation.get('title')
+        if not isinstance(title, str) or not title.strip() or len(title) > Event._meta.get_field('title').max_length:
+            return 'Invalid title'
+    if 'description' in operation and not isinstance(operation['description'], str):
+        return 'Invalid description'
+    return None
+
+
+@csrf_exempt
+@throttle_writes
+def batch_events(request, calendar_id):
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=405)
+    try:
+        operations = json.loads(request.body).get('operations')
+    except (ValueError, AttributeError):
+        operations = None
+    if not isinstance(operations, list) or not 0 < len(operations) <= BATCH_MAX_OPERATIONS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid operations'}, status=400)
+    calendar = get_object_or_404(Calendar, id=calendar_id)
+
+    results = [{'index': i, 'status': 'success'} for i in range(len(operations))]
+    failed = False
+    for i, operation in enumerate(operations):
+        error = validate_operation(operation)
+        if error:
+            results[i].update(status='error', message=error)
+            failed = True
+
+    if not failed:
+        creates = [(i, op) for i, op in enumerate(operations) if op['op'] == 'create']
+        updates = [(i, op) for i, op in enumerate(operations) if op['op'] == 'update']
+        deletes = [(i, op) for i, op in enumerate(operations) if op['op'] == 'delete']
+        with transaction.atomic():
+            # Одна выборка на все изменяемые и удаляемые события календаря
+            target_ids = {op['id'] for _, op in updates + deletes}
+            existing = Event.objects.filter(calendar=calendar, id__in=target_ids).in_bulk() if target_ids else {}
+            for i, op in updates + deletes:
+                if op['id'] not in existing:
+                    results[i].update(status='error', message='Event not found')
+                    failed = True
+
+            if not failed:
+                created = Event.objects.bulk_create([
+                    Event(calendar=calendar, title=op['title'].strip(), description=op.get('description', ''),
+                          date=parse_date(op['date']))
+                    for _, op in creates
+                ])
+                for (i, _), event in zip(creates, created):
+                    results[i]['id'] = event.id
+
+                changed = {'updated_at', 'change_seq'}
+                now = timezone.now()
+                for i, op in updates:
+                    event = existing[op['id']]
+                    event.updated_at = now
+                    event.change_seq = None
+                    if 'title' in op:
+                        event.title = op['title'].strip()
+                        changed.add('title')
+                    if 'description' in op:
+                        event.description = op['description']
+                        changed.add('description')
+                    if 'date' in op:
+                        event.date = parse_date(op['date'])
+                        changed.add('date')
+                    results[i]['id'] = event.id
+                if updates:
+                    Event.objects.bulk_update([existing[op['id']] for _, op in updates], sorted(changed))
+
+                if deletes:
+                    delete_events(calendar.id, [op['id'] for _, op in deletes])
+                    for i, op in deletes:
+                        results[i]['id'] = op['id']
+                bump_calendar_version(calendar.id)
+                # Пакет может затронуть сотни событий: страницы перезагружаются целиком
+                push.publish(calendar.id, push.RESET)
+
+    if failed:
+        # Транзакция не применяется целиком, если хотя бы одна операция некорректна
+        for result in results:
+            if result['status'] == 'success':
+                result.update(status='skipped')
+                result.pop('id', None)
+        return JsonResponse({'status': 'error', 'results': results}, status=400)
+    return JsonResponse({'status': 'success', 'results': results})
+
+
 @csrf_exempt
+@throttle_writes
 def edit_event(request, calendar_id, event_id):
     if request.method == 'POST':
-        event = get_object_or_404(Event, id=event_id, calendar_id=calendar_id)
+        event = get_object_or_404(Event, id=event_id, calendar_id=calendar_id, calendar__deleted_at__isnull=True)
         event.title = request.POST.get('title', event.title)
         event.description = request.POST.get('description', event.description)
         event.save()
+        bump_calendar_version(calendar_id)
+        push.publish(calendar_id, push.event_message('update', event))
         return JsonResponse({'status': 'success'})
     return JsonResponse({'status': 'error'})
 
 
 @csrf_exempt
+@throttle_writes
 def delete_event(request, calendar_id, event_id):
     if request.method == 'POST':
-        event = get_object_or_404(Event, id=event_id, calendar_id=calendar_id)
-        event.delete()
+        # Правило повторения — тем же запросом: от него зависит, как страница применит удаление
+        event = get_object_or_404(
+            Event.objects.select_related('recurrence'),
+            id=event_id, calendar_id=calendar_id, calendar__deleted_at__isnull=True,
+        )
+        message = push.event_message('delete', event, recurring=hasattr(event, 'recurrence'))
+        with transaction.atomic():
+            event.delete()
+            record_deletions(calendar_id, [event_id])
+        bump_calendar_version(calendar_id)
+        push.publish(calendar_id, message)
         return JsonResponse({'status': 'success'})
     return JsonResponse({'status': 'error'})
 
 
-@csrf_exempt
-def get_events(request, calendar_id):
-    date_str = request.GET.get('date')
+def get_changes(request, calendar_id):
+    # Изменения календаря после курсора since (без него — с начала):
+    # новые и изменённые события и удаления, в порядке изменения
+    if not Calendar.objects.filter(id=calendar_id).exists():
+        if calendar_deleted(calendar_id):
+            return JsonResponse({'error': 'Calendar deleted', 'deleted': True}, status=410)
+        raise Http404
+    try:
+        changes, cursor, has_more = changes_since(calendar_id, request.GET.get('since'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    except CursorExpired:
+        # Клиент сбрасывает локальную копию и запрашивает ленту без курсора
+        return JsonResponse({'error': 'Cursor expired', 'resync': True}, status=410)
+    return JsonResponse({'changes': changes, 'next': cursor, 'has_more': has_more})
+
+
+@read_from_replica
+def search_events_view(request, calendar_id):
+    query = request.GET.get('q', '').strip()
     try:
-        year, month, day = map(int, date_str.split('-'))
-        date = datetime(year, month, day).date()
+        page = int(request.GET.get('page', 1))
     except ValueError:
+        page = 0
+    if not 1 <= page <= SEARCH_MAX_PAGES:
+        return JsonResponse({'error': 'Invalid page'}, status=400)
+    if not query:
+        return JsonResponse({'results': [], 'page': page, 'next': None})
+    get_object_or_404(Calendar.objects.only('id'), id=calendar_id)
+    results, has_next = search_events(calendar_id, query, page)
+    return JsonResponse({
+        'results': results,
+        'page': page,
+        'next': page + 1 if has_next and page < SEARCH_MAX_PAGES else None,
+    })
+
+
+@csrf_exempt
+@read_from_replica
+@condition(etag_func=get_events_etag, last_modified_func=calendar_last_modified)
+def get_events(request, calendar_id):
+    date = parse_date(request.GET.get('date'))
+    if date is None:
         return JsonResponse({'error': 'Invalid date'}, status=400)
 
-    calendar = get_object_or_404(Calendar, id=calendar_id)
-    events = Event.objects.filter(calendar=calendar, date=date)
+    calendar = request_calendar_or_404(request, calendar_id)
+    events = Event.objects.filter(calendar=calendar).on_day(date)
+    events = events_by_date(events, calendar.id, date, date + timedelta(days=1)).get(date, [])
     events_data = [{'id': e.id, 'title': e.title, 'description': e.description} for e in events]
     return JsonResponse({'events': events_data})
 
 
+@read_from_replica
+def get_events_range(request, calendar_id):
+    start = parse_date(request.GET.get('start'))
+    end = parse_date(request.GET.get('end'))
+    if not start or not end or end <= start:
+        return JsonResponse({'error': 'Invalid range'}, status=400)
+    if (end - start).days > EVENTS_RANGE_MAX_DAYS:
+        return JsonResponse({'error': f'Range is limited to {EVENTS_RANGE_MAX_DAYS} days'}, status=400)
+
+    # Один запрос по индексу (calendar, date) без отдельной выборки Calendar
+    # и один — по таблице правил повторения. События удалённого календаря
+    # отсекает соединение с Calendar по первичному ключу.
+    events = Event.objects.filter(calendar_id=calendar_id, calendar__deleted_at__isnull=True).in_range(start, end)
+    recurring, hidden = recurring_occurrences(calendar_id, start, end)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            cursor_date, cursor_id = cursor.split(':')
+            cursor_date = parse_date(cursor_date)
+            cursor_id = int(cursor_id)
+        except ValueError:
+            cursor_date = None
+        if not cursor_date:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        events = events.filter(Q(date__gt=cursor_date) | Q(date=cursor_date, id__gt=cursor_id))
+
+    rows = list(
+        events.order_by('date', 'id')
+        .values_list('id', 'date', 'title', 'description')[:EVENTS_RANGE_PAGE_SIZE + 1]
+    )
+    next_cursor = None
+    if len(rows) > EVENTS_RANGE_PAGE_SIZE:
+        rows = rows[:EVENTS_RANGE_PAGE_SIZE]
+        last_id, last_date = rows[-1][0], rows[-1][1]
+        next_cursor = f"{last_date.strftime('%Y-%m-%d')}:{last_id}"
+    elif not rows and not recurring and not cursor:
+        # Пустой ответ — отличаем пустой календарь от несуществующего
+        get_object_or_404(Calendar, id=calendar_id)
+
+    grouped = {}
+    for event_id, event_date, title, description in rows:
+        if event_id not in hidden:
+            grouped.setdefault(event_date.strftime('%Y-%m-%d'), []).append(
+                {'id': event_id, 'title': title, 'description': description}
+            )
+    # Повторы не участвуют в курсоре: окно ограничено, и они целиком
+    # отдаются на первой странице
+    if not cursor:
+        for day, event in sorted(recurring, key=lambda pair: (pair[0], pair[1].id)):
+            grouped.setdefault(day.strftime('%Y-%m-%d'), []).append(
+                {'id': event.id, 'title': event.title, 'description': event.description}
+            )
+    return JsonResponse({'events': grouped, 'next': next_cursor})
+
+
+def export_calendar(request, calendar_id):
+    calendar = get_object_or_404(Calendar, id=calendar_id)
+    events = Event.objects.filter(calendar=calendar)
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+    if start or end:
+        start, end = parse_date(start), parse_date(end)
+        if not start or not end or end <= start:
+            return JsonResponse({'error': 'Invalid range'}, status=400)
+        events = events.in_range(start, end)
+
+    response = StreamingHttpResponse(export_events(calendar, events), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{calendar.id}.ics"'
+    return response
+
+
+@csrf_exempt
+@throttle_writes
+def import_calendar(request, calendar_id):
+    if request.method != 'POST' or 'file' not in request.FILES:
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=400)
+    calendar = get_object_or_404(Calendar, id=calendar_id)
+    uploaded = request.FILES['file']
+    file_format = request.POST.get('format') or detect_format(uploaded.name)
+    # Файл читается построчно, без загрузки целиком в память
+    lines = io.TextIOWrapper(uploaded.file, encoding='utf-8-sig', newline='')
+    try:
+        report = import_events(calendar, lines, file_format)
+    except (UnicodeDecodeError, csv.Error):
+        return JsonResponse({'status': 'error', 'message': 'Invalid file'}, status=400)
+    if report['created']:
+        push.publish(calendar.id, push.RESET)
+    return JsonResponse({'status': 'success', **report})
+
+
+@staff_member_required
+def db_stats(request):
+    return JsonResponse(connection_stats())
+
+
+@staff_member_required
+def throttle_stats(request):
+    # Отклонённые и выполняющиеся запросы — по всем воркерам
+    return JsonResponse({
+        'enabled': settings.WRITE_THROTTLE,
+        'shed': shed_stats(),
+        'active_writes': active_writes(),
+        'concurrency_limit': settings.WRITE_CONCURRENCY_LIMIT,
+    })
+
+
 @login_required
 def delete_calendar(request, calendar_id):
+    # Календарь скрывается сразу, события удаляет purge_calendars
     calendar = get_object_or_404(Calendar, id=calendar_id)
-    calendar.delete()
+    request_calendar_deletion(calendar)
     messages.success(request, "Календарь успешно удален.")
-    return redirect('home')
\ No newline at end of file
+    return redirect('home')
+
+
+def calendar_deletion_status(request, calendar_id):
+    deletion = get_object_or_404(CalendarDeletion, calendar_id=calendar_id)
+    return JsonResponse({
+        'status': deletion.status,
+        'total': deletion.total_events,
+        'deleted': deletion.deleted_events,
+    })
\ No newline at end of file
@@ -11,6 +11,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -46,7 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'calendar_app.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'calendar_app.middleware.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,7 +62,8 @@ ROOT_URLCONF = 'calendar_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга для REQUEST_TIMING
+        'BACKEND': 'calendar_app.middleware.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,6 +77,14 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'calendar_project.wsgi.application'
+ASGI_APPLICATION = 'calendar_project.asgi.application'
+
+# Асинхронные вьюхи событий для запуска под ASGI-сервером (uvicorn, daphne)
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', 'False').lower() in ['true', '1']
+
+# Рассылка изменений открытым страницам (/calendar/<id>/stream/, только при
+# ASYNC_VIEWS). LocalBroker работает в памяти одного процесса.
+PUSH_BROKER = os.getenv('PUSH_BROKER', 'calendar_app.push.LocalBroker')
 
 
 # Database
@@ -89,6 +101,97 @@ DATABASES = {
     }
 }
 
+# Переиспользование соединений с БД (DB_POOL_MODE):
+#   none       — новое соединение на каждый запрос (поведение по умолчанию);
+#   persistent — постоянные соединения на поток с проверкой перед использованием;
+#   pool       — пул psycopg 3 (нужен пакет "psycopg[binary,pool]" вместо psycopg2).
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'none').lower()
+
+if DB_POOL_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 600))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_POOL_MODE == 'pool':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            # Сколько секунд ждать свободного соединения
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            # Закрывать соединения, простаивающие дольше (с)
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 600)),
+            # Проверка соединения при выдаче из пула
+            'check': ConnectionPool.check_connection,
+        },
+    }
+
+# Реплики только для чтения: DB_REPLICA_HOSTS=host1,host2:5433 (имя базы, пользователь
+# и пароль — как у основной). Вьюхи только для чтения идут на реплики, записи и всё
+# остальное — в default; после своих изменений клиент DB_REPLICA_STICKY_SECONDS секунд
+# читает с default (см. calendar_app/db.py).
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, map(str.strip, os.getenv('DB_REPLICA_HOSTS', '').split(','))), 1):
+    host, _, port = address.partition(':')
+    replica = copy.deepcopy(DATABASES['default'])
+    replica.update(HOST=host, PORT=port or replica['PORT'], TEST={'MIRROR': 'default'})
+    DATABASES[f'replica{number}'] = replica
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['calendar_app.db.ReplicaRouter']
+
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# По умолчанию — память процесса; для нескольких воркеров укажите файловый
+# или общий бэкенд (например, django.core.cache.backends.redis.RedisCache)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Время жизни закэшированной сетки месяца (в секундах)
+MONTH_GRID_CACHE_TIMEOUT = int(os.getenv('MONTH_GRID_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Сколько дней хранить записи об удалении для ленты изменений
+# (python manage.py prune_tombstones). Клиенту, не синхронизировавшемуся
+# дольше, лента отвечает 410 и он загружает календарь заново.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Секционирование таблицы событий по датам на PostgreSQL: '' (выключено),
+# 'year' или 'month'. См. calendar_app/partitioning.py и команды
+# partition_events и archive_events.
+EVENT_PARTITIONING = os.getenv('EVENT_PARTITIONING', '').lower()
+
+# Замер времени запросов (calendar_app.middleware.RequestTimingMiddleware):
+# доля запросов с подробным замером и заголовком Server-Timing, и порог в
+# миллисекундах, выше которого запрос логируется как медленный
+REQUEST_TIMING = os.getenv('REQUEST_TIMING', 'False').lower() in ['true', '1']
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0.1))
+REQUEST_TIMING_SLOW_MS = float(os.getenv('REQUEST_TIMING_SLOW_MS', 500))
+
+# Ограничение изменяющих запросов (calendar_app/throttle.py): сколько записей
+# разрешено клиенту и календарю за окно в WRITE_THROTTLE_WINDOW секунд
+# (счётчики в кэше THROTTLE_CACHE; общий лимит на все воркеры — с Redis или
+# memcached) и предел одновременных записей во всех процессах (0 — без предела).
+# За прокси адрес клиента берётся из заголовка WRITE_THROTTLE_CLIENT_IP_HEADER
+# (ключ request.META, например HTTP_X_FORWARDED_FOR или HTTP_X_REAL_IP; пусто —
+# REMOTE_ADDR), WRITE_THROTTLE_TRUSTED_PROXIES — число доверенных прокси в цепочке.
+WRITE_THROTTLE = os.getenv('WRITE_THROTTLE', 'False').lower() in ['true', '1']
+WRITE_THROTTLE_WINDOW = int(os.getenv('WRITE_THROTTLE_WINDOW', 10))
+WRITE_THROTTLE_CLIENT_LIMIT = int(os.getenv('WRITE_THROTTLE_CLIENT_LIMIT', 50))
+WRITE_THROTTLE_CALENDAR_LIMIT = int(os.getenv('WRITE_THROTTLE_CALENDAR_LIMIT', 200))
+WRITE_THROTTLE_CLIENT_IP_HEADER = os.getenv('WRITE_THROTTLE_CLIENT_IP_HEADER', '')
+WRITE_THROTTLE_TRUSTED_PROXIES = int(os.getenv('WRITE_THROTTLE_TRUSTED_PROXIES', 1))
+WRITE_CONCURRENCY_LIMIT = int(os.getenv('WRITE_CONCURRENCY_LIMIT', 8))
+THROTTLE_CACHE = 'default'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,6 +236,22 @@ STATICFILES_DIRS = [
 # Куда collectstatic будет собирать статику
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Имена файлов с хешем содержимого и сжатые копии .gz/.br (см. calendar_app/assets.py).
+# Шаблоны ссылаются на имена из манифеста, поэтому нужен collectstatic.
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', 'False').lower() in ['true', '1']
+# Раздавать STATIC_ROOT самим приложением, если перед ним нет nginx
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'False').lower() in ['true', '1']
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'calendar_app.assets.PrecompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,15 @@
+# ./calendar_project/test_settings.py
+
+# Настройки для тестов: python manage.py test --settings=calendar_project.test_settings
+# Вторая база с той же схемой изображает реплику для ReplicaRoutingTests.
+# Репликации между ними нет, поэтому видно, с какой базы читали.
+
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['replica'] = copy.deepcopy(DATABASES['default'])
+DATABASES['replica']['TEST'] = {
+    'NAME': None if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'test_calendar_replica',
+}